@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+
+# end-to-end frame latency benchmark
+#
+# drive scenes through AbsApp.getUI(), Display.setLayout()/updateLayout()/refreshDisplay()
+# and the touch input path, against the panel emulator(460800 baud link is modelled in real time).
+#
+# usage : python benchmarks/bench_frames.py [--frames N] [--scene NAME] [--output result.json] [--compare old.json]
+#                                           [--trace trace.json]
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, root)
+# sample/sample.py is imported as 'sample' for HomeApp
+sys.path.insert(0, os.path.join(root, 'sample'))
+
+import mui_ui
+from mui_ui import display as display_module
+from mui_ui import tracer
+from mui_ui import Display, AbsApp, AppEventListener, Text, TypeWriterText, Slider, Compositor
+from mui_ui import MotionEvent, GestureDetector, GestureListener, VALUE_DOWN, VALUE_MOVE, VALUE_UP
+from mui_ui.parts import AbsParts
+from mui_ui.emulator import PanelEmulator, EmulatedSerial
+
+STAGES = ('input', 'layout', 'merge', 'pack', 'diff', 'encode', 'write', 'ack', 'total')
+PERCENTILES = (50, 90, 99)
+
+JAPANESE_TEXT = [
+    'むいは木でできたディスプレイです。触れると文字が浮かび上がります。',
+    '今日の天気は晴れ、最高気温は二十三度です。洗濯日和になりそうです。',
+    '京都嵐山の竹林を散歩しました。風の音がとても心地よかったです。',
+]
+
+
+class StageTimer(object):
+    """
+    wrap functions and accumulate exclusive time of each stage in current frame.
+    nested stage time is not counted to outer stage(e.g. view rasterisation inside compose()).
+    """
+
+    def __init__(self):
+        self.frame = {}
+        self._stack = []
+        self._restore = []
+
+    def wrap(self, owner, attr, stage):
+        orig = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+
+        def wrapper(*args, **kwargs):
+            self._stack.append(0)
+            start = time.perf_counter()
+            try:
+                return orig(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                child = self._stack.pop()
+                self.add(stage, elapsed - child)
+                if len(self._stack) > 0:
+                    self._stack[-1] += elapsed
+
+        setattr(owner, attr, wrapper)
+        self._restore.append((owner, attr, orig))
+
+    def add(self, stage, t):
+        self.frame[stage] = self.frame.get(stage, 0) + t
+
+    def measure(self, stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.add(stage, time.perf_counter() - start)
+        return result
+
+    def reset(self):
+        self.frame = {}
+
+    def restore(self):
+        for owner, attr, orig in reversed(self._restore):
+            setattr(owner, attr, orig)
+        self._restore = []
+
+
+def install(timer):
+    # views rasterisation
+    for name in dir(mui_ui):
+        cls = getattr(mui_ui, name)
+        if isinstance(cls, type) and issubclass(cls, AbsParts) and ('getMatrix' in cls.__dict__):
+            timer.wrap(cls, 'getMatrix', 'layout')
+
+    timer.wrap(Compositor, 'compose', 'merge')
+    timer.wrap(Display, 'setLayout', 'pack')
+    timer.wrap(display_module, 'check_bit_diff_rects', 'diff')
+    timer.wrap(display_module, 'encode_layout_packet', 'encode')
+    timer.wrap(EmulatedSerial, 'write', 'write')
+
+
+class _Listener(AppEventListener, GestureListener):
+
+    def __init__(self):
+        self.requests = 0
+
+    def requestUpdateDisplay(self, app, fade):
+        self.requests += 1
+
+    def setNextApp(self, app):
+        pass
+
+    def onCloseApp(self, app):
+        pass
+
+    def onChangeDuty(self, duty):
+        pass
+
+
+class _App(AbsApp):
+
+    def startTask(self):
+        pass
+
+    def stopTask(self):
+        pass
+
+    def onTurnOffDisplay(self):
+        return True
+
+
+def touch(action, x, y, t):
+    e = MotionEvent()
+    e.action = action
+    e.x = x
+    e.y = y
+    e.timestamp = t
+    return e
+
+
+class Scene(object):
+    name = ''
+
+    def __init__(self, listener):
+        self.listener = listener
+        self.app = None
+
+    def step(self, i, timer):
+        raise NotImplementedError
+
+
+class HomeScene(Scene):
+    """
+    sample HomeApp with clock update every frame
+    """
+    name = 'home'
+
+    def __init__(self, listener):
+        super().__init__(listener)
+        from sample import HomeApp
+        self.app = HomeApp(listener)
+        self.clock = self.app.getView('clock')
+
+    def step(self, i, timer):
+        views = self.clock._views
+        views['h'].setText('{:02d}'.format((i // 60) % 24))
+        views['m'].setText('{:02d}'.format(i % 60))
+        views[':'].visible = (i % 2) == 0
+        self.clock.invalidate()
+
+
+class JapaneseTextScene(Scene):
+    """
+    full screen Japanese Text, text changes every frame
+    """
+    name = 'japanese_text'
+
+    def __init__(self, listener):
+        super().__init__(listener)
+        self.app = _App(listener)
+        self.text = Text(JAPANESE_TEXT[0])
+        self.text.setSize(0, 0, 200, 32)
+        self.app.addView(self.text)
+
+    def step(self, i, timer):
+        self.text.setText(JAPANESE_TEXT[i % len(JAPANESE_TEXT)])
+
+
+class SliderScene(Scene):
+    """
+    drag slider thumb back and forth through touch input path
+    """
+    name = 'slider'
+
+    def __init__(self, listener):
+        super().__init__(listener)
+        self.app = _App(listener)
+        self.value = Text('0')
+        self.value.setSize(0, 0, 30, 11)
+        self.app.addView(self.value)
+
+        self.slider = Slider(width=160, maxVal=100)
+        self.slider.setPos(30, 11)
+        self.app.addView(self.slider)
+
+        self.detector = GestureDetector(listener=listener, longpress_timeout=3600)
+        self._t = 0
+
+    def step(self, i, timer):
+        # 30 frames per drag
+        pos = i % 30
+        x = 30 + (pos * 5)
+        self._t += 0.02
+        action = VALUE_DOWN if pos == 0 else (VALUE_UP if pos == 29 else VALUE_MOVE)
+        timer.measure('input', self.dispatch, touch(action, x, 16, self._t))
+
+    def dispatch(self, e):
+        # same path as MuiMain.onInputEvent
+        if self.detector.onTouchEvent(e) is False:
+            self.app.dispatchTouchEvent(e)
+        self.value.setText(str(self.slider.getValue()))
+
+
+class TypeWriterScene(Scene):
+    """
+    type a character every frame
+    """
+    name = 'typewriter'
+
+    def __init__(self, listener):
+        super().__init__(listener)
+        self.app = _App(listener)
+        self.text = TypeWriterText()
+        self.text.setSize(0, 0, 200, 32)
+        self.app.addView(self.text)
+        self.source = JAPANESE_TEXT[1]
+
+    def step(self, i, timer):
+        # same step as TypeWriterText._doTypewriter, restart before text is full
+        pos = i % 40
+        if pos == 0:
+            Text.setText(self.text, '')
+        Text.addText(self.text, self.source[pos % len(self.source)])
+
+
+SCENES = (HomeScene, JapaneseTextScene, SliderScene, TypeWriterScene)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if len(values) == 0:
+        return 0
+    k = (len(values) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(values) - 1)
+    return values[f] + ((values[c] - values[f]) * (k - f))
+
+
+def summarize(samples):
+    result = {}
+    for stage, values in samples.items():
+        r = {'mean': sum(values) / len(values), 'max': max(values)}
+        for p in PERCENTILES:
+            r['p{0}'.format(p)] = percentile(values, p)
+        result[stage] = r
+    return result
+
+
+def run_scene(sceneClass, frames, warmup=10):
+    panel = PanelEmulator()
+    port = EmulatedSerial(panel)
+    display = Display(port=port)
+    listener = _Listener()
+    scene = sceneClass(listener)
+
+    timer = StageTimer()
+    install(timer)
+    samples = {stage: [] for stage in STAGES}
+    samples['bytes'] = []
+    try:
+        for i in range(warmup + frames):
+            timer.reset()
+            written = port.bytesWritten
+            start = time.perf_counter()
+
+            scene.step(i, timer)
+            display.setLayout(scene.app.getUI())
+            display.updateLayout()
+            timer.measure('ack', display.refreshDisplay().result)
+
+            total = time.perf_counter() - start
+            if i < warmup:
+                continue
+
+            timer.add('total', total)
+            for stage in STAGES:
+                samples[stage].append(timer.frame.get(stage, 0))
+            samples['bytes'].append(port.bytesWritten - written)
+    finally:
+        timer.restore()
+        display.close()
+
+    result = summarize(samples)
+    result['frames'] = frames
+    result['displayed'] = panel.frameCount
+    result['link'] = port.linkTime
+    result['errors'] = panel.errors
+    return result
+
+
+def environment():
+    env = {
+        'version': mui_ui.__version__,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+    }
+    try:
+        env['commit'] = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                                                stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return env
+
+
+def report(name, result, base=None):
+    print('{0} : {1} frames, {2} displayed, link busy {3:.1f} ms'.format(
+        name, result['frames'], result['displayed'], result['link'] * 1e3))
+    print('  {0:8s} {1:>9s} {2:>9s} {3:>9s} {4:>9s}'.format('stage', 'p50', 'p90', 'p99', 'max'))
+    for stage in STAGES:
+        r = result[stage]
+        line = '  {0:8s} {1:9.3f} {2:9.3f} {3:9.3f} {4:9.3f} ms'.format(
+            stage, r['p50'] * 1e3, r['p90'] * 1e3, r['p99'] * 1e3, r['max'] * 1e3)
+        if base is not None and stage in base and base[stage]['p50'] > 0:
+            line += '  p50 {0:+.1f}%'.format(((r['p50'] / base[stage]['p50']) - 1) * 100)
+        print(line)
+
+    b = result['bytes']
+    print('  {0:8s} {1:9.0f} {2:9.0f} {3:9.0f} {4:9.0f} bytes'.format('wire', b['p50'], b['p90'], b['p99'], b['max']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='mui end-to-end frame latency benchmark')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--scene', action='append', choices=[s.name for s in SCENES])
+    parser.add_argument('--output', help='write result as JSON')
+    parser.add_argument('--compare', help='JSON result of previous run')
+    parser.add_argument('--trace', help='write spans of last frames as Chrome trace JSON')
+    args = parser.parse_args(argv)
+
+    if args.trace is not None:
+        tracer.enable()
+
+    base = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            base = json.load(f)['scenes']
+
+    results = {'environment': environment(), 'scenes': {}}
+    for sceneClass in SCENES:
+        if args.scene is not None and sceneClass.name not in args.scene:
+            continue
+        result = run_scene(sceneClass, args.frames)
+        results['scenes'][sceneClass.name] = result
+        report(sceneClass.name, result, base.get(sceneClass.name))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.trace is not None:
+        tracer.get_tracer().dump(args.trace)
+        tracer.disable()
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
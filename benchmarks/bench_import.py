@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+# import time and boot-to-first-frame benchmark
+#
+# each case runs in a fresh interpreter, so nothing is cached in sys.modules.
+# 'first frame' is measured against the panel emulator, from interpreter start of the case
+# to the panel ACK of the first refresh request.
+#
+# usage : python benchmarks/bench_import.py [--runs N] [--output result.json] [--compare old.json]
+#                                           [--profile CASE]
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# modules which should not be imported unless the app uses them
+HEAVY_MODULES = ('serial', 'evdev', 'PIL', 'multiping', 'crc8', 'RPi', 'asyncio', 'numpy', 'json')
+
+CASES = {
+    # package only
+    'import': """
+import mui_ui
+""",
+    # app which renders only Text
+    'text': """
+from mui_ui import Text
+text = Text('mui')
+text.setSize(0, 0, 200, 32)
+text.getMatrix()
+""",
+    # app on display, until the first frame is shown
+    'first_frame': """
+from mui_ui import Display, AbsApp, Text
+from mui_ui.emulator import PanelEmulator, EmulatedSerial
+
+class App(AbsApp):
+    def startTask(self):
+        pass
+    def stopTask(self):
+        pass
+    def onTurnOffDisplay(self):
+        return True
+
+display = Display(port=EmulatedSerial(PanelEmulator()))
+app = App(None)
+text = Text('mui')
+text.setSize(0, 0, 200, 32)
+app.addView(text)
+display.setLayout(app.getUI())
+display.updateLayout()
+display.refreshDisplay().result()
+display.close()
+""",
+}
+
+RUNNER = """
+import sys, time, io, contextlib
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+with contextlib.redirect_stdout(io.StringIO()):
+    exec(compile({source!r}, 'case', 'exec'))
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+import json
+print(json.dumps({{'time': elapsed, 'modules': len(sys.modules), 'heavy': heavy}}))
+"""
+
+
+def run_case(source):
+    code = RUNNER.format(root=root, source=source, heavy=HEAVY_MODULES)
+    # run out of the repository, so 'import mui_ui' is resolved by sys.path of the runner
+    out = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(root))
+    return json.loads(out.decode().strip().splitlines()[-1])
+
+
+def import_profile(source, top=10):
+    # biggest cumulative import times of a case(python -X importtime)
+    code = 'import sys\nsys.path.insert(0, {0!r})\n'.format(root) + source
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=os.path.dirname(root),
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    rows = []
+    for line in proc.stderr.decode().splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]), parts[2].rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='mui import time benchmark')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', help='write result as JSON')
+    parser.add_argument('--compare', help='JSON result of previous run')
+    parser.add_argument('--profile', choices=list(CASES), help='show slowest imports of a case')
+    args = parser.parse_args(argv)
+
+    base = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            base = json.load(f)['cases']
+
+    results = {'python': sys.version.split()[0], 'cases': {}}
+    print('  {0:12s} {1:>9s} {2:>9s} {3:>8s}  {4}'.format('case', 'median', 'min', 'modules', 'heavy modules'))
+    for name, source in CASES.items():
+        runs = [run_case(source) for _ in range(args.runs)]
+        times = sorted(r['time'] for r in runs)
+        result = {
+            'median': times[len(times) // 2],
+            'min': times[0],
+            'modules': runs[-1]['modules'],
+            'heavy': runs[-1]['heavy'],
+        }
+        results['cases'][name] = result
+
+        line = '  {0:12s} {1:9.1f} {2:9.1f} {3:8d}  {4}'.format(
+            name, result['median'] * 1e3, result['min'] * 1e3, result['modules'], ', '.join(result['heavy']) or '-')
+        if name in base and base[name]['median'] > 0:
+            line += '  median {0:+.1f}%'.format(((result['median'] / base[name]['median']) - 1) * 100)
+        print(line)
+    print('  (ms)')
+
+    if args.profile is not None:
+        print('slowest imports of {0}(cumulative us) :'.format(args.profile))
+        for us, module in import_profile(CASES[args.profile]):
+            print('  {0:8d} {1}'.format(us, module))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
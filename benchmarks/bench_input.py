@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+# micro benchmark of evdev event decoding
+#
+# feed a recorded evdev stream through the previous InputHandler decoding(AbsInfo lookup per axis event
+# and property setters of one shared InputEvent) and through EventDecoder.
+# without --input, a stream of 100 Hz swipes is generated.
+#
+# usage : python benchmarks/bench_input.py [--input recording.bin --range XMAX YMAX] [--repeat N]
+#
+# record a stream on the device :
+#   cat /dev/input/event0 > recording.bin
+
+import os
+import sys
+import struct
+import timeit
+import argparse
+import collections
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mui_ui.input import InputEvent, EventDecoder, Calibration, EVENT_FORMAT
+from mui_ui.input import EV_SYN, EV_KEY, EV_ABS, EV_MSC, ABS_X, ABS_Y, ABS_PRESSURE, MSC_SERIAL, BTN_TOUCH
+from mui_ui.input import VALUE_DOWN, VALUE_MOVE, VALUE_UP
+
+AbsInfo = collections.namedtuple('AbsInfo', ('value', 'min', 'max'))
+
+
+class RawEvent(object):
+    # same attributes as evdev.InputEvent
+    __slots__ = ('sec', 'usec', 'type', 'code', 'value')
+
+    def __init__(self, sec, usec, type, code, value):
+        self.sec = sec
+        self.usec = usec
+        self.type = type
+        self.code = code
+        self.value = value
+
+    def timestamp(self):
+        return self.sec + (self.usec / 1000000.0)
+
+
+def generate(swipes=200, moves=30, x_max=4095, y_max=4095):
+    # swipe across the panel at 100 Hz
+    data = bytearray()
+    t = 0
+    for i in range(swipes):
+        y = (i * 97) % y_max
+        for j in range(moves + 2):
+            x = (j * x_max) // (moves + 1)
+            sec, usec = divmod(t, 1000000)
+            if j == 0:
+                data += struct.pack(EVENT_FORMAT, sec, usec, EV_KEY, BTN_TOUCH, VALUE_DOWN)
+            elif j == moves + 1:
+                data += struct.pack(EVENT_FORMAT, sec, usec, EV_KEY, BTN_TOUCH, VALUE_UP)
+            data += struct.pack(EVENT_FORMAT, sec, usec, EV_ABS, ABS_X, x)
+            data += struct.pack(EVENT_FORMAT, sec, usec, EV_ABS, ABS_Y, y)
+            data += struct.pack(EVENT_FORMAT, sec, usec, EV_ABS, ABS_PRESSURE, 100)
+            data += struct.pack(EVENT_FORMAT, sec, usec, EV_SYN, 0, 0)
+            t += 10000
+        t += 200000
+    return bytes(data)
+
+
+class LegacyDecoder(object):
+    # decoding of InputHandler.eventLoop before EventDecoder
+
+    def __init__(self, name, x_max, y_max):
+        self.name = name
+        self.path = '/dev/input/event0'
+        self._devices = {self.path: {ABS_X: AbsInfo(0, 0, x_max), ABS_Y: AbsInfo(0, 0, y_max)}}
+        self.inputEvent = None
+        self.changeKey = False
+        self.frames = []
+
+    def handle(self, ev):
+        if self.inputEvent == None:
+            self.inputEvent = InputEvent()
+
+        if ev.type == EV_SYN:
+            if (self.inputEvent.press == -1):
+                return
+
+            if self.changeKey == False:
+                self.inputEvent.action = VALUE_MOVE
+
+            self.inputEvent.dev_name = self.name
+            self.inputEvent.timestamp = ev.timestamp()
+
+            e = InputEvent()
+            e.copy(self.inputEvent)
+            self.frames.append(e)
+
+            if self.inputEvent.action == VALUE_UP:
+                self.inputEvent.press = -1
+
+            self.changeKey = False
+
+        if (ev.type == EV_ABS and ev.code == ABS_X):
+            factor_x = self._devices[self.path][ABS_X].max / 200
+            self.inputEvent.x = int(ev.value // factor_x)
+            self.inputEvent.org_x = int(ev.value)
+
+        if (ev.type == EV_ABS and ev.code == ABS_Y):
+            factor_y = self._devices[self.path][ABS_Y].max / 32
+            self.inputEvent.y = int(ev.value // factor_y)
+            self.inputEvent.org_y = int(ev.value)
+
+        if (ev.type == EV_ABS and ev.code == ABS_PRESSURE):
+            self.inputEvent.press = ev.value
+
+        if (ev.type == EV_MSC and ev.code == MSC_SERIAL):
+            self.inputEvent.id = ev.value
+
+        if (ev.type == EV_KEY):
+            self.inputEvent.action = ev.value
+            if (ev.value == VALUE_DOWN):
+                self.inputEvent.press = 0
+            self.inputEvent.code = ev.code
+            self.changeKey = True
+
+
+def run_legacy(events, x_max, y_max):
+    decoder = LegacyDecoder('bench', x_max, y_max)
+    for ev in events:
+        decoder.handle(ev)
+    return decoder.frames
+
+
+def run_decoder(events, calibration):
+    decoder = EventDecoder('bench', calibration)
+    feed = decoder.feed
+    frames = []
+    for ev in events:
+        e = feed(ev.sec, ev.usec, ev.type, ev.code, ev.value)
+        if e is not None:
+            frames.append(e)
+    return frames
+
+
+def run_struct(data, calibration):
+    # recorded stream decoded from bytes without evdev event objects
+    decoder = EventDecoder('bench', calibration)
+    feed = decoder.feed
+    frames = []
+    for sec, usec, etype, code, value in struct.iter_unpack(EVENT_FORMAT, data):
+        e = feed(sec, usec, etype, code, value)
+        if e is not None:
+            frames.append(e)
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='mui evdev decoding benchmark')
+    parser.add_argument('--input', help='recorded evdev stream')
+    parser.add_argument('--range', type=int, nargs=2, default=(4095, 4095), metavar=('XMAX', 'YMAX'),
+                        help='max value of ABS_X and ABS_Y of the recorded device')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    x_max, y_max = args.range
+    if args.input is not None:
+        with open(args.input, 'rb') as f:
+            data = f.read()
+        data = data[:len(data) - (len(data) % struct.calcsize(EVENT_FORMAT))]
+    else:
+        data = generate(x_max=x_max, y_max=y_max)
+
+    events = [RawEvent(*fields) for fields in struct.iter_unpack(EVENT_FORMAT, data)]
+    calibration = Calibration(0, x_max, 0, y_max)
+
+    # check results are same. positions may differ by rounding, and by clamp at the edge
+    legacy = run_legacy(events, x_max, y_max)
+    decoded = run_decoder(events, calibration)
+    assert len(legacy) == len(decoded)
+    for a, b in zip(legacy, decoded):
+        assert (a.action, a.timestamp, a.org_x, a.org_y) == (b.action, b.timestamp, b.org_x, b.org_y)
+        assert abs(a.x - b.x) <= 1 and abs(a.y - b.y) <= 1
+
+    print('{0} raw events, {1} frames'.format(len(events), len(decoded)))
+    cases = (
+        ('legacy', lambda: run_legacy(events, x_max, y_max)),
+        ('decoder', lambda: run_decoder(events, calibration)),
+        ('struct', lambda: run_struct(data, calibration)),
+    )
+    base = None
+    for name, func in cases:
+        t = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        base = t if base is None else base
+        print('  {0:8s} : {1:8.3f} us / event  {2:8.3f} us / frame  x{3:.2f}'.format(
+            name, (t / len(events)) * 1e6, (t / len(decoded)) * 1e6, base / t))
+
+
+if __name__ == '__main__':
+    main()
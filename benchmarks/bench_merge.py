@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# micro benchmark of Matrix.merge()
+#
+# compare blit() loops over the precomputed intersection with the numpy version of the same operation,
+# for glyph size, widget size and full frame sources.
+# usage : python benchmarks/bench_merge.py
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from mui_ui.matrix import Matrix, BLIT_OR, BLIT_AND, BLIT_XOR, BLIT_COPY, BLIT_MASK
+
+MODES = (('or', BLIT_OR), ('copy', BLIT_COPY), ('xor', BLIT_XOR), ('and', BLIT_AND), ('mask', BLIT_MASK))
+
+
+def numpy_blit(dst, src, bX, bY, mode):
+    # whole area array operation on numpy views
+    ox = bX - dst.startX
+    oy = bY - dst.startY
+    x0 = max(ox, 0)
+    y0 = max(oy, 0)
+    x1 = min(ox + src.width, dst.width)
+    y1 = min(oy + src.height, dst.height)
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    d = dst.asarray()[y0:y1, x0:x1]
+    s = src.asarray()[y0 - oy:y1 - oy, x0 - ox:x1 - ox] != 0
+    if mode == BLIT_OR:
+        d |= s
+    elif mode == BLIT_AND:
+        d &= s
+    elif mode == BLIT_XOR:
+        d ^= s
+    elif mode == BLIT_COPY:
+        d[...] = s
+    else:
+        d &= ~s
+
+
+def create_matrix(w, h, x, y):
+    random.seed(w * h)
+    m = Matrix(w, h)
+    a = m.asarray()
+    a[...] = np.array([[1 if random.random() < 0.3 else 0 for _ in range(w)] for _ in range(h)])
+    m.startX = x
+    m.startY = y
+    return m
+
+
+def run(name, src, number):
+    print('{0} ({1}x{2})'.format(name, src.width, src.height))
+    for modeName, mode in MODES:
+        # check results are same
+        dst = create_matrix(200, 32, 0, 0)
+        expected = create_matrix(200, 32, 0, 0)
+        numpy_blit(expected, src, src.startX, src.startY, mode)
+        dst.merge(src, mode)
+        assert np.array_equal(dst.asarray(), expected.asarray())
+
+        tLoop = timeit.timeit(lambda: dst.merge(src, mode), number=number) / number
+        tNumpy = timeit.timeit(lambda: numpy_blit(dst, src, src.startX, src.startY, mode), number=number) / number
+        print('  {0:5s} merge : {1:8.2f} us   numpy : {2:8.2f} us'.format(modeName, tLoop * 1e6, tNumpy * 1e6))
+
+
+if __name__ == '__main__':
+    run('glyph', create_matrix(8, 8, 40, 12), 20000)
+    run('widget', create_matrix(50, 11, 120, 11), 5000)
+    run('clipped widget', create_matrix(50, 11, 180, 25), 5000)
+    run('full frame', create_matrix(200, 32, 0, 0), 1000)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# micro benchmark of layout packet encoding
+#
+# compare the former pure python packet builder of Display with encode_layout_packet().
+# usage : python benchmarks/bench_packet.py
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mui_ui.matrix import Matrix, BitMatrix, encode_layout_packet
+
+
+def legacy_layout_packet(m, minX, minY, w, h):
+    # packet builder of Display before encode_layout_packet()
+    dataLen = ((w // 8) * h) + 8
+    buf = bytearray(dataLen + 5)
+    buf[0] = (( dataLen + 3) >> 8) & 0xFF
+    buf[1] = (( dataLen + 3) & 0xFF )
+    buf[2] = 0x00
+    buf[3] = 0x02
+    buf[4] = 0x00
+    buf[5] = minX
+    buf[6] = 0x00
+    buf[7] = minY
+    buf[8] = 0x00
+    buf[9] = w
+    buf[10] = 0x00
+    buf[11] = h
+
+    index = 0
+    for y in range(minY, minY + h):
+        for x in range(minX, minX + w, 8):
+            tmp = ( m[y][x + 0] << 7 )
+            tmp |= ( m[y][x + 1] << 6 )
+            tmp |= ( m[y][x + 2] << 5 )
+            tmp |= ( m[y][x + 3] << 4 )
+            tmp |= ( m[y][x + 4] << 3 )
+            tmp |= ( m[y][x + 5] << 2 )
+            tmp |= ( m[y][x + 6] << 1 )
+            tmp |= ( m[y][x + 7] << 0 )
+            buf[12 + index] = tmp
+            index += 1
+
+    sum = 0
+    for i in range(2, dataLen + 5):
+        sum = sum + buf[i]
+    buf[dataLen + 4] = (sum & 0xFF)
+    return buf
+
+
+def create_frame():
+    random.seed(0)
+    m = Matrix(200, 32)
+    for y in range(32):
+        for x in range(200):
+            m.matrix[y][x] = 1 if random.random() < 0.3 else 0
+    return m
+
+
+def run(name, area, number):
+    m = create_frame()
+    bm = BitMatrix.fromMatrix(m)
+    buf = bytearray(813)
+    x, y, w, h = area
+
+    # check packets are same
+    size = encode_layout_packet(m, x, y, w, h, buf)
+    expected = legacy_layout_packet(m.matrix, x, y, w, h)
+    assert bytes(buf[:size]) == bytes(expected)
+    size = encode_layout_packet(bm, x, y, w, h, buf)
+    assert bytes(buf[:size]) == bytes(expected)
+
+    tLegacy = timeit.timeit(lambda: legacy_layout_packet(m.matrix, x, y, w, h), number=number) / number
+    tMatrix = timeit.timeit(lambda: encode_layout_packet(m, x, y, w, h, buf), number=number) / number
+    tBit = timeit.timeit(lambda: encode_layout_packet(bm, x, y, w, h, buf), number=number) / number
+
+    print('{0} ({1} bytes)'.format(name, size))
+    print('  legacy python      : {0:10.2f} us'.format(tLegacy * 1e6))
+    print('  encode (Matrix)    : {0:10.2f} us  x{1:.1f}'.format(tMatrix * 1e6, tLegacy / tMatrix))
+    print('  encode (BitMatrix) : {0:10.2f} us  x{1:.1f}'.format(tBit * 1e6, tLegacy / tBit))
+
+
+if __name__ == '__main__':
+    run('full frame', (0, 0, 200, 32), 200)
+    run('diff area 48x10', (40, 8, 48, 10), 2000)
@@ -1,27 +1,68 @@
 #
-from mui_ui.matrix import Matrix, check_diff_range
-from mui_ui.display import Display, reset_display
-from mui_ui.display_manager import DisplayManager, DisplayEventListener
-from mui_ui.muifont import MuiFont
-from mui_ui.input import MotionEvent, InputEvent, InputEventListener, InputHandler, VALUE_DOWN, VALUE_MOVE, VALUE_UP
-from mui_ui.gesturedetector import GestureListener, GestureDetector
-from mui_ui.parts import AbsParts, OnTouchEventListener, OnUpdateRequestListener
-from mui_ui.text import Text, Border, TextAlignment
-from mui_ui.autoscroll_text import AutoScrollText
-from mui_ui.typewriter_text import TypeWriterText, TypeWriterEventListener
-from mui_ui.image import Image
-from mui_ui.widget import Widget
-from mui_ui.clock import DigitalClock
-from mui_ui.slider import Slider, SliderEventListener
-from mui_ui.keyboard import Keyboard, KeyboardListener
-from mui_ui.dialog import Dialog, DialogListener
-from mui_ui.application import AbsApp, AppEventListener
-from mui_ui.app_message import Message
-from mui_ui.wifi_utility import MuiNetworkUtil
+# public names of mui_ui are loaded lazily.
+# a submodule is imported at first access of its name(PEP 562), so an app imports only what it uses.
+# e.g. an app which renders Text does not import serial, evdev, PIL or multiping.
+import importlib
 
 # lib version
 __version__ = '0.2.0'
 
 # mui Β Display size
 DISPLAY_WIDTH = 200
-DISPLAY_HEIGHT = 32
\ No newline at end of file
+DISPLAY_HEIGHT = 32
+
+# submodule : public names
+_modules = {
+    'matrix': ('Matrix', 'BitMatrix', 'check_diff_range', 'check_bit_diff_range', 'check_bit_diff_rects', 'encode_layout_packet',
+               'BLIT_OR', 'BLIT_AND', 'BLIT_XOR', 'BLIT_COPY', 'BLIT_MASK'),
+    'tracer': ('Tracer', 'Span'),
+    'frame_clock': ('FrameClock', 'Animation'),
+    'display_scheduler': ('CommandScheduler', 'AsyncCommandScheduler', 'LinkStats'),
+    'display': ('Display', 'AsyncDisplay', 'reset_display'),
+    'display_pipeline': ('DisplayPipeline',),
+    'emulator': ('PanelEmulator', 'EmulatedSerial', 'PtyPanel'),
+    'display_manager': ('DisplayManager', 'DisplayEventListener'),
+    'font_atlas': ('FontAtlas', 'build_font_atlas'),
+    'muifont': ('MuiFont',),
+    'input': ('MotionEvent', 'InputEvent', 'InputEventListener', 'InputHandler', 'EventCoalescer', 'EventDecoder', 'Calibration', 'VALUE_DOWN', 'VALUE_MOVE', 'VALUE_UP',
+              'COALESCE_NONE', 'COALESCE_BATCH', 'COALESCE_FRAME'),
+    'velocity_tracker': ('VelocityTracker',),
+    'gesturedetector': ('GestureListener', 'GestureDetector'),
+    'scroller': ('Scroller',),
+    'parts': ('AbsParts', 'OnTouchEventListener', 'OnUpdateRequestListener'),
+    'compositor': ('Compositor', 'Layer'),
+    'text': ('Text', 'TextLayout', 'Border', 'TextAlignment'),
+    'autoscroll_text': ('AutoScrollText',),
+    'typewriter_text': ('TypeWriterText', 'TypeWriterEventListener'),
+    'asset_bundle': ('AssetBundle', 'build_bundle', 'register_bundle', 'get_bundle'),
+    'image': ('Image', 'BitmapCache', 'decode_image'),
+    'widget': ('Widget',),
+    'clock': ('DigitalClock',),
+    'slider': ('Slider', 'SliderEventListener'),
+    'keyboard': ('Keyboard', 'KeyboardListener'),
+    'dialog': ('Dialog', 'DialogListener'),
+    'application': ('AbsApp', 'AppEventListener'),
+    'app_message': ('Message',),
+    'runtime': ('Runtime',),
+    'wifi_utility': ('MuiNetworkUtil',),
+}
+
+# public name : submodule
+_names = {attr: module for module, attrs in _modules.items() for attr in attrs}
+
+__all__ = ['DISPLAY_WIDTH', 'DISPLAY_HEIGHT'] + list(_names)
+
+
+def __getattr__(attr):
+    module = _names.get(attr)
+    if module is None:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, attr))
+
+    value = getattr(importlib.import_module('.' + module, __name__), attr)
+    # next access does not come here
+    globals()[attr] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_names))
@@ -2,16 +2,18 @@
 
 # mui message applicaion class
 
-import time
-from threading import Thread
-from threading import Timer
-
 try:
     from application import AbsApp, AppEventListener
     from parts import AbsParts, OnTouchEventListener
     from text import Text
+    from frame_clock import FrameClock
 except ImportError:
-    from . import AbsApp, AppEventListener, AbsParts, Text, OnTouchEventListener
+    from . import AbsApp, AppEventListener, AbsParts, Text, OnTouchEventListener, FrameClock
+
+# time between shown characters(seconds)
+TYPE_INTERVAL = 0.25
+# time to show message after all characters are shown(seconds)
+SHOW_TIME = 10
 
 
 
@@ -37,21 +39,18 @@ class Message(AbsApp, OnTouchEventListener):
         self._msg = msg
         
     def showMessage(self):
+        # generator animation run on FrameClock
+        clock = FrameClock.get_instance()
         for s in self._msg:
-            # print("--- call task ---")
-            tS = time.time()
             self._textView.addText(s)
-            self.appEventListener.requestUpdateDisplay(self, 0)
-            tE = time.time()
-            diff = tE - tS
-            # print("--- time : {0} ---", diff)
-            if diff < 0.25:
-                time.sleep(0.25 - (tE - tS))
+            clock.post(self, self.updateRequest, 0)
+            yield TYPE_INTERVAL
 
             if self._doTask == False:
                 break
 
-        time.sleep(10)
+        yield SHOW_TIME
+        self._task = None
         self.close()
 
 
@@ -61,15 +60,13 @@ class Message(AbsApp, OnTouchEventListener):
         self.close()
 
     def startTask(self):
-        t = Timer(0.5, self._startShowMessage)
-        t.start()
-
-    def _startShowMessage(self):
-        self._task = Thread(target= self.showMessage)
         self._doTask = True
-        self._task.start()
+        self._task = FrameClock.get_instance().animate(self.showMessage(), 0.5)
 
     def stopTask(self):
         self._doTask = False
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
 
 
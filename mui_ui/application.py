@@ -4,14 +4,13 @@
 
 from abc import ABCMeta, abstractmethod
 
-import time
-
 try:
     from matrix import Matrix
     from parts import AbsParts
     from input import MotionEvent, InputEvent
+    from compositor import Compositor
 except ImportError:
-    from . import Matrix, AbsParts, MotionEvent, InputEvent
+    from . import Matrix, AbsParts, MotionEvent, InputEvent, Compositor
 
 
 class AppEventListener(object):
@@ -110,6 +109,7 @@ class AbsApp(metaclass=ABCMeta):
     def __init__(self, appEventListener: AppEventListener):
         self._views = []
         self._vDic = {}
+        self._compositor = Compositor(200, 32)
         self.appEventListener = appEventListener
 
     def addView(self, v: AbsParts):
@@ -173,6 +173,20 @@ class AbsApp(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    async def onStart(self):
+        """
+        coroutine invoked by Runtime when this application becomes current application.
+        default implementation calls startTask(). override it to await I/O before the application starts.
+        """
+        self.startTask()
+
+    async def onStop(self):
+        """
+        coroutine invoked by Runtime when this application is replaced by next application.
+        default implementation calls stopTask().
+        """
+        self.stopTask()
+
     def onTurnOffDisplay(self) -> bool:
         """
         this method to be invoked by DisplayManager before DisplayManager call onDissmiss().
@@ -230,7 +244,25 @@ class AbsApp(metaclass=ABCMeta):
 
     def dispatchScrollEvent(self, start_event: MotionEvent, end_event: MotionEvent, scrollX, scrollY) -> bool:
         """
-        dispatch scroll event
+        dispatch scroll event.
+        it is dispatched at every move after touch moved over the slop, with distance since last scroll event.
+        please move content and request update by FrameClock.requestUpdate(), so raw moves in a tick make one frame.
+
+        Parameters
+        ----------
+        start_event : MotionEvent
+            touch down event of the scroll
+        end_event : MotionEvent
+            current move event
+        scrollX : int
+            distance along x since last scroll event(last x - current x)
+        scrollY : int
+            distance along y since last scroll event(last y - current y)
+
+        See Also
+        --------
+        GestureDetector
+        Scroller
         """
         return False
 
@@ -245,10 +277,10 @@ class AbsApp(metaclass=ABCMeta):
             touch event information which start fling action
         end_event : MotionEvent
             touch event information which end fling action
-        velocityX : int
-            velocity of x direction
-        velocityY : int
-            velocity of y direction
+        velocityX : float
+            velocity of x direction(pixels per second)
+        velocityY : float
+            velocity of y direction(pixels per second)
 
         See Also
         --------
@@ -272,6 +304,27 @@ class AbsApp(metaclass=ABCMeta):
         """
         pass
 
+    def dispatchDoubleTapEvent(self, event: MotionEvent) -> bool:
+        """
+        dispatch double tap event.
+        if you want to take any action when double tap event occured, please override this method and implements action.
+
+        Parameters
+        ----------
+        event : MotionEvent
+            touch down event of the first tap.
+
+        Returns
+        -------
+        bool
+            True means the event is handled, and second touch down is not dispatched to views.
+
+        See Also
+        --------
+        GestureDetector
+        """
+        return False
+
     def close(self):
         """
         close this application
@@ -318,23 +371,18 @@ class AbsApp(metaclass=ABCMeta):
 
     def getUI(self)-> Matrix:
         """
-        get UI layout matrix data
+        get UI layout matrix data.
+        only the area of changed views is composed again, and returned Matrix is same instance at every call.
 
         Returns
         -------
         Matrix : layout matrix data
         """
-        # s = time.time()
-        m = Matrix(200, 32)
-        m.startX = 0
-        m.startY = 0
-
-        views = self._views
+        return self._compositor.compose(self._views)
 
-        for v in views:
-            if v.visible is True:
-                m.merge(v.getMatrix())
-
-        # e = time.time()
-        # print('!!!*** merge to UI ', (e - s))
-        return m
\ No newline at end of file
+    def invalidate(self):
+        """
+        compose all views again at next getUI().
+        please call this method when you changed drawing data of views directly.
+        """
+        self._compositor.invalidate()
\ No newline at end of file
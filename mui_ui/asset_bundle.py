@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+
+# mui asset bundle class
+#
+# asset bundle is a binary file which packs 1-bit bitmaps of an application.
+# bundle is memory-mapped at runtime, so bitmaps are loaded without PIL and without decoding images.
+#
+# build : python mui_ui/asset_bundle.py [output] [image file or directory ...]
+#
+#   bundle = register_bundle('myapp', 'myapp.bundle')
+#   icon = Image('bundle://myapp/icons/home')
+
+import os
+import sys
+import mmap
+import struct
+from threading import Lock
+
+try:
+    from matrix import BitMatrix, Matrix
+except ImportError:
+    from . import BitMatrix, Matrix
+
+name = os.path.dirname(os.path.abspath(__file__))
+
+BUNDLE_MAGIC = b'MUIB'
+BUNDLE_VERSION = 1
+
+# magic, version, reserved, number of bitmaps
+HEADER_FORMAT = '<4sHHI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# name offset, name length, width, height, data offset
+ENTRY_FORMAT = '<IIHHI'
+ENTRY_SIZE = struct.calcsize(ENTRY_FORMAT)
+
+# reference of bitmap in bundle : bundle://[bundle name]/[bitmap name]
+BUNDLE_SCHEME = 'bundle://'
+
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.gif')
+
+# bundle of mui_ui widgets(keyboard, slider)
+muiBundleFile = os.path.normpath(os.path.join(name, './assets/mui_ui.bundle'))
+
+
+class AssetBundle(object):
+    """
+    memory-mapped asset bundle
+
+    File Format
+    -----------
+    all values are little endian.
+
+    header : magic(4 bytes 'MUIB'), version(uint16), reserved(uint16), number of bitmaps(uint32)
+    entries : name offset(uint32), name length(uint32), width(uint16), height(uint16), data offset(uint32)
+              offsets are from top of the file.
+    names : utf-8 names of bitmaps
+    data : bitmaps. rows are (width + 7) // 8 bytes, MSB is left side dot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+
+        size = len(self._mm)
+        if size < HEADER_SIZE:
+            self.close()
+            raise ValueError('broken asset bundle : ' + path)
+
+        magic, version, _, count = struct.unpack_from(HEADER_FORMAT, self._mm, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            self.close()
+            raise ValueError('unsupported asset bundle : ' + path)
+
+        if size < HEADER_SIZE + (count * ENTRY_SIZE):
+            self.close()
+            raise ValueError('broken asset bundle : ' + path)
+
+        self._view = memoryview(self._mm)
+        self._entries = {}
+        for i in range(count):
+            nameOffset, nameLen, w, h, dataOffset = struct.unpack_from(ENTRY_FORMAT, self._mm, HEADER_SIZE + (i * ENTRY_SIZE))
+            if (nameOffset + nameLen > size) or (dataOffset + (((w + 7) // 8) * h) > size):
+                self.close()
+                raise ValueError('broken asset bundle : ' + path)
+
+            try:
+                key = bytes(self._view[nameOffset:nameOffset + nameLen]).decode('utf-8')
+            except UnicodeDecodeError:
+                self.close()
+                raise ValueError('broken asset bundle : ' + path)
+            self._entries[key] = (w, h, dataOffset)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def names(self):
+        return sorted(self._entries)
+
+    def getBitMatrix(self, key) -> BitMatrix:
+        """
+        Return BitMatrix of bitmap. raise KeyError if bitmap is not exist.
+        """
+        w, h, offset = self._entries[key]
+        return BitMatrix.frombytes(self._view[offset:offset + (((w + 7) // 8) * h)], w, h)
+
+    def getMatrix(self, key) -> Matrix:
+        """
+        Return new Matrix of bitmap. raise KeyError if bitmap is not exist.
+        """
+        return self.getBitMatrix(key).toMatrix()
+
+    def close(self):
+        if hasattr(self, '_view'):
+            self._view.release()
+        self._mm.close()
+        self._file.close()
+
+
+# registered bundles
+_bundles = {}
+_bundlePaths = {'mui_ui': muiBundleFile}
+_lock = Lock()
+
+
+def register_bundle(bundle_name, path) -> AssetBundle:
+    """
+    register asset bundle file. bitmaps are referred as 'bundle://[bundle_name]/[bitmap name]'.
+    """
+    with _lock:
+        old = _bundles.pop(bundle_name, None)
+        if old is not None:
+            old.close()
+
+        _bundlePaths[bundle_name] = path
+        bundle = _bundles[bundle_name] = AssetBundle(path)
+        return bundle
+
+
+def get_bundle(bundle_name) -> AssetBundle:
+    """
+    Return registered AssetBundle. bundle file is opened at first use.
+    """
+    with _lock:
+        bundle = _bundles.get(bundle_name)
+        if bundle is None:
+            if bundle_name not in _bundlePaths:
+                raise KeyError('asset bundle is not registered : ' + bundle_name)
+            bundle = _bundles[bundle_name] = AssetBundle(_bundlePaths[bundle_name])
+        return bundle
+
+
+def is_bundle_ref(ref):
+    return isinstance(ref, str) and ref.startswith(BUNDLE_SCHEME)
+
+
+def bundle_ref(bundle_name, key):
+    return BUNDLE_SCHEME + bundle_name + '/' + key
+
+
+def resolve_ref(ref):
+    """
+    Return (AssetBundle, bitmap name) of bundle reference('bundle://[bundle name]/[bitmap name]').
+    """
+    if not is_bundle_ref(ref):
+        raise ValueError('not a bundle reference : ' + str(ref))
+
+    bundle_name, _, key = ref[len(BUNDLE_SCHEME):].partition('/')
+    return get_bundle(bundle_name), key
+
+
+def load_bitmap(ref) -> Matrix:
+    """
+    Return new Matrix of bundle reference('bundle://[bundle name]/[bitmap name]').
+    """
+    bundle, key = resolve_ref(ref)
+    return bundle.getMatrix(key)
+
+
+def _collect(sources):
+    # name of bitmap is relative path without extension
+    items = []
+    for src in sources:
+        if os.path.isdir(src):
+            for root, _, files in os.walk(src):
+                for f in sorted(files):
+                    if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS:
+                        path = os.path.join(root, f)
+                        key = os.path.splitext(os.path.relpath(path, src))[0].replace(os.sep, '/')
+                        items.append((key, path))
+        else:
+            items.append((os.path.splitext(os.path.basename(src))[0], src))
+    return items
+
+
+def build_bundle(output, sources):
+    """
+    pack images to asset bundle.
+
+    Parameters
+    ------------
+    output : str
+        path of output file
+    sources : list of str or dict
+        image files and directories(searched recursively), or dict of {bitmap name : image file}.
+        name of bitmap is relative path from the directory without extension(icons/home).
+
+    Returns
+    --------
+    int : number of bitmaps
+    """
+    try:
+        from image import decode_image
+    except ImportError:
+        from .image import decode_image
+
+    items = sorted(sources.items()) if isinstance(sources, dict) else _collect(sources)
+
+    names = bytearray()
+    data = bytearray()
+    bitmaps = []
+    for key, path in items:
+        m = BitMatrix.fromMatrix(decode_image(path))
+        encoded = key.encode('utf-8')
+        bitmaps.append((len(names), len(encoded), m.width, m.height, len(data)))
+        names += encoded
+        data += bytes(m.bits)
+
+    namesOffset = HEADER_SIZE + (len(bitmaps) * ENTRY_SIZE)
+    dataOffset = namesOffset + len(names)
+    with open(output, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, BUNDLE_MAGIC, BUNDLE_VERSION, 0, len(bitmaps)))
+        for nameOffset, nameLen, w, h, offset in bitmaps:
+            f.write(struct.pack(ENTRY_FORMAT, namesOffset + nameOffset, nameLen, w, h, dataOffset + offset))
+        f.write(names)
+        f.write(data)
+
+    return len(bitmaps)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if len(args) == 0:
+        # bundle of mui_ui widgets
+        assets = os.path.join(name, 'assets')
+        args = [muiBundleFile] + [os.path.join(assets, f) for f in sorted(os.listdir(assets))
+                                  if f.endswith('.png') and not f.startswith('mui_gothic')]
+
+    if len(args) < 2:
+        print('usage : python asset_bundle.py [output] [image file or directory ...]')
+        sys.exit(1)
+
+    count = build_bundle(args[0], args[1:])
+    print('{0} : {1} bitmaps'.format(args[0], count))
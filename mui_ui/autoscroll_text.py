@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 
-import time
-from threading import Thread
-from threading import Timer
-
 try:
     from text import Text, Border, TextAlignment
+    from frame_clock import FrameClock
 except ImportError:
-    from . import Text, Border, TextAlignment
+    from . import Text, Border, TextAlignment, FrameClock
+
+# time until scroll starts after text is full(seconds)
+SCROLL_DELAY = 2
+# time between scroll steps(seconds)
+SCROLL_INTERVAL = 0.05
 
 class AutoScrollText(Text):
     """
@@ -16,6 +18,7 @@ class AutoScrollText(Text):
 
     this class inherit Text view.
     if text length is too long according to view size, when text is full on view area, start auto scroll and show left text.
+    scroll runs on the shared FrameClock.
 
 
     See Also
@@ -29,6 +32,7 @@ class AutoScrollText(Text):
         self._srcText = self._text
         self._scrolling = False
         self._draw_out_area = True
+        self._scrollTask = None
 
     def setText(self, text:str, textAlignment:TextAlignment=None):
         super().setText(text, textAlignment)
@@ -42,22 +46,31 @@ class AutoScrollText(Text):
         if self._scrolling is True:
             return
 
-        t = Timer(2, self._scroll, [text_index])
-        t.start()        
+        self._scrolling = True
+        self._scrollTask = FrameClock.get_instance().animate(self._scroll(text_index), SCROLL_DELAY)
+
+    def stopScroll(self):
+        """
+        stop auto scroll
+        """
+        if self._scrollTask is not None:
+            self._scrollTask.cancel()
+        self._scrollTask = None
+        self._scrolling = False
 
 
     def _scroll(self, text_index):
-        self._scrolling = True
-        l = self.OnUpdateRequestListener
-        if l is None:
+        clock = FrameClock.get_instance()
+        if self.OnUpdateRequestListener is None:
+            self._scrolling = False
             return
 
         org_y = self.y
         for y in range(0, self.height, 2):
             self._y -= 2
             self._neddRenderContent = False
-            l.onUpdateView(self)
-            time.sleep(0.05)
+            clock.requestUpdate(self)
+            yield SCROLL_INTERVAL
 
         # next text
         newText = self._srcText[text_index+1:]
@@ -66,6 +79,6 @@ class AutoScrollText(Text):
         self._scrolling = False
         self._y = org_y
 
-        # set new text        
+        # set new text
         self.setText(newText)
-        l.onUpdateView(self)
+        clock.requestUpdate(self)
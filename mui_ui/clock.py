@@ -3,9 +3,7 @@
 # this is digital clock widget
 # please use as a part of your applicaion
 
-import time
 from datetime import datetime, timezone
-from threading import Thread
 
 try:
     from parts import AbsParts
@@ -13,8 +11,9 @@ try:
     from muifont import MuiFont
     from widget import Widget
     from text import Text
+    from frame_clock import FrameClock
 except ImportError:
-    from . import Matrix, MuiFont, Text, Widget
+    from . import Matrix, MuiFont, Text, Widget, FrameClock
 
 
 
@@ -36,9 +35,13 @@ class DigitalClock(Widget):
 
     # stop tick
     # note : when application that set-up clock is invisible or display turn off, please call this API.
-    #        because ticker thread require update UI from background every seconds, 
+    #        because ticker require update UI from background every seconds, 
     #        so unnecessary update event occurs and may make bad effect to update performance.
     clock.stopTick()
+
+    Notes
+    -----
+    clock is updated on the shared FrameClock, it does not have own thread.
     """
 
     def __init__(self, name='digital clock', timezone:timezone=None):
@@ -72,16 +75,16 @@ class DigitalClock(Widget):
         self._views["m"] = minute
         self._views[":"] = coron
 
-        self._doTask = False
+        self._tick = None
         self._timezone = timezone
 
     def startTick(self):
         """
         start clock update
         """
-        task = Thread(target= self.updateClock)
-        self._doTask = True
-        task.start()
+        if (self._tick is not None) and self._tick.active:
+            return
+        self._tick = FrameClock.get_instance().schedule(self.updateClock, 0, 1)
 
     def setPos(self, x, y):
         """
@@ -100,32 +103,25 @@ class DigitalClock(Widget):
         """
         stop clock update
         """
-        self._doTask = False
-
-    def updateClock(self):        
-        while self._doTask:
-            sT = time.time()
-            if self._timezone is None:
-                now = datetime.now()
-            else:
-                now = datetime.now(self._timezone)
-
-            self._views["h"].setText(now.strftime('%H'))
-            self._views["m"].setText(now.strftime('%M'))
+        if self._tick is not None:
+            self._tick.cancel()
+        self._tick = None
 
-            sec = now.second
-            self._views[":"].visible = sec % 2 == 0
-
-            self._isChange = True
+    def updateClock(self):
+        """
+        update time on clock. called every second after startTick().
+        """
+        if self._timezone is None:
+            now = datetime.now()
+        else:
+            now = datetime.now(self._timezone)
 
-            if self.OnUpdateRequestListener is not None:
-                self.OnUpdateRequestListener.onUpdateView(self)
+        self._views["h"].setText(now.strftime('%H'))
+        self._views["m"].setText(now.strftime('%M'))
 
-            eT = time.time()
-            next = 1 - (eT - sT)
-            if next > 0:
-                time.sleep(next)
-            
+        sec = now.second
+        self._views[":"].visible = sec % 2 == 0
 
-            
+        self.invalidate()
+        FrameClock.get_instance().requestUpdate(self)
 
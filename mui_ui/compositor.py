@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+# mui ui retained mode compositor class
+
+try:
+    from matrix import Matrix
+except ImportError:
+    from . import Matrix
+
+try:
+    import tracer
+except ImportError:
+    from . import tracer
+
+
+class Layer(object):
+    """
+    rasterised layer of view which kept by Compositor
+
+    Attributes
+    ----------
+    view : AbsParts
+        source view
+    matrix : Matrix
+        Matrix returned by view.getMatrix(). None if the view is invisible.
+    bounds : tuple
+        (left, top, right, bottom) on the frame. None if the view is not drawn on the frame.
+    rect : tuple
+        (startX, startY, width, height) of matrix before clipped by the frame. None if the view is invisible.
+    version : int
+        change count of view at rasterised
+    """
+
+    __slots__ = ('view', 'matrix', 'bounds', 'rect', 'version')
+
+    def __init__(self, view, matrix, bounds, version, rect=None):
+        self.view = view
+        self.matrix = matrix
+        self.bounds = bounds
+        self.rect = rect
+        self.version = version
+
+
+def _union(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _intersects(a, b):
+    return (a[0] < b[2]) and (b[0] < a[2]) and (a[1] < b[3]) and (b[1] < a[3])
+
+
+class Compositor(object):
+    """
+    Compositor keeps composed frame and rasterised layer of each view.
+
+    on compose(), Compositor checks which views changed since last compose,
+    and composes again only the area which covered by old and new bounds of the changed views.
+    a view is changed when its Matrix, position, size, visibility or change count(AbsParts.invalidate()) differs.
+    position of the Matrix is compared before it is clipped, so content scrolled inside same bounds(e.g. Image.offset_y) is drawn again.
+
+    Examples
+    ---------
+    compositor = Compositor(200, 32)
+    frame = compositor.compose(views)
+
+    # frame is same Matrix instance at every compose.
+    frame = compositor.compose(views)
+    print(compositor.dirtyRect)
+
+    See Also
+    --------
+    AbsApp.getUI
+    Widget.getMatrix
+    """
+
+    def __init__(self, width=200, height=32):
+        self._frame = Matrix(width, height)
+        self._layers = []
+        self._dirtyRect = None
+        self._dirtyViews = []
+        self._needFullCompose = True
+
+    @property
+    def frame(self) -> Matrix:
+        return self._frame
+
+    @property
+    def dirtyRect(self):
+        """
+        (x, y, width, height) of area composed at last compose(). position is relative to frame. None if nothing changed.
+        """
+        return self._dirtyRect
+
+    @property
+    def dirtyViews(self):
+        """
+        list of (view, old bounds, new bounds) of views changed at last compose()
+        """
+        return self._dirtyViews
+
+    def invalidate(self):
+        """
+        compose all area at next compose()
+        """
+        self._needFullCompose = True
+
+    def compose(self, views, x=0, y=0, width=None, height=None) -> Matrix:
+        """
+        compose views to frame
+
+        Parameters
+        -----------
+        views : list of AbsParts
+            views from bottom to top
+        x, y : int
+            position of frame
+        width, height : int
+            size of frame. if None, keep current size.
+
+        Returns
+        --------
+        Matrix : composed frame
+        """
+        with tracer.span('compose', 'compose', views=len(views)) as s:
+            frame = self._compose(views, x, y, width, height)
+            s.set('dirty', self._dirtyRect)
+            return frame
+
+    def _compose(self, views, x, y, width, height):
+        frame = self._frame
+        width = frame.width if width is None else width
+        height = frame.height if height is None else height
+        if (width != frame.width) or (height != frame.height):
+            frame = self._frame = Matrix(width, height)
+            self._needFullCompose = True
+
+        if (x != frame.startX) or (y != frame.startY):
+            frame.startX = x
+            frame.startY = y
+            self._needFullCompose = True
+
+        area = (x, y, x + width, y + height)
+
+        # rasterise views and search changed views
+        oldLayers = self._layers
+        layers = []
+        dirty = None
+        dirtyViews = []
+        sameOrder = len(oldLayers) == len(views)
+        for i, v in enumerate(views):
+            m = None
+            if v.visible is True:
+                with tracer.span(v.name or type(v).__name__, 'rasterise'):
+                    m = v.getMatrix()
+            bounds = self._bounds(m, area)
+            rect = None if m is None else (m.startX, m.startY, m.width, m.height)
+            layer = Layer(v, m, bounds, v._version, rect)
+            layers.append(layer)
+
+            old = oldLayers[i] if sameOrder else None
+            if (old is None) or (old.view is not v):
+                sameOrder = False
+                continue
+
+            if (old.matrix is not m) or (old.bounds != bounds) or (old.rect != rect) or (old.version != layer.version):
+                dirty = _union(dirty, _union(old.bounds, bounds))
+                dirtyViews.append((v, old.bounds, bounds))
+
+        self._layers = layers
+
+        if (self._needFullCompose is True) or (sameOrder is False):
+            self._needFullCompose = False
+            dirty = area
+            dirtyViews = [(l.view, None, l.bounds) for l in layers]
+
+        self._dirtyViews = dirtyViews
+        if dirty is None:
+            self._dirtyRect = None
+            return frame
+
+        # compose changed area
+        l, t, r, b = dirty
+        self._dirtyRect = (l - x, t - y, r - l, b - t)
+        frame.fill(l - x, t - y, r - l, b - t, 0)
+
+        if dirty == area:
+            for layer in layers:
+                if layer.bounds is not None:
+                    frame.merge(layer.matrix)
+            return frame
+
+        part = Matrix(r - l, b - t)
+        part.startX = l
+        part.startY = t
+        for layer in layers:
+            if (layer.bounds is not None) and _intersects(layer.bounds, dirty):
+                part.merge(layer.matrix)
+
+        frame.merge(part)
+        return frame
+
+    def _bounds(self, m, area):
+        if m is None:
+            return None
+
+        l = max(m.startX, area[0])
+        t = max(m.startY, area[1])
+        r = min(m.startX + m.width, area[2])
+        b = min(m.startY + m.height, area[3])
+        if (l >= r) or (t >= b):
+            return None
+
+        return (l, t, r, b)
@@ -2,25 +2,54 @@
 
 # display class
 
-import crc8
-import serial
 import time
-import itertools
 
-import RPi.GPIO as GPIO 
+try:
+   from matrix import BitMatrix, check_bit_diff_rects, encode_layout_packet
+except ImportError:
+   from . import BitMatrix, check_bit_diff_rects, encode_layout_packet
 
-from threading import Lock
+try:
+   import tracer
+except ImportError:
+   from . import tracer
 
 try:
-   from matrix import Matrix, check_diff_range
+   from display_scheduler import CommandScheduler, AsyncCommandScheduler, check_packet, ACK, NACK, ACK_TIMEOUT, ACK_RETRY, WINDOW_SIZE
 except ImportError:
-   from . import Matrix, check_diff_range
+   from .display_scheduler import CommandScheduler, AsyncCommandScheduler, check_packet, ACK, NACK, ACK_TIMEOUT, ACK_RETRY, WINDOW_SIZE
 
-ACK = 0x06
-NACK = 0x15
+# header(12 bytes) and checksum(1 byte) of layout packet
+LAYOUT_PACKET_OVERHEAD = 13
+
+# UART setting of display
+BAUDRATE = 460800
+
+
+def open_port(device_name, timeout=ACK_TIMEOUT):
+    """
+    open UART port connected to display.
+
+    Parameters
+    ------------
+    device_name : str
+        device path(/dev/ttyS0, pty) or pyserial URL(loop://, socket://host:port)
+    """
+    # pyserial is imported here, so Display on other transports(emulator) does not need it
+    import serial
+
+    return serial.serial_for_url(device_name,
+                 BAUDRATE,
+                 parity=serial.PARITY_NONE,
+                 bytesize=serial.EIGHTBITS,
+                 stopbits=1,
+                 timeout=timeout)
 
 
 def reset_display():
+    # RPi.GPIO is imported here, so Display can run without Raspberry Pi on other transports
+    import RPi.GPIO as GPIO
+
     GPIO.setmode(GPIO.BCM)
     GPIO.setup(26, GPIO.OUT)
     GPIO.output(26, GPIO.LOW)
@@ -28,37 +57,99 @@ def reset_display():
     GPIO.output(26, GPIO.HIGH)
     time.sleep(0.5)
 
+class _AckFuture(object):
+    # result() is True if display accepted the packet
+
+    def __init__(self, future):
+        self._future = future
+
+    def done(self):
+        return self._future.done()
+
+    def result(self, timeout=None):
+        return self._future.result(timeout) is not None
+
+
 class Display(object):
     """
     mui Display API class
     """
-    def __init__(self, device_name='/dev/ttyS0', debug=False):
+    def __init__(self, device_name='/dev/ttyS0', debug=False, ack_timeout=ACK_TIMEOUT, retry=ACK_RETRY, window=WINDOW_SIZE,
+                 port=None, reset=None):
+        """
+        Parameters
+        ------------
+        device_name : str
+            UART device connected to display. pyserial URL is also available.
+        debug : bool
+            print packets
+        ack_timeout : float
+            time to wait response of each packet(seconds)
+        retry : int
+            number of resend when response is NACK, broken or timeout
+        window : int
+            max number of packets sent without waiting response
+        port : serial-like object
+            transport to display. if set, device_name is ignored.
+            it needs write(), read(), in_waiting, timeout, reset_input_buffer() and reset_output_buffer(),
+            e.g. serial.Serial or mui_ui.emulator.EmulatedSerial.
+        reset : bool
+            reset display by GPIO. if None, reset only when the port is opened from device_name.
+        """
         print("create display class")
 
         self.buf5 = bytearray(5)
         self.buf8 = bytearray(8)          
 
-        self.mutex = Lock()
+        # layout packet buffer. full size layout packet is 813 bytes.
+        self._layoutBuf = bytearray(813)
+        self._layoutView = memoryview(self._layoutBuf)
 
         self._duty = 100
 
         # create led matrix
-        self.ledMatrix = Matrix(200, 32)
-        self.ledMatrixBuf = Matrix(200, 32) # buffer for old data
+        self.ledMatrix = BitMatrix(200, 32)
+        self.ledMatrixBuf = BitMatrix(200, 32) # buffer for old data
 
         # open UART port
-        self.port = serial.Serial(device_name,
-                     460800,
-                     parity=serial.PARITY_NONE,
-                     bytesize=serial.EIGHTBITS,
-                     stopbits=1,
-                     timeout=1)
-        
+        if port is None:
+            port = open_port(device_name, ack_timeout)
+            reset = True if reset is None else reset
+        self.port = port
+
         self.debug = debug
-        self._reset()
+        if reset is True:
+            self._reset()
         self.port.reset_input_buffer()
         self.port.reset_output_buffer()
 
+        # send packets and pair responses on reader thread
+        self._scheduler = self._createScheduler(window, ack_timeout, retry, debug)
+        self._scheduler.start()
+
+    def _createScheduler(self, window, ack_timeout, retry, debug):
+        return CommandScheduler(self.port, window=window, ack_timeout=ack_timeout, retry=retry, debug=debug)
+
+    @property
+    def stats(self):
+        """
+        LinkStats of packets exchanged with display
+        """
+        return self._scheduler.stats
+
+    def close(self):
+        """
+        stop reader thread and close UART port
+        """
+        self._scheduler.stop()
+        self.port.close()
+
+    def flush(self, timeout=None):
+        """
+        wait until display responds all sent packets.
+        """
+        return self._scheduler.flush(timeout)
+
 
     def _reset(self):
         reset_display()
@@ -103,15 +194,20 @@ class Display(object):
 
         Parameters
         -----------
-        matrixInfo : Matrix
+        matrixInfo : Matrix or BitMatrix
             ui layout data
         """
-        self.ledMatrix.matrix = matrixInfo.matrix
+        with tracer.span('setLayout', 'pack'):
+            if isinstance(matrixInfo, BitMatrix):
+                self.ledMatrix.copy(matrixInfo)
+            else:
+                self.ledMatrix.load(matrixInfo)
 
     def updateLayout(self):
         """
         update layout for draw display. this API send layout data to display.
         you have to call refreshDisplay() after this API for update.
+        this API do not wait response of display.
         """
         self._createLayoutCommandForDiff()
          # store current layout info
@@ -125,39 +221,23 @@ class Display(object):
         ------------
         fade : deprecated. please use turnOn() and turnOff().
         duty : deprecated. please use setDuty().
-        """
-        rdly = self.port.read(self.port.in_waiting)
-        return self._createDisplayReqCommand(1, 0, self._duty)
 
-    def _writePacket(self, packet):
-        self.mutex.acquire()
-        self.port.write(packet)
-        if self.debug is True:
-            print('>', packet)
-        self.mutex.release()
-
-    def _recivePacket(self, rdlen):
-        self.mutex.acquire()
-        self._waitRcvData()
-        rdly = self.port.read(rdlen)
-        if self.debug is True:
-            print('<', len(rdly), rdly)
-        self.mutex.release()
-        return rdly
+        Returns
+        --------
+        Future : this API do not wait response of display. result of Future is True if display accepted.
+        """
+        return self._createDisplayReqCommand(1, 0, self._duty, wait=False)
 
-    def _waitRcvData(self):
-        while self.port.in_waiting == 0:
-                time.sleep(0)
+    def _transact(self, packet, rdlen):
+        # send packet and wait response. None if display did not respond correctly.
+        return self._scheduler.request(packet, rdlen)
 
-        
     def _updateLayoutForce(self, fade):
         packet = self._createLayoutCommand()
         if packet == None:
             return
 
-        self._writePacket(packet)
-        rcvpacket = self._recivePacket(6)
-        if ( self._checkPacket(rcvpacket) == False):
+        if self._transact(packet, 6) is None:
             print('rcv fail.')
 
         # store current layout info
@@ -168,7 +248,7 @@ class Display(object):
         """
         clear display.
         """
-        self.ledMatrix = Matrix(200, 32) # clear
+        self.ledMatrix = BitMatrix(200, 32) # clear
         self._updateLayoutForce(0)
         self.refreshDisplay(0)
 
@@ -181,9 +261,8 @@ class Display(object):
         if packet == None:
             return version
         
-        self._writePacket(packet)
-        rcvpckt = self._recivePacket(7)
-        if ( self._checkPacket(rcvpckt) == False ):
+        rcvpckt = self._transact(packet, 7)
+        if rcvpckt is None:
             return version
 
         version = rcvpckt[4] * 256 + rcvpckt[5]
@@ -198,9 +277,8 @@ class Display(object):
         if packet == None:
             return
         
-        self._writePacket(packet)
-        rcvpckt = self._recivePacket(29)
-        if ( self._checkPacket(rcvpckt) == False ):
+        rcvpckt = self._transact(packet, 29)
+        if rcvpckt is None:
             return ""
 
         #print(rcvpckt)
@@ -216,9 +294,8 @@ class Display(object):
         if packet == None:
             return
 
-        self._writePacket(packet)
-        rcvpacket = self._recivePacket(15)
-        if ( self._checkPacket(rcvpacket) == False):
+        rcvpacket = self._transact(packet, 15)
+        if rcvpacket is None:
             return
 
         print(rcvpacket)
@@ -226,18 +303,7 @@ class Display(object):
 
 
     def _checkPacket(self, packet):
-        size = len(packet)
-        if (size < 5):
-            return False
-        checksum = 0
-        for i in range(2, size-1):
-            checksum = checksum + packet[i]
-
-        checksum = checksum & 0xFF
-
-        if ( checksum == packet[size-1] ):
-            return True
-        return False
+        return check_packet(packet)
 
 
     def _createGetVersionCommand(self):
@@ -267,7 +333,7 @@ class Display(object):
         buf[4] = 0x82
         return buf
 
-    def _createDisplayReqCommand(self, mode, fade, duty):
+    def _createDisplayReqCommand(self, mode, fade, duty, wait=True):
         sum = 0
         self.buf8[0] = 0x00
         self.buf8[1] = 0x06
@@ -282,157 +348,161 @@ class Display(object):
         if self.debug is True:
             print('Sum:', self.buf8[7])
 
-        self._writePacket(self.buf8)
-        rcvpacket = self._recivePacket(6)
-        return self._checkPacket(rcvpacket)
-
-    def _createLayoutCommand(self):
-        buf = bytearray(813)
-        buf[0] = 0x03
-        buf[1] = 0x2B
-        buf[2] = 0x00
-        buf[3] = 0x02
-        buf[4] = 0      # x-pos
-        buf[5] = 0
-        buf[6] = 0      # y-pos
-        buf[7] = 0
-        buf[8] = 0      # width
-        buf[9] = 200
-        buf[10] = 0     # height
-        buf[11] = 32        
-
-        m = self.ledMatrix.matrix
-
-        index = 0
-        for y in range(32):
-            for x in range(0, 200, 8):
-                tmp = ( m[y][x + 0] << 7 )
-                tmp |= ( m[y][x + 1] << 6 )
-                tmp |= ( m[y][x + 2] << 5 )
-                tmp |= ( m[y][x + 3] << 4 )
-                tmp |= ( m[y][x + 4] << 3 )
-                tmp |= ( m[y][x + 5] << 2 )
-                tmp |= ( m[y][x + 6] << 1 )
-                tmp |= ( m[y][x + 7] << 0 )
-
-                buf[12+index] = tmp
-                index += 1
+        return self._acknowledge(self._scheduler.submit(self.buf8, 6), wait)
 
-        sum = 0
-        for i in range(2,812):
-                sum = sum + buf[i]
+    def _acknowledge(self, future, wait):
+        if wait is False:
+            return _AckFuture(future)
+        return future.result() is not None
 
-        buf[812] = sum & 0xFF
+    def _createLayoutCommand(self):
+        with tracer.span('layout', 'encode') as s:
+            size = encode_layout_packet(self.ledMatrix, 0, 0, 200, 32, self._layoutBuf)
+            s.set('bytes', size)
         if self.debug is True:
-            print('checksum' , buf[812] )
-        return buf
+            print('checksum' , self._layoutBuf[size - 1] )
+        return self._layoutView[:size]
 
-    def _createLayoutCommandForDiff(self):
-
-        posX = 0
-        posY = 0
-        w = 0
-        h = 0
-        dataLen = 0
-
-        minX = 200
-        maxX = -1
-        minY = 32
-        maxY = -1
-
-        # mOld = self.ledMatrixBuf.matrix
-        # mNew = self.ledMatrix.matrix
-
-        #search data changed area
-        # for y in range(32):
-        #     for x in range(200):
-        #         if (mOld[y][x] != mNew[y][x]):
-        #             if x <= minX:
-        #                 minX = x
-
-        #             if x >= maxX:
-        #                 maxX = x
-
-        #             if y <= minY:
-        #                 minY = y
-
-        #             if y >= maxY:
-        #                 maxY = y
-
-        diffRange = check_diff_range(self.ledMatrixBuf.matrix, self.ledMatrix.matrix)
-        minX = diffRange[0]
-        maxX = diffRange[1]
-        minY = diffRange[2]
-        maxY = diffRange[3]
-        if self.debug is True:
-            print("minX {0}, maxX {1}, minY {2}, maxY {3}".format(minX, maxX, minY, maxY))
+    def _layoutPacketCost(self, w, h):
+        # bytes on the wire for layout packet of area(w x h)
+        return ((w // 8) * h) + LAYOUT_PACKET_OVERHEAD
 
+    def _createLayoutCommandForDiff(self):
+        # search changed areas
+        with tracer.span('layout', 'diff') as s:
+            rects = check_bit_diff_rects(self.ledMatrixBuf, self.ledMatrix, LAYOUT_PACKET_OVERHEAD)
+            s.set('rects', len(rects))
 
         # check change data is exist?
-        if (maxX == -1) or (maxY == -1):
+        if len(rects) == 0:
             # no data has changed
             if self.debug is True:
                 print('-- no data has changed --')
             return
 
-        # calc diff data area size and data size
-        minX = (minX // 8) * 8
-        maxX = ((maxX // 8) * 8) + 8
-        if maxX > 200:
-            maxX = 200
-
-        maxY = maxY + 1
-        if maxY > 32:
-            maxY = 32
-
-        posX = minX
-        posY = minY
-        w = maxX - minX
-        h = maxY - minY
-        dataLen = ((w // 8) * h) + 8
-        if self.debug is True:
-            print("data length {0}".format(dataLen))
+        # compare with one packet of bounding area
+        minX = min(r[0] for r in rects)
+        maxX = max(r[0] + r[2] for r in rects)
+        minY = min(r[1] for r in rects)
+        maxY = max(r[1] + r[3] for r in rects)
 
-        buf = bytearray(dataLen + 5)
-        buf[0] = (( dataLen + 3) >> 8) & 0xFF
-        buf[1] = (( dataLen + 3) & 0xFF )
-        buf[2] = 0x00
-        buf[3] = 0x02
-        buf[4] = 0x00
-        buf[5] = minX
-        buf[6] = 0x00
-        buf[7] = minY
-        buf[8] = 0x00
-        buf[9] = w
-        buf[10] = 0x00
-        buf[11] = h
-
-        index = 0
-        for y, x in itertools.product(range(minY, maxY, 1),range(minX, maxX, 8)):
-            tmp = ( self.ledMatrix.matrix[y][x + 0] << 7 )
-            tmp |= ( self.ledMatrix.matrix[y][x + 1] << 6 )
-            tmp |= ( self.ledMatrix.matrix[y][x + 2] << 5 )
-            tmp |= ( self.ledMatrix.matrix[y][x + 3] << 4 )
-            tmp |= ( self.ledMatrix.matrix[y][x + 4] << 3 )
-            tmp |= ( self.ledMatrix.matrix[y][x + 5] << 2 )
-            tmp |= ( self.ledMatrix.matrix[y][x + 6] << 1 )
-            tmp |= ( self.ledMatrix.matrix[y][x + 7] << 0 )
-            buf[12 + index] = tmp
-            index += 1
+        cost = sum(self._layoutPacketCost(r[2], r[3]) for r in rects)
+        if self._layoutPacketCost(maxX - minX, maxY - minY) <= cost:
+            rects = [(minX, minY, maxX - minX, maxY - minY)]
 
-        sum = 0
-        for i in range(2, dataLen + 5):
-                sum = sum + buf[i]
-        buf[dataLen + 4] = (sum & 0xFF)
-        self._writePacket(buf)
-#        rcvpacket = self._recivePacket(6)
-#        return self._checkPacket(rcvpacket)
+        for posX, posY, w, h in rects:
+            if self.debug is True:
+                print("x {0}, y {1}, w {2}, h {3}".format(posX, posY, w, h))
+
+            with tracer.span('layout', 'encode', rect=(posX, posY, w, h)) as s:
+                size = encode_layout_packet(self.ledMatrix, posX, posY, w, h, self._layoutBuf)
+                s.set('bytes', size)
+            if self.debug is True:
+                print("data length {0}".format(size - 5))
+
+            # responses are checked on reader thread
+            self._scheduler.submit(self._layoutView[:size], 6)
         return True
 
     def toString(self):
         self.ledMatrix.toStrin
 
 
+class AsyncDisplay(Display):
+    """
+    mui Display API class for asyncio event loop
+
+    packets are sent and responses are read on the event loop(AsyncCommandScheduler), without reader thread.
+    no method blocks the loop. turnOn(), turnOff() and refreshDisplay() return awaitable of bool(True if display accepted),
+    and getVersion(), getMuiID(), getPanelStatus(), clearDisplay() and flush() are coroutines.
+    please create it in a coroutine, or set loop.
+
+    Examples
+    ---------
+    display = AsyncDisplay()
+    await display.clearDisplay()
+    await display.turnOn(0)
+
+    display.setLayout(app.getUI())
+    display.updateLayout()
+    await display.refreshDisplay()
+
+    See Also
+    --------
+    Display
+    Runtime
+    """
+
+    def __init__(self, device_name='/dev/ttyS0', debug=False, ack_timeout=ACK_TIMEOUT, retry=ACK_RETRY, window=WINDOW_SIZE,
+                 port=None, reset=None, loop=None):
+        """
+        Parameters
+        ------------
+        loop : asyncio.AbstractEventLoop
+            event loop. if None, running loop.
+        """
+        self.loop = loop
+        super().__init__(device_name, debug, ack_timeout, retry, window, port, reset)
+
+    def _createScheduler(self, window, ack_timeout, retry, debug):
+        return AsyncCommandScheduler(self.port, self.loop, window=window, ack_timeout=ack_timeout, retry=retry, debug=debug)
+
+    def _acknowledge(self, future, wait):
+        return self._scheduler.loop.create_task(_accepted(future))
+
+    async def flush(self, timeout=None):
+        """
+        wait until display responds all sent packets.
+        """
+        return await self._scheduler.flush(timeout)
+
+    async def _transact(self, packet, rdlen):
+        return await self._scheduler.request(packet, rdlen)
+
+    async def clearDisplay(self):
+        """
+        clear display.
+        """
+        self.ledMatrix = BitMatrix(200, 32) # clear
+        packet = self._createLayoutCommand()
+        if await self._transact(packet, 6) is None:
+            print('rcv fail.')
+
+        # store current layout info
+        self.ledMatrixBuf.copy(self.ledMatrix)
+        return await self.refreshDisplay()
+
+    async def getVersion(self):
+        """
+        get firmware version
+        """
+        rcvpckt = await self._transact(self._createGetVersionCommand(), 7)
+        if rcvpckt is None:
+            return 0
+
+        return rcvpckt[4] * 256 + rcvpckt[5]
+
+    async def getMuiID(self):
+        """
+        get mui ID.
+        """
+        rcvpckt = await self._transact(self._createGetMuiIDCommand(), 29)
+        if rcvpckt is None:
+            return ""
+
+        return rcvpckt[4:28].decode('utf-8').strip('\0')
+
+    async def getPanelStatus(self):
+        """
+        get display status(include error). None if display did not respond.
+        """
+        return await self._transact(self._createGetPanelStatus(), 15)
+
+
+async def _accepted(future):
+    return (await future) is not None
+
+
 # for TEST
 if __name__ == '__main__':
     d=Display()
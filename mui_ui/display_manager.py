@@ -2,8 +2,19 @@
 
 # mui display state management class
 
+import time
 from abc import ABCMeta, abstractmethod
-from threading import Timer
+from threading import Lock
+
+try:
+    from frame_clock import FrameClock
+except ImportError:
+    from . import FrameClock
+
+# display states
+STATE_ON = 0
+STATE_DIM = 1
+STATE_OFF = 2
 
 
 class DisplayEventListener(metaclass=ABCMeta):
@@ -17,19 +28,42 @@ class DisplayEventListener(metaclass=ABCMeta):
         raise NotImplementedError()
 
     @abstractmethod
-    def onDismiss(self):        
+    def onDismiss(self):
         raise NotImplementedError()
 
+    def onDim(self):
+        """
+        callback to be invoked when display is idle for time_to_dim seconds.
+        please lower display brightness here.
+        """
+        pass
+
+    def onWake(self):
+        """
+        callback to be invoked when user touched dimmed display.
+        please restore display brightness here.
+        """
+        pass
+
 
 class DisplayManager(object):
     """
     DisplayManager class is manage display state(on/off) and notify time for turn off display.
 
-    At default setting, you will recevie callback(DisplayEventListener.onDissmissTime()) 
+    At default setting, you will recevie callback(DisplayEventListener.onDissmissTime())
     after 15 seconds from called startDismissTimer().
 
     If you return True to onDismissTime(), DisplayManager call DisplayEventListener.onDismiss(), so please instruct Display class to turn off.
-    If you return False when onDismissTime(), this class restart timer and call callback after 15 seconds. 
+    If you return False when onDismissTime(), this class restart timer and call callback after 15 seconds.
+
+    if time_to_dim is set, display is dimmed before turn off. DisplayEventListener.onDim() is called
+    after time_to_dim seconds, and DisplayEventListener.onWake() is called at next startDismissTimer().
+
+    Notes
+    -----
+    startDismissTimer() only updates time of last user activity, so it is cheap enough to call on every touch event.
+    one timer on the shared FrameClock checks the deadline, and it is set again only when the deadline is not reached.
+    callbacks are called on the clock thread, or on the event loop with Runtime.
     """
 
     _instance = None
@@ -41,7 +75,7 @@ class DisplayManager(object):
 
         return cls._instance
 
-    def __init__(self, listener: DisplayEventListener, time_to_dismiss:float=15):
+    def __init__(self, listener: DisplayEventListener, time_to_dismiss:float=15, time_to_dim:float=None):
         """
         Parameters
         ------------
@@ -49,43 +83,118 @@ class DisplayManager(object):
             callback
         time_to_dismiss : float
             time to turn off display. default is 15 seconds.
+        time_to_dim : float
+            time to dim display. if None, display is not dimmed.
         """
         if listener is None:
             raise ValueError("listener must be set")
 
         self.listener = listener
         self._time_to_dismiss = time_to_dismiss
+        self._time_to_dim = time_to_dim
         self._timer = None
-        self._on = True
+        self._state = STATE_ON
+        self._lastActivity = time.monotonic()
+        self._lock = Lock()
 
     def setEventListener(self, listener: DisplayEventListener):
         self.listener = listener
-    
+
 
     def startDismissTimer(self):
+        """
+        notify user activity. turn off(and dim) time is counted again from now.
+        """
+        with self._lock:
+            self._lastActivity = time.monotonic()
+            wake = self._state == STATE_DIM
+            if wake is True:
+                self._state = STATE_ON
+            self._arm(False)
+
+        if wake is True:
+            self.listener.onWake()
+
+    def stopDismissTimer(self):
+        """
+        stop timer. display is not turned off until next startDismissTimer().
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+
+    def _nextDeadline(self):
+        if (self._state == STATE_ON) and (self._time_to_dim is not None) and (self._time_to_dim < self._time_to_dismiss):
+            return self._lastActivity + self._time_to_dim
+        return self._lastActivity + self._time_to_dismiss
+
+    def _arm(self, force):
+        # timer earlier than the deadline is kept. it checks the deadline and set itself again.
+        if (force is False) and (self._timer is not None) and (self._timer.active is True):
+            return
+
         if self._timer is not None:
             self._timer.cancel()
-            
-        self._timer = Timer(self._time_to_dismiss, self._onDismissTime)
-        self._timer.start()
-
+        self._timer = FrameClock.get_instance().schedule(self._onTimer, max(0, self._nextDeadline() - time.monotonic()))
+
+    def _onTimer(self):
+        with self._lock:
+            self._timer = None
+            if self._state == STATE_OFF:
+                return
+
+            now = time.monotonic()
+            if now < self._nextDeadline():
+                # user activity after the timer was set
+                self._arm(True)
+                return
+
+            stage = STATE_OFF if now >= self._lastActivity + self._time_to_dismiss else STATE_DIM
+            if stage == STATE_DIM:
+                self._state = STATE_DIM
+                self._arm(True)
+            activity = self._lastActivity
+
+        if stage == STATE_DIM:
+            self.listener.onDim()
+        else:
+            self._onDismissTime(activity)
 
-    def _onDismissTime(self):
+    def _onDismissTime(self, activity):
+        # listener is called without the lock, so it can use this class
         if self.listener.onDismissTime() is False:
             self.startDismissTimer()
+            return
+
+        with self._lock:
+            if (self._lastActivity != activity) or (self._state == STATE_OFF):
+                # touched while asking listener, new timer is already set
+                return
+            self._state = STATE_OFF
+
+        self.listener.onDismiss()
 
-        else:
-            self._on = False
-            self.listener.onDismiss()
-                  
+
+    @property
+    def state(self):
+        """
+        STATE_ON, STATE_DIM or STATE_OFF
+        """
+        return self._state
 
     @property
     def on(self):
-        return self._on
+        return self._state != STATE_OFF
 
     @on.setter
     def on(self, on):
-        self._on = on
+        with self._lock:
+            if on is True:
+                if self._state == STATE_OFF:
+                    self._state = STATE_ON
+            else:
+                self._state = STATE_OFF
 
     @property
     def time_to_dismiss(self):
@@ -93,4 +202,18 @@ class DisplayManager(object):
 
     @time_to_dismiss.setter
     def time_to_dismiss(self, t):
-        self._time_to_dismiss = t
\ No newline at end of file
+        with self._lock:
+            self._time_to_dismiss = t
+            if self._timer is not None:
+                self._arm(True)
+
+    @property
+    def time_to_dim(self):
+        return self._time_to_dim
+
+    @time_to_dim.setter
+    def time_to_dim(self, t):
+        with self._lock:
+            self._time_to_dim = t
+            if self._timer is not None:
+                self._arm(True)
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+# mui display pipeline class
+
+import time
+from collections import deque
+from threading import Thread, Condition
+
+CMD_FRAME = 0
+CMD_TURN_ON = 1
+CMD_TURN_OFF = 2
+CMD_DUTY = 3
+
+
+class DisplayPipeline(object):
+    """
+    DisplayPipeline writes UI to Display on a single writer thread.
+
+    requestUpdate() returns immediately, so touch handling and animation threads never wait for the UART.
+    frame requests are coalesced, only latest frame is written when requests are faster than the display(latest-frame-wins).
+    turn on/off and duty requests are never coalesced and they are written in requested order.
+
+    Examples
+    ---------
+    from mui_ui import Display, DisplayPipeline, BitMatrix
+
+    display = Display()
+    pipeline = DisplayPipeline(display, max_fps=30)
+    pipeline.start()
+
+    # write a copy of UI composed on UI thread
+    pipeline.requestUpdate(BitMatrix.fromMatrix(app.getUI()))
+
+    # write with fade-out/in effect
+    pipeline.requestUpdate(BitMatrix.fromMatrix(app.getUI()), fade=2)
+
+    # turn off display
+    pipeline.turnOff(3)
+
+    pipeline.stop()
+
+    See Also
+    --------
+    Display
+    """
+
+    def __init__(self, display, max_fps=30):
+        """
+        Parameters
+        ------------
+        display : Display
+            target display
+        max_fps : float
+            max frame rate of frame writing. if 0 or None, frames are written without limit.
+        """
+        self._display = display
+        self._maxFps = max_fps
+        self._queue = deque()
+        self._cond = Condition()
+        self._running = False
+        self._busy = False
+        self._thread = None
+        self._lastFrameTime = 0
+        self._requested = 0
+        self._written = 0
+
+    @property
+    def max_fps(self):
+        return self._maxFps
+
+    @max_fps.setter
+    def max_fps(self, fps):
+        with self._cond:
+            self._maxFps = fps
+            self._cond.notify_all()
+
+    @property
+    def requested(self):
+        """
+        number of requested frames
+        """
+        return self._requested
+
+    @property
+    def written(self):
+        """
+        number of frames written to display
+        """
+        return self._written
+
+    def start(self):
+        """
+        start writer thread
+        """
+        with self._cond:
+            if self._running is True:
+                return
+            self._running = True
+
+        self._thread = Thread(target=self._run, name='display writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        """
+        stop writer thread. queued requests are written before stop.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if wait and (self._thread is not None):
+            self._thread.join()
+        self._thread = None
+
+    def requestUpdate(self, frame, fade=0):
+        """
+        request to write frame to display.
+
+        Parameters
+        ------------
+        frame : Matrix, BitMatrix or callable
+            layout data. it is written later on writer thread, so please pass a copy which is not changed after the request.
+            if callable, it is called on writer thread and should return Matrix. 
+            views must not be changed by other threads while it runs.
+        fade : int
+            fade out/in effect level(0 - 4 : 0 is do not fade)
+        """
+        with self._cond:
+            self._requested += 1
+            queue = self._queue
+            if len(queue) > 0 and queue[-1][0] == CMD_FRAME:
+                # coalesce to latest frame
+                queue[-1] = (CMD_FRAME, frame, max(fade, queue[-1][2]))
+            else:
+                queue.append((CMD_FRAME, frame, fade))
+            self._cond.notify_all()
+
+    def turnOn(self, fade):
+        """
+        request to turn on display
+        """
+        self._put((CMD_TURN_ON, None, fade))
+
+    def turnOff(self, fade):
+        """
+        request to turn off display
+        """
+        self._put((CMD_TURN_OFF, None, fade))
+
+    def setDuty(self, duty):
+        """
+        request to change brightness of display
+        """
+        self._put((CMD_DUTY, None, duty))
+
+    def flush(self, timeout=None):
+        """
+        wait until all requests are written.
+
+        Returns
+        --------
+        bool : False if timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._queue) == 0 and self._busy is False, timeout)
+
+    def _put(self, cmd):
+        with self._cond:
+            self._queue.append(cmd)
+            self._cond.notify_all()
+
+    def _next(self):
+        with self._cond:
+            while True:
+                if len(self._queue) == 0:
+                    if self._running is False:
+                        return None
+                    self._cond.wait()
+                    continue
+
+                cmd = self._queue[0]
+                if (cmd[0] == CMD_FRAME) and self._maxFps:
+                    wait = self._lastFrameTime + (1 / self._maxFps) - time.monotonic()
+                    if wait > 0:
+                        # wait for frame interval. new requests are coalesced while waiting.
+                        self._cond.wait(wait)
+                        continue
+
+                self._busy = True
+                return self._queue.popleft()
+
+    def _run(self):
+        while True:
+            cmd = self._next()
+            if cmd is None:
+                break
+
+            try:
+                self._write(cmd)
+            except Exception as e:
+                print('display write fail.', e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, cmd):
+        # fade is the duty value for CMD_DUTY
+        kind, frame, fade = cmd
+        display = self._display
+        if kind == CMD_TURN_ON:
+            display.turnOn(fade)
+            return
+
+        if kind == CMD_TURN_OFF:
+            display.turnOff(fade)
+            return
+
+        if kind == CMD_DUTY:
+            display.setDuty(fade)
+            return
+
+        if callable(frame):
+            frame = frame()
+
+        self._lastFrameTime = time.monotonic()
+
+        if fade > 0:
+            display.turnOff(fade)
+
+        display.setLayout(frame)
+        display.updateLayout()
+        display.refreshDisplay()
+        self._written += 1
+
+        if fade > 0:
+            display.turnOn(fade)
@@ -0,0 +1,644 @@
+# -*- coding: utf-8 -*-
+
+# mui display command scheduler class
+
+import time
+import itertools
+from collections import deque
+from concurrent.futures import Future
+from threading import Thread, Condition
+
+try:
+    import tracer
+except ImportError:
+    from . import tracer
+
+ACK = 0x06
+NACK = 0x15
+
+# name of commands for trace
+COMMAND_NAMES = {
+    b'\x00\x02': 'layout',
+    b'\x00\x03': 'display request',
+    b'\x80\x00': 'get version',
+    b'\x80\x01': 'get mui id',
+    b'\x80\x02': 'get panel status',
+}
+
+# default time to wait response from display(seconds)
+ACK_TIMEOUT = 0.5
+# default number of resend when display do not ACK
+ACK_RETRY = 2
+# default number of packets sent without waiting response
+WINDOW_SIZE = 4
+# idle time of UART line to judge display finished sending(seconds)
+RESYNC_IDLE = 0.005
+# interval to poll port without fd on event loop(seconds)
+POLL_INTERVAL = 0.001
+
+
+class LinkStats(object):
+    """
+    statistics of packets exchanged with display
+
+    Attributes
+    ----------
+    sent : int
+        number of packets sent(include resend)
+    ack : int
+        number of valid responses
+    nack : int
+        number of NACK or broken responses
+    timeout : int
+        number of responses which did not arrive in time
+    retry : int
+        number of resent packets
+    resync : int
+        number of receive buffer resynchronisations
+    failed : int
+        number of packets given up after all retries
+    """
+
+    __slots__ = ('sent', 'ack', 'nack', 'timeout', 'retry', 'resync', 'failed')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for name in LinkStats.__slots__:
+            setattr(self, name, 0)
+
+    def asDict(self):
+        return {name: getattr(self, name) for name in LinkStats.__slots__}
+
+    def __repr__(self):
+        return 'LinkStats({0})'.format(', '.join('{0}={1}'.format(k, v) for k, v in self.asDict().items()))
+
+
+def check_packet(packet):
+    """
+    check length and checksum of response packet
+    """
+    size = len(packet)
+    if (size < 5):
+        return False
+
+    return (sum(packet[2:size - 1]) & 0xFF) == packet[size - 1]
+
+
+def is_nack(packet):
+    # ACK/NACK response is 6 bytes, 5th byte is ACK or NACK
+    return (len(packet) == 6) and (packet[4] == NACK)
+
+
+class _Pending(object):
+
+    __slots__ = ('packet', 'rdlen', 'future', 'tries', 'sentTime', 'traceTime')
+
+    def __init__(self, packet, rdlen, future=None):
+        self.packet = packet
+        self.rdlen = rdlen
+        self.future = Future() if future is None else future
+        self.tries = 0
+        self.sentTime = 0
+        self.traceTime = 0
+
+    @property
+    def name(self):
+        return COMMAND_NAMES.get(self.packet[2:4], 'unknown')
+
+
+class CommandScheduler(object):
+    """
+    CommandScheduler sends packets to display without waiting each response.
+
+    display answers packets in received order, so responses are paired with sent packets in FIFO order.
+    up to window packets are in flight, submit() blocks while the window is full.
+    a reader thread receives responses and resolves Future of each packet.
+
+    when response is NACK, broken or timeout, the receive buffer is resynchronised,
+    and the failed packet and all packets after it are sent again(go-back-N).
+    a packet is given up after retry times resend, and its Future result is None.
+    resync and resend run without the lock, and packets submitted meanwhile are sent after the resent packets.
+
+    if the port raises(e.g. display is unplugged), the scheduler stops, packets in flight are given up
+    and submit() raises RuntimeError.
+
+    Examples
+    ---------
+    scheduler = CommandScheduler(port)
+    scheduler.start()
+
+    # send without waiting
+    future = scheduler.submit(packet, 6)
+
+    # wait response
+    response = future.result()
+
+    See Also
+    --------
+    Display
+    """
+
+    def __init__(self, port, window=WINDOW_SIZE, ack_timeout=ACK_TIMEOUT, retry=ACK_RETRY, debug=False):
+        """
+        Parameters
+        ------------
+        port : serial.Serial
+            UART port connected to display
+        window : int
+            max number of packets in flight
+        ack_timeout : float
+            time to wait response of each packet(seconds)
+        retry : int
+            number of resend when response is NACK, broken or timeout
+        """
+        if window < 1:
+            raise ValueError("window must be 1 or more")
+
+        self.port = port
+        self.window = window
+        self.ackTimeout = ack_timeout
+        self.retry = retry
+        self.debug = debug
+        self.stats = LinkStats()
+
+        self._inflight = deque()
+        self._cond = Condition()
+        self._running = False
+        self._recovering = False
+        self._error = None
+        self._thread = None
+        self._lastResponseTime = 0
+
+    @property
+    def inflight(self):
+        """
+        number of packets waiting response
+        """
+        return len(self._inflight)
+
+    def start(self):
+        """
+        start reader thread
+        """
+        with self._cond:
+            if self._running is True:
+                return
+            self._running = True
+            self._recovering = False
+            self._error = None
+
+        # read timeout is set once, changing it costs a driver call on each read
+        self.port.timeout = self.ackTimeout
+        self._thread = Thread(target=self._run, name='display reader', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        stop reader thread. packets waiting response are given up.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+        with self._cond:
+            while len(self._inflight) > 0:
+                self._inflight.popleft().future.set_result(None)
+            self._cond.notify_all()
+
+    def submit(self, packet, rdlen=6) -> Future:
+        """
+        send packet. packet is copied, so caller can reuse its buffer.
+
+        Parameters
+        ------------
+        packet : bytes-like
+            packet
+        rdlen : int
+            length of response packet
+
+        Returns
+        --------
+        Future : result is response packet, or None if display did not respond correctly.
+        """
+        pending = _Pending(bytes(packet), rdlen)
+        with self._cond:
+            if self._error is not None:
+                raise RuntimeError("scheduler stopped by port error") from self._error
+            if self._running is False:
+                raise RuntimeError("scheduler is not started")
+
+            while (len(self._inflight) >= self.window) and (self._running is True):
+                self._cond.wait()
+
+            if self._running is False:
+                # stopped while waiting for free window, packet is given up like packets in flight
+                pending.future.set_result(None)
+                return pending.future
+
+            self._inflight.append(pending)
+            if self._recovering is False:
+                # while recovering, reader thread sends it after the resent packets
+                self._send(pending)
+            self._cond.notify_all()
+
+        return pending.future
+
+    def request(self, packet, rdlen=6):
+        """
+        send packet and wait response.
+
+        Returns
+        --------
+        bytes : response packet. None if display did not respond correctly.
+        """
+        return self.submit(packet, rdlen).result()
+
+    def flush(self, timeout=None):
+        """
+        wait until all packets are responded.
+
+        Returns
+        --------
+        bool : False if timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._inflight) == 0, timeout)
+
+    def _send(self, pending):
+        with tracer.span(pending.name, 'write', bytes=len(pending.packet)):
+            self.port.write(pending.packet)
+        pending.sentTime = time.monotonic()
+        pending.traceTime = tracer.now()
+        self.stats.sent += 1
+        if self.debug is True:
+            print('>', pending.packet)
+
+    def _receive(self, rdlen, deadline):
+        # blocking read until rdlen bytes or deadline. the thread sleeps in the serial driver while waiting.
+        # each read waits up to ack timeout, so timeout is detected at most ack timeout after the deadline.
+        rdly = bytearray()
+        while (len(rdly) < rdlen) and (time.monotonic() < deadline):
+            rdly += self.port.read(rdlen - len(rdly))
+
+        if self.debug is True:
+            print('<', len(rdly), bytes(rdly))
+        return rdly
+
+    def _resync(self):
+        # drop the rest of broken response and responses of following packets.
+        # wait until display stop sending, then clear receive buffer.
+        self.stats.resync += 1
+        self.port.timeout = RESYNC_IDLE
+        deadline = time.monotonic() + self.ackTimeout
+        while (len(self.port.read(64)) > 0) and (time.monotonic() < deadline):
+            pass
+        self.port.reset_input_buffer()
+        self.port.timeout = self.ackTimeout
+
+    def _run(self):
+        try:
+            self._serve()
+        except Exception as e:
+            self._abort(e)
+
+    def _abort(self, error):
+        # port failed. stop and give up all packets, so nobody waits responses forever.
+        with self._cond:
+            self._running = False
+            self._error = error
+            while len(self._inflight) > 0:
+                pending = self._inflight.popleft()
+                if pending.future.done() is False:
+                    pending.future.set_result(None)
+            self._cond.notify_all()
+
+        if self.debug is True:
+            print('port error.', repr(error))
+
+    def _serve(self):
+        while True:
+            with self._cond:
+                while (len(self._inflight) == 0) and (self._running is True):
+                    self._cond.wait()
+
+                if self._running is False:
+                    break
+
+                head = self._inflight[0]
+                # display handles packets one by one, so count timeout from response of previous packet
+                deadline = max(head.sentTime, self._lastResponseTime) + self.ackTimeout
+
+            rcvpacket = self._receive(head.rdlen, deadline)
+
+            with self._cond:
+                self._lastResponseTime = time.monotonic()
+                if len(rcvpacket) < head.rdlen:
+                    self.stats.timeout += 1
+                elif (check_packet(rcvpacket) == False) or is_nack(rcvpacket):
+                    self.stats.nack += 1
+                else:
+                    self.stats.ack += 1
+                    self._inflight.popleft()
+                    t = tracer.active
+                    if t is not None:
+                        # time from packet sent to its response received
+                        t.record(head.name, 'ack', head.traceTime, tracer.now(), bytes=len(rcvpacket), tries=head.tries + 1)
+                    head.future.set_result(bytes(rcvpacket))
+                    self._cond.notify_all()
+                    continue
+
+                self._recovering = True
+
+            self._recover(head)
+
+    def _recover(self, head):
+        # port I/O runs without the lock, so submit() does not wait for resync.
+        self._resync()
+        with self._cond:
+            packets = self._retry(head)
+            self._cond.notify_all()
+
+        # go-back-N, then packets submitted while recovering in submitted order
+        sent = 0
+        while True:
+            self._resend(packets)
+            sent += len(packets)
+            with self._cond:
+                if sent >= len(self._inflight):
+                    self._recovering = False
+                    self._cond.notify_all()
+                    return
+                packets = list(itertools.islice(self._inflight, sent, None))
+
+    def _retry(self, head):
+        # returns packets to send again
+        head.tries += 1
+        if head.tries > self.retry:
+            self.stats.failed += 1
+            self._inflight.popleft()
+            # future is cancelled if the caller gave up waiting(e.g. asyncio.wait_for)
+            if head.future.done() is False:
+                head.future.set_result(None)
+            if self.debug is True:
+                print('no response.', self.stats)
+
+        # go-back-N : send again all packets not responded
+        return list(self._inflight)
+
+    def _resend(self, packets):
+        for pending in packets:
+            if pending.sentTime != 0:
+                self.stats.retry += 1
+            self._send(pending)
+
+
+class AsyncCommandScheduler(CommandScheduler):
+    """
+    AsyncCommandScheduler is CommandScheduler on asyncio event loop.
+
+    responses are read by the event loop when the serial fd is readable, and timeouts are loop timers,
+    so it has no reader thread and no call blocks. submit() returns asyncio.Future.
+    packets over the window are queued and sent when responses arrive.
+    if the port has no fileno()(e.g. EmulatedSerial), the port is polled while packets are in flight.
+
+    Examples
+    ---------
+    scheduler = AsyncCommandScheduler(port)
+    scheduler.start()
+
+    response = await scheduler.submit(packet, 6)
+
+    See Also
+    --------
+    CommandScheduler
+    AsyncDisplay
+    """
+
+    def __init__(self, port, loop=None, window=WINDOW_SIZE, ack_timeout=ACK_TIMEOUT, retry=ACK_RETRY, debug=False):
+        """
+        Parameters
+        ------------
+        port : serial.Serial
+            UART port connected to display
+        loop : asyncio.AbstractEventLoop
+            event loop. if None, running loop at start().
+        """
+        super().__init__(port, window=window, ack_timeout=ack_timeout, retry=retry, debug=debug)
+        self.loop = loop
+
+        # packets waiting for free window
+        self._waiting = deque()
+        self._rx = bytearray()
+        self._fd = None
+        self._timer = None
+        self._resyncing = False
+        self._lastReceiveTime = 0
+        self._resyncStart = 0
+
+    @property
+    def inflight(self):
+        """
+        number of packets waiting response(include packets waiting for free window)
+        """
+        return len(self._inflight) + len(self._waiting)
+
+    def start(self):
+        """
+        start reading responses on event loop
+        """
+        if self._running is True:
+            return
+
+        if self.loop is None:
+            # asyncio is imported here, so threaded Display does not import it
+            import asyncio
+            self.loop = asyncio.get_running_loop()
+        self._running = True
+
+        # non-blocking read
+        self.port.timeout = 0
+        try:
+            self._fd = self.port.fileno()
+            self.loop.add_reader(self._fd, self._onReadable)
+        except (AttributeError, OSError, ValueError, NotImplementedError):
+            self._fd = None
+
+    def stop(self):
+        """
+        stop reading responses. packets waiting response are given up.
+        """
+        self._running = False
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+        self._fd = None
+        self._cancelTimer()
+
+        for pending in itertools.chain(self._inflight, self._waiting):
+            if pending.future.done() is False:
+                pending.future.set_result(None)
+        self._inflight.clear()
+        self._waiting.clear()
+
+    def submit(self, packet, rdlen=6) -> 'asyncio.Future':
+        """
+        send packet. if the window is full, packet is sent after responses of previous packets.
+
+        Returns
+        --------
+        asyncio.Future : result is response packet, or None if display did not respond correctly.
+        """
+        if self._running is False:
+            raise RuntimeError("scheduler is not started")
+
+        pending = _Pending(bytes(packet), rdlen, self.loop.create_future())
+        self._waiting.append(pending)
+        self._fill()
+        return pending.future
+
+    async def request(self, packet, rdlen=6):
+        """
+        send packet and wait response.
+
+        Returns
+        --------
+        bytes : response packet. None if display did not respond correctly.
+        """
+        return await self.submit(packet, rdlen)
+
+    async def flush(self, timeout=None):
+        """
+        wait until all packets are responded.
+
+        Returns
+        --------
+        bool : False if timeout
+        """
+        import asyncio
+
+        futures = [p.future for p in itertools.chain(self._inflight, self._waiting)]
+        if len(futures) == 0:
+            return True
+
+        done, _ = await asyncio.wait(futures, timeout=timeout)
+        return len(done) == len(futures)
+
+    def _fill(self):
+        # send waiting packets while the window is free
+        if self._resyncing is False:
+            while (len(self._waiting) > 0) and (len(self._inflight) < self.window):
+                pending = self._waiting.popleft()
+                self._inflight.append(pending)
+                self._send(pending)
+        self._arm()
+
+    def _deadline(self, head):
+        # display handles packets one by one, so count timeout from response of previous packet
+        return max(head.sentTime, self._lastResponseTime) + self.ackTimeout
+
+    def _arm(self):
+        # timer for timeout of head packet, or for polling port without fd
+        self._cancelTimer()
+        if (self._running is False) or (self._resyncing is True) or (len(self._inflight) == 0):
+            return
+
+        delay = self._deadline(self._inflight[0]) - time.monotonic()
+        if self._fd is None:
+            delay = min(delay, POLL_INTERVAL)
+        self._timer = self.loop.call_later(max(0, delay), self._onTimer)
+
+    def _cancelTimer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+
+    def _read(self):
+        n = self.port.in_waiting
+        return self.port.read(n) if n > 0 else b''
+
+    def _onReadable(self):
+        data = self._read()
+        if len(data) == 0:
+            return
+
+        if self._resyncing is True:
+            # drop the rest of broken response
+            self._lastReceiveTime = time.monotonic()
+            return
+
+        self._rx += data
+        if self.debug is True:
+            print('<', len(data), bytes(data))
+        self._process()
+
+    def _process(self):
+        while (len(self._inflight) > 0) and (len(self._rx) >= self._inflight[0].rdlen):
+            head = self._inflight[0]
+            rcvpacket = bytes(self._rx[:head.rdlen])
+            del self._rx[:head.rdlen]
+            self._lastResponseTime = time.monotonic()
+
+            if (check_packet(rcvpacket) == False) or is_nack(rcvpacket):
+                self.stats.nack += 1
+                self._startResync()
+                return
+
+            self.stats.ack += 1
+            self._inflight.popleft()
+            t = tracer.active
+            if t is not None:
+                t.record(head.name, 'ack', head.traceTime, tracer.now(), bytes=len(rcvpacket), tries=head.tries + 1)
+            if head.future.done() is False:
+                head.future.set_result(rcvpacket)
+
+        self._fill()
+
+    def _onTimer(self):
+        self._timer = None
+        if self._fd is None:
+            self._onReadable()
+            if self._resyncing is True:
+                return
+
+        if (len(self._inflight) > 0) and (time.monotonic() >= self._deadline(self._inflight[0])):
+            self.stats.timeout += 1
+            self._startResync()
+            return
+
+        self._arm()
+
+    def _startResync(self):
+        # wait until display stop sending without blocking the loop, then resend(go-back-N)
+        self.stats.resync += 1
+        self._cancelTimer()
+        self._resyncing = True
+        self._rx.clear()
+        self._resyncStart = self._lastReceiveTime = time.monotonic()
+        self.loop.call_later(RESYNC_IDLE, self._checkIdle)
+
+    def _checkIdle(self):
+        if self._running is False:
+            return
+
+        if self._fd is None:
+            self._onReadable()
+
+        now = time.monotonic()
+        if ((now - self._lastReceiveTime) < RESYNC_IDLE) and ((now - self._resyncStart) < self.ackTimeout):
+            self.loop.call_later(RESYNC_IDLE, self._checkIdle)
+            return
+
+        self.port.reset_input_buffer()
+        self._resyncing = False
+        self._lastResponseTime = now
+        try:
+            if len(self._inflight) > 0:
+                self._resend(self._retry(self._inflight[0]))
+        finally:
+            # following packets are sent and timer is set even if a callback of future raised
+            self._fill()
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+
+# mui display panel emulator
+#
+# software model of mui display panel. it parses the packets Display sends,
+# keeps the layout buffer and the displayed frame, and answers as the panel does.
+# with it, the rendering stack runs and can be benchmarked without mui hardware.
+#
+#   emulator = PanelEmulator()
+#   display = Display(port=EmulatedSerial(emulator))
+#
+# or over a pty :
+#
+#   panel = PtyPanel()
+#   panel.start()
+#   display = Display(panel.device, reset=False)
+
+import os
+import time
+import select
+from threading import Thread, Condition
+
+try:
+    from matrix import BitMatrix
+except ImportError:
+    from . import BitMatrix
+
+ACK = 0x06
+NACK = 0x15
+
+# bits per byte on the UART(start bit, 8 data bits, stop bit)
+BITS_PER_BYTE = 10
+
+# default time the panel takes to handle a packet(seconds)
+PROCESS_TIME = 0.0002
+
+MODE_ON = 0
+MODE_REFRESH = 1
+MODE_OFF = 2
+
+
+def _response(cmd, data):
+    # [length(2 bytes)] [command(2 bytes)] [data] [checksum]
+    buf = bytearray(len(data) + 5)
+    size = len(data) + 3
+    buf[0] = (size >> 8) & 0xFF
+    buf[1] = size & 0xFF
+    buf[2] = cmd[0]
+    buf[3] = cmd[1]
+    buf[4:-1] = data
+    buf[-1] = sum(buf[2:-1]) & 0xFF
+    return bytes(buf)
+
+
+class PanelEmulator(object):
+    """
+    PanelEmulator is software model of mui display panel.
+
+    Attributes
+    ----------
+    layout : BitMatrix
+        layout buffer written by layout packets
+    frame : BitMatrix
+        displayed frame. layout is copied to frame by refresh request.
+    frameCount : int
+        number of refresh requests
+    on : bool
+        display is turned on
+    duty : int
+        brightness set by turn on request
+    fade : int
+        fade level of last turn on/off request
+    packets : int
+        number of valid packets
+    errors : int
+        number of broken or unknown packets
+    """
+
+    def __init__(self, width=200, height=32, version=0x0100, mui_id='MUI-EMULATOR'):
+        self.width = width
+        self.height = height
+        self.version = version
+        self.muiId = mui_id
+
+        self.layout = BitMatrix(width, height)
+        self.frame = BitMatrix(width, height)
+        self.frameCount = 0
+        self.on = False
+        self.duty = 0
+        self.fade = 0
+
+        self.packets = 0
+        self.errors = 0
+
+        self._rx = bytearray()
+        self._nack = 0
+        self._drop = 0
+
+    def nackNext(self, count=1):
+        """
+        answer NACK to next count packets(for testing of retry)
+        """
+        self._nack += count
+
+    def dropNext(self, count=1):
+        """
+        do not answer next count packets(for testing of timeout)
+        """
+        self._drop += count
+
+    def reset(self):
+        """
+        clear buffers as hardware reset
+        """
+        self.__init__(self.width, self.height, self.version, self.muiId)
+
+    def feed(self, data):
+        """
+        receive bytes from UART.
+
+        Returns
+        --------
+        list of bytes : responses of packets completed by data
+        """
+        self._rx += data
+        responses = []
+        while len(self._rx) >= 2:
+            size = (self._rx[0] << 8) + self._rx[1] + 2
+            if len(self._rx) < size:
+                break
+
+            packet = bytes(self._rx[:size])
+            del self._rx[:size]
+
+            response = self.handlePacket(packet)
+            if response is not None:
+                responses.append(response)
+
+        return responses
+
+    def handlePacket(self, packet):
+        """
+        handle a packet and return its response. None if the panel does not answer.
+        """
+        cmd = packet[2:4] if len(packet) >= 4 else b'\x00\x00'
+        if self._drop > 0:
+            self._drop -= 1
+            return None
+
+        if self._nack > 0:
+            self._nack -= 1
+            return _response(cmd, (NACK,))
+
+        if (len(packet) < 5) or ((sum(packet[2:-1]) & 0xFF) != packet[-1]):
+            self.errors += 1
+            return _response(cmd, (NACK,))
+
+        data = packet[4:-1]
+        if cmd == b'\x00\x02':
+            ok = self._writeLayout(data)
+        elif cmd == b'\x00\x03':
+            ok = self._displayRequest(data)
+        elif cmd == b'\x80\x00':
+            self.packets += 1
+            return _response(cmd, ((self.version >> 8) & 0xFF, self.version & 0xFF))
+        elif cmd == b'\x80\x01':
+            self.packets += 1
+            return _response(cmd, self.muiId.encode('utf-8')[:24].ljust(24, b'\0'))
+        elif cmd == b'\x80\x02':
+            self.packets += 1
+            return _response(cmd, bytes(10))
+        else:
+            ok = False
+
+        if ok is False:
+            self.errors += 1
+            return _response(cmd, (NACK,))
+
+        self.packets += 1
+        return _response(cmd, (ACK,))
+
+    def _writeLayout(self, data):
+        if len(data) < 8:
+            return False
+
+        x = (data[0] << 8) + data[1]
+        y = (data[2] << 8) + data[3]
+        w = (data[4] << 8) + data[5]
+        h = (data[6] << 8) + data[7]
+        if (x % 8 != 0) or (w % 8 != 0) or (x + w > self.width) or (y + h > self.height):
+            return False
+
+        stride = w // 8
+        if len(data) != 8 + (stride * h):
+            return False
+
+        bits = self.layout.bits
+        col = x // 8
+        for r in range(h):
+            offset = 8 + (r * stride)
+            bits[y + r, col:col + stride] = data[offset:offset + stride]
+        return True
+
+    def _displayRequest(self, data):
+        if len(data) != 3:
+            return False
+
+        fade, duty, mode = data
+        if mode == MODE_ON:
+            self.on = True
+            self.duty = duty
+            self.fade = fade
+        elif mode == MODE_REFRESH:
+            self.frame.copy(self.layout)
+            self.frameCount += 1
+        elif mode == MODE_OFF:
+            self.on = False
+            self.fade = fade
+        else:
+            return False
+        return True
+
+
+class EmulatedSerial(object):
+    """
+    serial-like transport connected to PanelEmulator.
+
+    the time of UART transfer(baudrate) and panel processing is modelled.
+    a response is readable when its last byte arrives at host side.
+    if realtime is False, the time runs on virtual clock and read() does not sleep.
+
+    Attributes
+    ----------
+    linkTime : float
+        time the link has been busy(seconds)
+    """
+
+    def __init__(self, emulator=None, baudrate=460800, process_time=PROCESS_TIME, realtime=True, timeout=None):
+        self.emulator = PanelEmulator() if emulator is None else emulator
+        self.baudrate = baudrate
+        self.processTime = process_time
+        self.realtime = realtime
+        self.timeout = timeout
+        self.is_open = True
+
+        self.linkTime = 0
+        self.bytesWritten = 0
+        self.bytesRead = 0
+
+        self._byteTime = BITS_PER_BYTE / baudrate
+        self._cond = Condition()
+        self._virtual = 0
+        self._txFree = 0
+        self._rxFree = 0
+        # list of [time readable, data]
+        self._rx = []
+
+    def _now(self):
+        return time.monotonic() if self.realtime is True else self._virtual
+
+    def write(self, data):
+        data = bytes(data)
+        with self._cond:
+            now = self._now()
+            txStart = max(now, self._txFree)
+            self._txFree = txStart + (len(data) * self._byteTime)
+            self.linkTime += self._txFree - txStart
+            self.bytesWritten += len(data)
+
+            for response in self.emulator.feed(data):
+                # panel answers after the whole packet is received and handled
+                rxStart = max(self._txFree + self.processTime, self._rxFree)
+                self._rxFree = rxStart + (len(response) * self._byteTime)
+                self.linkTime += self._rxFree - rxStart
+                self._rx.append([self._rxFree, bytearray(response)])
+
+            self._cond.notify_all()
+        return len(data)
+
+    @property
+    def in_waiting(self):
+        with self._cond:
+            now = self._now()
+            return sum(len(d) for t, d in self._rx if t <= now)
+
+    def read(self, size=1):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        out = bytearray()
+        with self._cond:
+            while len(out) < size:
+                if len(self._rx) > 0:
+                    t, data = self._rx[0]
+                    wait = t - self._now()
+                    if wait <= 0 or self.realtime is False:
+                        self._virtual = max(self._virtual, t)
+                        n = size - len(out)
+                        out += data[:n]
+                        del data[:n]
+                        if len(data) == 0:
+                            self._rx.pop(0)
+                        continue
+                else:
+                    wait = None
+
+                if deadline is not None:
+                    remain = deadline - time.monotonic()
+                    if remain <= 0:
+                        break
+                    wait = remain if wait is None else min(wait, remain)
+
+                self._cond.wait(wait)
+
+        self.bytesRead += len(out)
+        return bytes(out)
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+class PtyPanel(object):
+    """
+    PanelEmulator served on a pseudo terminal.
+    open device with Display(panel.device, reset=False) or any serial tool.
+    """
+
+    def __init__(self, emulator=None):
+        import tty
+
+        self.emulator = PanelEmulator() if emulator is None else emulator
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.device = os.ttyname(self._slave)
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = Thread(target=self._run, name='panel emulator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _run(self):
+        while self._running is True:
+            r, _, _ = select.select([self._master], [], [], 0.1)
+            if len(r) == 0:
+                continue
+
+            for response in self.emulator.feed(os.read(self._master, 1024)):
+                os.write(self._master, response)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+# mui font atlas class
+#
+# font atlas is a binary file compiled from mui font image and font information file.
+# MuiFont memory-maps it at runtime, so it does not need to decode the font image at start-up.
+#
+# build : python mui_ui/font_atlas.py [font image] [font information] [output]
+
+import os
+import sys
+import csv
+import mmap
+import struct
+from bisect import bisect_left
+
+name = os.path.dirname(os.path.abspath(__file__))
+
+ATLAS_MAGIC = b'MUIF'
+ATLAS_VERSION = 1
+
+# magic, version, reserved, number of glyphs
+HEADER_FORMAT = '<4sHHI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# glyph data is 8 rows, 1 byte per row(MSB is left side dot)
+GLYPH_ROWS = 8
+
+
+class FontAtlas(object):
+    """
+    memory-mapped mui font atlas
+
+    File Format
+    -----------
+    all values are little endian.
+
+    header : magic(4 bytes 'MUIF'), version(uint16), reserved(uint16), number of glyphs(uint32)
+    codes : code point of glyphs(uint32 * number of glyphs), sorted ascending
+    widths : width of glyphs(uint8 * number of glyphs)
+    heights : height of glyphs(uint8 * number of glyphs)
+    rows : glyph data(8 bytes * number of glyphs)
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+
+        if len(self._mm) < HEADER_SIZE:
+            self.close()
+            raise ValueError('broken font atlas : ' + path)
+
+        magic, version, _, count = struct.unpack_from(HEADER_FORMAT, self._mm, 0)
+        if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+            self.close()
+            raise ValueError('unsupported font atlas : ' + path)
+
+        if len(self._mm) < HEADER_SIZE + (count * (4 + 1 + 1 + GLYPH_ROWS)):
+            self.close()
+            raise ValueError('broken font atlas : ' + path)
+
+        view = memoryview(self._mm)
+        offset = HEADER_SIZE
+        codes = view[offset:offset + (count * 4)]
+        if (sys.byteorder == 'little') and (struct.calcsize('I') == 4):
+            # native unsigned int is little endian uint32, so codes are used without copy
+            self._codes = codes.cast('I')
+        else:
+            self._codes = struct.unpack_from('<{0}I'.format(count), codes)
+            codes.release()
+        offset += count * 4
+        self._widths = view[offset:offset + count]
+        offset += count
+        self._heights = view[offset:offset + count]
+        offset += count
+        self._rows = view[offset:offset + (count * GLYPH_ROWS)]
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, code):
+        return self._find(code) >= 0
+
+    def _find(self, code):
+        i = bisect_left(self._codes, code)
+        if i < self._count and self._codes[i] == code:
+            return i
+        return -1
+
+    def getGlyph(self, code):
+        """
+        Return (width, height, rows) of glyph. rows is 8 bytes of glyph data.
+        if glyph is not exist, return None.
+        """
+        i = self._find(code)
+        if i < 0:
+            return None
+
+        rows = self._rows[i * GLYPH_ROWS:(i + 1) * GLYPH_ROWS]
+        return self._widths[i], self._heights[i], rows
+
+    def close(self):
+        for v in ('_codes', '_widths', '_heights', '_rows'):
+            if isinstance(getattr(self, v, None), memoryview):
+                getattr(self, v).release()
+        self._mm.close()
+        self._file.close()
+
+
+def build_font_atlas(font_file, font_info_file, output):
+    """
+    compile mui font image and font information file to font atlas.
+
+    Parameters
+    ------------
+    font_file : str
+        path of font image(mui_gothic_01.png)
+    font_info_file : str
+        path of font information file(sjis_unicode_convert_table.csv)
+    output : str
+        path of output file
+    """
+    from PIL import Image
+
+    im = Image.open(font_file)
+    fontData = im.load()
+
+    # same rules as MuiFont font information loading
+    glyphs = {}
+    with open(font_info_file) as f:
+        for row in csv.reader(f):
+            w = 8
+            if len(row) >= 3 and len(row[2]) > 0:
+                w = int(row[2])
+
+            h = 8
+            if len(row) == 4 and len(row[3]) > 0:
+                h = int(row[3])
+
+            glyphs[int(row[1], 16)] = (int(row[0][0:2], 16), int(row[0][2:4], 16), w, h)
+
+    codes = sorted(glyphs)
+    widths = bytearray()
+    heights = bytearray()
+    rows = bytearray()
+    for code in codes:
+        ku, ten, w, h = glyphs[code]
+        top = (ku - 33) * 8
+        left = (ten - 33) * 8
+        widths.append(w)
+        heights.append(h)
+
+        for y in range(GLYPH_ROWS):
+            tmp = 0
+            if y < h:
+                for x in range(min(w, 8)):
+                    if fontData[left + x, top + y] == 0:
+                        tmp |= (0x80 >> x)
+            rows.append(tmp)
+
+    with open(output, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, ATLAS_MAGIC, ATLAS_VERSION, 0, len(codes)))
+        f.write(struct.pack('<{:d}I'.format(len(codes)), *codes))
+        f.write(widths)
+        f.write(heights)
+        f.write(rows)
+
+    return len(codes)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if len(args) == 0:
+        args = [
+            os.path.join(name, 'assets', 'mui_gothic_01.png'),
+            os.path.join(name, 'assets', 'sjis_unicode_convert_table.csv'),
+            os.path.join(name, 'assets', 'mui_gothic_01.atlas'),
+        ]
+
+    if len(args) != 3:
+        print('usage : python font_atlas.py [font image] [font information] [output]')
+        sys.exit(1)
+
+    count = build_font_atlas(*args)
+    print('{0} : {1} glyphs'.format(args[2], count))
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+
+# mui frame clock class
+#
+# FrameClock runs animations of all widgets on one thread.
+# time is divided into ticks(frames), and callbacks due in a tick run together.
+# update requests made in a tick are delivered once after all callbacks ran, so a tick makes one frame.
+#
+#   clock = FrameClock.get_instance()
+#
+#   # call every second
+#   handle = clock.schedule(self.updateClock, 0, 1)
+#
+#   # generator animation. yield seconds to wait until next step.
+#   def blink(self):
+#       for i in range(6):
+#           self.visible = not self.visible
+#           clock.requestUpdate(self)
+#           yield 0.25
+#
+#   handle = clock.animate(self.blink())
+#   handle.cancel()
+
+import math
+import heapq
+import itertools
+import time
+from threading import Thread, Condition, current_thread
+
+# default frame rate of FrameClock(ticks per second)
+FRAME_RATE = 20
+
+
+class Animation(object):
+    """
+    handle of a callback or generator animation scheduled on FrameClock
+    """
+
+    __slots__ = ('_step', '_interval', '_tick', '_active')
+
+    def __init__(self, step, interval):
+        self._step = step
+        self._interval = interval
+        self._tick = 0
+        self._active = True
+
+    @property
+    def active(self):
+        """
+        False after the animation finished or was cancelled
+        """
+        return self._active
+
+    def cancel(self):
+        """
+        stop the animation. if it is running now, current step is completed.
+        """
+        self._active = False
+
+
+class FrameClock(object):
+    """
+    FrameClock is tick based animation scheduler shared by widgets.
+
+    callbacks are called on the clock thread at the first tick after their due time.
+    the thread sleeps while no animation is scheduled, so idle screen costs nothing.
+
+    views call requestUpdate() instead of OnUpdateRequestListener.onUpdateView().
+    requests are merged per listener and delivered at the end of the tick,
+    so views animated in the same tick are drawn in one frame.
+
+    Notes
+    -----
+    callbacks run on the clock thread one by one, so please do not block in them.
+    use animate() with a generator for multi step animation.
+
+    See Also
+    --------
+    DigitalClock
+    TypeWriterText
+    AutoScrollText
+    Message
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if not cls._instance:
+            cls._instance = cls()
+
+        return cls._instance
+
+    def __init__(self, fps=FRAME_RATE, threaded=True):
+        """
+        Parameters
+        ------------
+        fps : int
+            ticks per second
+        threaded : bool
+            run ticks on own thread. if False, please call advance() from your loop.
+        """
+        self.fps = fps
+        self.threaded = threaded
+        self._period = 1 / fps
+        self._origin = time.monotonic()
+        self._tick = 0
+
+        # heap of (tick, sequence, Animation)
+        self._queue = []
+        self._seq = itertools.count()
+        # listener : (function, args) of update requests
+        self._updates = {}
+        self._cond = Condition()
+        self._running = False
+        self._thread = None
+        # event loop driving ticks(attach())
+        self._loop = None
+        self._handle = None
+
+        self.frameCount = 0
+
+    @property
+    def period(self):
+        """
+        time of a tick(seconds)
+        """
+        return self._period
+
+    @property
+    def loop(self):
+        """
+        event loop driving ticks(attach()). None if ticks run on clock thread.
+        """
+        return self._loop
+
+    def start(self):
+        """
+        start clock thread. schedule() starts it automatically.
+        """
+        with self._cond:
+            if (self._running is True) or (self.threaded is False):
+                return
+            self._running = True
+
+        self._thread = Thread(target=self._run, name='mui frame clock', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        stop clock thread and cancel all animations
+        """
+        with self._cond:
+            for _, _, animation in self._queue:
+                animation.cancel()
+            self._queue.clear()
+            self._updates.clear()
+        self._stopThread()
+
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = None
+
+    def attach(self, loop):
+        """
+        run ticks on asyncio event loop instead of clock thread. scheduled animations keep running.
+        callbacks are called on the loop.
+
+        Parameters
+        ------------
+        loop : asyncio.AbstractEventLoop
+        """
+        self._stopThread()
+        self.threaded = False
+        self._loop = loop
+        loop.call_soon_threadsafe(self._drive)
+
+    def detach(self):
+        """
+        stop running ticks on event loop, and run them on clock thread again.
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = None
+        self._loop = None
+        self.threaded = True
+        if self._nextTime() is not None:
+            self.start()
+
+    def _stopThread(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if (self._thread is not None) and (self._thread is not current_thread()):
+            self._thread.join()
+        self._thread = None
+
+    def schedule(self, callback, delay=0, interval=None) -> Animation:
+        """
+        call callback on the clock thread.
+
+        Parameters
+        ------------
+        callback : callable
+            function without arguments
+        delay : float
+            time until first call(seconds)
+        interval : float
+            if set, callback is called repeatedly at this interval(seconds)
+
+        Returns
+        --------
+        Animation : handle to cancel
+        """
+        interval = None if interval is None else max(1, round(interval / self._period))
+        return self._add(Animation(callback, interval), delay)
+
+    def animate(self, generator, delay=0) -> Animation:
+        """
+        run generator animation on the clock thread.
+        generator is advanced one step at a time, and yields time to wait until next step(seconds).
+        yield None or 0 to wait one tick.
+
+        Returns
+        --------
+        Animation : handle to cancel
+        """
+        return self._add(Animation(generator, None), delay)
+
+    def requestUpdate(self, view):
+        """
+        request UI update of view. OnUpdateRequestListener of the view is called once at the end of tick.
+        """
+        l = view.OnUpdateRequestListener
+        if l is not None:
+            self.post(l, l.onUpdateView, view)
+
+    def post(self, key, func, *args):
+        """
+        call func(*args) at the end of tick. if posted again in the tick with same key, only last one is called.
+        """
+        with self._cond:
+            self._updates[key] = (func, args)
+            if self._running is True:
+                self._cond.notify_all()
+        self._wake()
+
+    def advance(self, now=None):
+        """
+        run ticks due until now. called from the clock thread, or from the app loop if threaded is False.
+
+        Returns
+        --------
+        float : time of next tick which has work. None if nothing is scheduled.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        tick = self._tickAt(now)
+        with self._cond:
+            if tick <= self._tick:
+                return self._nextTime()
+            self._tick = tick
+
+            due = []
+            while (len(self._queue) > 0) and (self._queue[0][0] <= self._tick):
+                due.append(heapq.heappop(self._queue)[2])
+
+        for animation in due:
+            self._step(animation)
+
+        with self._cond:
+            updates = list(self._updates.values())
+            self._updates.clear()
+
+        for func, args in updates:
+            try:
+                func(*args)
+            except Exception as e:
+                print('frame clock : update failed.', e)
+
+        if len(updates) > 0:
+            self.frameCount += 1
+
+        with self._cond:
+            return self._nextTime()
+
+    def _add(self, animation, delay):
+        with self._cond:
+            # next tick at least, so a callback scheduled in a tick does not run in the same tick
+            now = self._tickAt(time.monotonic())
+            animation._tick = max(self._tick, now) + max(1, math.ceil(delay / self._period))
+            heapq.heappush(self._queue, (animation._tick, next(self._seq), animation))
+            self._cond.notify_all()
+        self._wake()
+        return animation
+
+    def _wake(self):
+        loop = self._loop
+        if loop is None:
+            self.start()
+        else:
+            loop.call_soon_threadsafe(self._drive)
+
+    def _drive(self):
+        # run due ticks on event loop, and set loop timer to next tick
+        if self._loop is None:
+            return
+
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = None
+
+        next = self.advance()
+        if next is not None:
+            self._handle = self._loop.call_later(max(0, next - time.monotonic()), self._drive)
+
+    def _step(self, animation):
+        if animation._active is False:
+            return
+
+        wait = None
+        try:
+            if callable(animation._step):
+                animation._step()
+                if animation._interval is None:
+                    animation._active = False
+                    return
+                wait = animation._interval
+            else:
+                delay = next(animation._step)
+                wait = 1 if not delay else max(1, round(delay / self._period))
+        except StopIteration:
+            animation._active = False
+            return
+        except Exception as e:
+            animation._active = False
+            print('frame clock : animation failed.', e)
+            return
+
+        if animation._active is False:
+            # cancelled in the step
+            return
+
+        with self._cond:
+            animation._tick = max(animation._tick + wait, self._tick + 1)
+            heapq.heappush(self._queue, (animation._tick, next(self._seq), animation))
+
+    def _tickAt(self, t):
+        # small margin, so the tick is not missed by rounding when woken up at its time
+        return int(((t - self._origin) / self._period) + 1e-6)
+
+    def _nextTime(self):
+        # skip cancelled animations
+        while (len(self._queue) > 0) and (self._queue[0][2]._active is False):
+            heapq.heappop(self._queue)
+
+        if len(self._updates) > 0:
+            # update requested out of tick is delivered at next tick
+            return self._origin + ((self._tick + 1) * self._period)
+        if len(self._queue) == 0:
+            return None
+        return self._origin + (self._queue[0][0] * self._period)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._running is False:
+                    break
+                next = self._nextTime()
+                wait = None if next is None else next - time.monotonic()
+                if (wait is None) or (wait > 0):
+                    self._cond.wait(wait)
+                    continue
+
+            self.advance()
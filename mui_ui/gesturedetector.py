@@ -2,20 +2,44 @@
 
 # mui touch panel gesture detector class
 
+import time
+from threading import Lock
+
 try:
     from input import MotionEvent, VALUE_UP, VALUE_MOVE, VALUE_DOWN
+    from frame_clock import FrameClock
+    from velocity_tracker import VelocityTracker
 except ImportError:
-    from . import MotionEvent, VALUE_UP, VALUE_MOVE, VALUE_DOWN
-
-from threading import Timer
+    from . import MotionEvent, VALUE_UP, VALUE_MOVE, VALUE_DOWN, FrameClock, VelocityTracker
 
 SLOP_SQUARE = 64
+DOUBLE_TAP_SLOP_SQUARE = 100
 MINIMUM_FLING_VELOCITY = 50
 LONG_PRESS_TIMEOUT = 3 # sec
+DOUBLE_TAP_TIMEOUT = 0.3 # sec
+
+# gesture waiting for deadline
+PENDING_NONE = 0
+PENDING_LONG_PRESS = 1
+PENDING_TAP_CONFIRM = 2
 
 class GestureListener(object):
 
     def onScroll(self, e1: MotionEvent,  e2: MotionEvent, scrollX, scrollY) -> bool:
+        """
+        this method invoked when touch moved over the slop, and at every move after that.
+
+        Parameters
+        ------------
+        e1 : MotionEvent
+            touch down event of the scroll
+        e2 : MotionEvent
+            current move event
+        scrollX : int
+            distance along x since last onScroll(last x - current x)
+        scrollY : int
+            distance along y since last onScroll(last y - current y)
+        """
         return False
 
     def onFling(self, e1: MotionEvent,  e2: MotionEvent, velocityX, velocityY) -> bool:
@@ -28,10 +52,10 @@ class GestureListener(object):
             start position of swipe event
         e2 : MotionEvent
             end position of swipe event
-        velocityX : int
-            distance between e1.x and e2.x
-        velocityY : int
-            distance between e1.y and e2.y
+        velocityX : float
+            velocity along x at touch up(pixels per second). negative value is to the left.
+        velocityY : float
+            velocity along y at touch up(pixels per second). negative value is to the top.
         """
         return False
 
@@ -46,10 +70,44 @@ class GestureListener(object):
         """
         pass
 
+    def onSingleTapUp(self, e: MotionEvent) -> bool:
+        """
+        this method invoked when user touched up without moving and before long press.
+        it is invoked for each tap of double tap too.
+
+        Parameters
+        ------------
+        e : MotionEvent
+            up event of the tap
+        """
+        return False
+
+    def onSingleTapConfirmed(self, e: MotionEvent) -> bool:
+        """
+        this method invoked when a tap is not followed by second tap in double_tap_timeout.
+
+        Parameters
+        ------------
+        e : MotionEvent
+            down event of the tap
+        """
+        return False
+
+    def onDoubleTap(self, e: MotionEvent) -> bool:
+        """
+        this method invoked when second tap is touched down near the first tap.
+
+        Parameters
+        ------------
+        e : MotionEvent
+            down event of the first tap
+        """
+        return False
+
 
 class GestureDetector(object):
     """
-    GestureDetector can determin touch gestures like swipe, scroll, long press.
+    GestureDetector can determin touch gestures like swipe, scroll, long press, tap and double tap.
     When occure these gesture event, call callback method of GestureListener.
 
     USAGE:
@@ -80,10 +138,17 @@ class GestureDetector(object):
     # start application
     app = App()
     app.mainLoop()
-    
+
+    Notes
+    -----
+    fling velocity is computed by VelocityTracker from recent moves, and Scroller can continue scroll after fling.
+    gestures are recognized by timestamps of events. long press and tap confirmation which need
+    to be fired without next event use one timer on the shared FrameClock, so no thread is created per gesture.
+    InputHandler runs the FrameClock on its event loop, so these callbacks are called on the input thread.
     """
 
-    def __init__(self, listener: GestureListener, longpress_timeout = LONG_PRESS_TIMEOUT):
+    def __init__(self, listener: GestureListener, longpress_timeout = LONG_PRESS_TIMEOUT,
+                 double_tap_timeout = DOUBLE_TAP_TIMEOUT):
         """
         Parameters
         ------------
@@ -92,6 +157,9 @@ class GestureDetector(object):
 
         longpress_timeout: number
             if user keep touch-down and does not move position over this time(seconds), fire long press event.
+
+        double_tap_timeout: number
+            if user touch down again in this time(seconds) from tap, fire double tap event.
         """
         self._gestureListener = listener
         self._lastX = 0
@@ -99,9 +167,24 @@ class GestureDetector(object):
         self._lastFocusX = 0
         self._lastFocusY = 0
         self._inTapRegion = False
+        self._inLongPress = False
+        self._moved = False
         self._downMotion = None
-        self._longpressTimer = None
+        self._velocityTracker = VelocityTracker()
         self._longpress_timeout = longpress_timeout
+        self._double_tap_timeout = double_tap_timeout
+
+        # first tap of double tap
+        self._tapDown = None
+        self._tapUp = None
+
+        # gesture waiting for deadline. deadline is in event time, and _deadline is in time.monotonic()
+        self._pending = PENDING_NONE
+        self._pendingTime = 0
+        self._deadline = 0
+        self._timer = None
+        self._timerDeadline = 0
+        self._lock = Lock()
 
     def _cancel(self):
         self._lastX = 0
@@ -109,11 +192,12 @@ class GestureDetector(object):
         self._lastFocusX = 0
         self._lastFocusY = 0
         self._inTapRegion = False
+        self._inLongPress = False
+        self._moved = False
         self._downMotion = None
-
-        if self._longpressTimer is not None:
-            self._longpressTimer.cancel()
-        self._longpressTimer = None
+        self._tapDown = None
+        self._tapUp = None
+        self._setPending(PENDING_NONE)
 
     def onTouchEvent(self, e: MotionEvent):
         """
@@ -128,23 +212,39 @@ class GestureDetector(object):
         x = e.x
         y = e.y
 
+        # deadline passed before the timer was called
+        self._checkPending(e.timestamp)
+
         if e.action == VALUE_DOWN:
+            isDoubleTap = self._isDoubleTap(e)
+            self._setPending(PENDING_NONE)
+
             self._lastX = x
             self._lastY = y
             self._lastFocusX = x
             self._lastFocusY = y
             self._inTapRegion = True
+            self._inLongPress = False
+            self._moved = False
+            self._velocityTracker.clear()
+            self._velocityTracker.addMovement(e)
             downMotion = MotionEvent()
             downMotion.copy(e)
             self._downMotion = downMotion
 
-            if self._longpressTimer is not None:
-                self._longpressTimer.cancel()
-
-            self._longpressTimer = Timer(self._longpress_timeout, self._dispathLongPress)
-            self._longpressTimer.start()
+            if isDoubleTap is True:
+                handle = self._gestureListener.onDoubleTap(self._tapDown)
+                self._tapDown = None
+                self._tapUp = None
+            else:
+                self._tapDown = downMotion
+                self._tapUp = None
+                self._setPending(PENDING_LONG_PRESS, e.timestamp + self._longpress_timeout, e.timestamp)
 
         elif e.action == VALUE_MOVE and self._downMotion is not None:
+            self._moved = True
+            self._velocityTracker.addMovement(e)
+
             if self._inTapRegion:
                 scrollX = self._lastFocusX - x
                 scrollY = self._lastFocusY - y
@@ -156,31 +256,135 @@ class GestureDetector(object):
                     self._lastFocusX = x
                     self._lastFocusY = y
                     self._inTapRegion = False
+                    self._tapDown = None
 
-            if self._longpressTimer is not None:
-                self._longpressTimer.cancel()
+                    # moved, so it is not long press
+                    self._setPending(PENDING_NONE)
 
+            else:
+                scrollX = self._lastFocusX - x
+                scrollY = self._lastFocusY - y
+                if (scrollX != 0) or (scrollY != 0):
+                    handle = self._gestureListener.onScroll(self._downMotion, e, scrollX, scrollY)
+                    self._lastFocusX = x
+                    self._lastFocusY = y
 
         elif e.action == VALUE_UP and self._downMotion is not None:
-            deltaT = (e.timestamp - self._downMotion.timestamp) * 1000
-            deltaX = abs(x - self._lastX)
-            deltaY = abs(y - self._lastY)
-            velX = (deltaX / deltaT) * 1000
-            velY = (deltaY / deltaT) * 1000
-            if (velX > MINIMUM_FLING_VELOCITY) or (velY > MINIMUM_FLING_VELOCITY):
-                handle = self._gestureListener.onFling(self._downMotion, e, velX, velY)
-                self._cancel()
-
-            if self._longpressTimer is not None:
-                self._longpressTimer.cancel()
+            self._setPending(PENDING_NONE)
+            self._velocityTracker.addMovement(e)
+
+            deltaX = x - self._lastX
+            deltaY = y - self._lastY
+            if (deltaX * deltaX) + (deltaY * deltaY) > SLOP_SQUARE:
+                # touch panel may not report move of a quick swipe
+                self._inTapRegion = False
+
+            if self._inLongPress is True:
+                # up of long press is not tap or swipe
+                self._inLongPress = False
+                self._tapDown = None
+
+            elif self._inTapRegion is True:
+                handle = self._gestureListener.onSingleTapUp(e)
+                if self._tapDown is not None:
+                    # wait second tap
+                    upMotion = MotionEvent()
+                    upMotion.copy(e)
+                    self._tapUp = upMotion
+                    self._setPending(PENDING_TAP_CONFIRM, e.timestamp + self._double_tap_timeout, e.timestamp)
+
+            else:
+                velX, velY = self._velocityTracker.computeVelocity()
+                deltaT = e.timestamp - self._downMotion.timestamp
+                if (self._moved is False) and (deltaT > 0):
+                    # no move was reported, so only down and up positions are known
+                    velX = (x - self._lastX) / deltaT
+                    velY = (y - self._lastY) / deltaT
+
+                if (abs(velX) > MINIMUM_FLING_VELOCITY) or (abs(velY) > MINIMUM_FLING_VELOCITY):
+                    handle = self._gestureListener.onFling(self._downMotion, e, velX, velY)
+                    self._cancel()
+
+            self._downMotion = None
 
         else:
             self._cancel()
 
         return handle
 
-    def _dispathLongPress(self):
-        self._gestureListener.onLongPress(self._downMotion)
-
-
-
+    def _isDoubleTap(self, e):
+        if (self._pending != PENDING_TAP_CONFIRM) or (self._tapUp is None):
+            return False
+
+        if e.timestamp - self._tapUp.timestamp > self._double_tap_timeout:
+            return False
+
+        deltaX = e.x - self._tapDown.x
+        deltaY = e.y - self._tapDown.y
+        return (deltaX * deltaX) + (deltaY * deltaY) < DOUBLE_TAP_SLOP_SQUARE
+
+    def _setPending(self, pending, deadline=0, now=0):
+        with self._lock:
+            self._pending = pending
+            self._pendingTime = deadline
+            if pending == PENDING_NONE:
+                # timer is kept, it is called once and stops
+                return
+
+            self._deadline = time.monotonic() + (deadline - now)
+
+            # timer earlier than the deadline is kept. it checks the deadline and set itself again.
+            if (self._timer is not None) and (self._timer.active is True):
+                if self._timerDeadline <= self._deadline:
+                    return
+                self._timer.cancel()
+            self._arm()
+
+    def _arm(self):
+        self._timerDeadline = self._deadline
+        self._timer = FrameClock.get_instance().schedule(self._onTimer, max(0, self._deadline - time.monotonic()))
+
+    def _onTimer(self):
+        with self._lock:
+            self._timer = None
+            if self._pending == PENDING_NONE:
+                return
+
+            if time.monotonic() < self._deadline:
+                # gesture changed after the timer was set
+                self._arm()
+                return
+
+            pending, e = self._take()
+
+        self._dispatchPending(pending, e)
+
+    def _checkPending(self, timestamp):
+        with self._lock:
+            if (self._pending == PENDING_NONE) or (timestamp < self._pendingTime):
+                return
+            pending, e = self._take()
+
+        self._dispatchPending(pending, e)
+
+    def _take(self):
+        pending = self._pending
+        self._pending = PENDING_NONE
+        if pending == PENDING_LONG_PRESS:
+            self._inLongPress = True
+            self._tapDown = None
+            return pending, self._downMotion
+
+        e = self._tapDown
+        self._tapDown = None
+        self._tapUp = None
+        return pending, e
+
+    def _dispatchPending(self, pending, e):
+        if e is None:
+            return
+
+        if pending == PENDING_LONG_PRESS:
+            self._gestureListener.onLongPress(e)
+        else:
+            self._gestureListener.onSingleTapConfirmed(e)
@@ -2,13 +2,140 @@
 
 # mui ui / image view class
 
-from PIL import Image as ImgLib
+import os
+from collections import OrderedDict, namedtuple
+from threading import Lock
 
 try:
     from parts import AbsParts
     from matrix import Matrix
+    from asset_bundle import is_bundle_ref, resolve_ref
 except ImportError:
     from . import AbsParts, Matrix
+    from .asset_bundle import is_bundle_ref, resolve_ref
+
+# default memory limit of bitmap cache(bytes)
+BITMAP_CACHE_BYTES = 2 * 1024 * 1024
+
+BitmapCacheInfo = namedtuple('BitmapCacheInfo', ['hits', 'misses', 'count', 'maxbytes', 'currbytes'])
+
+
+def decode_image(path) -> Matrix:
+    """
+    load image file and convert to Matrix. a pixel which color is BLACK is LED ON.
+
+    RGB : (0, 0, 0) is on
+    RGBA : (0, 0, 0, 255) is on
+    1 : black(0) is on
+    single band(L, P) : value 1 is on
+    """
+    import numpy as np
+    from PIL import Image as ImgLib
+
+    im = ImgLib.open(path)
+    if im.mode not in ('RGB', 'RGBA', '1', 'L', 'P'):
+        im = im.convert('RGBA')
+
+    a = np.asarray(im)
+    if im.mode == '1':
+        # PIL returns bool array for mode '1', True is white
+        on = ~a
+    elif a.ndim == 2:
+        on = a == 1
+    else:
+        on = np.all(a[:, :, 0:3] == 0, axis=2)
+        if im.mode == 'RGBA':
+            on &= a[:, :, 3] == 255
+
+    return Matrix.fromarray(on)
+
+
+class BitmapCache(object):
+    """
+    process-wide LRU cache of decoded images keyed by path and modification time.
+    when total size of cached bitmaps exceeds the limit, least recently used bitmaps are dropped.
+
+    bitmaps in asset bundle('bundle://...') are cached too. bundle is not changed while it is registered,
+    so they are looked up without checking the file.
+
+    load() returns new Matrix which shares pixels with cached bitmap, so callers can change position of it.
+    please do not change pixels of it. if you need to change them, copy it to another Matrix by Matrix.copy().
+    """
+
+    def __init__(self, max_bytes=BITMAP_CACHE_BYTES):
+        self._bitmaps = OrderedDict()
+        self._lock = Lock()
+        self._maxBytes = max_bytes
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def load(self, path) -> Matrix:
+        """
+        Return Matrix of image file or bundle reference. decode only when the file is not cached or changed.
+        """
+        bundle = None
+        if is_bundle_ref(path):
+            # same reference is another bitmap when the bundle is registered again
+            bundle, name = resolve_ref(path)
+            key = (path, bundle)
+        else:
+            st = os.stat(path)
+            key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            m = self._bitmaps.get(key)
+            if m is not None:
+                self._bitmaps.move_to_end(key)
+                self._hits += 1
+                return self._view(m)
+
+            self._misses += 1
+
+        m = decode_image(path) if bundle is None else bundle.getMatrix(name)
+        size = self._sizeOf(m)
+        with self._lock:
+            if (size <= self._maxBytes) and (key not in self._bitmaps):
+                self._bitmaps[key] = m
+                self._bytes += size
+                self._evict()
+
+        return self._view(m)
+
+    def setMaxBytes(self, max_bytes):
+        """
+        change memory limit of cache
+        """
+        with self._lock:
+            self._maxBytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._bitmaps.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def cacheInfo(self) -> BitmapCacheInfo:
+        with self._lock:
+            return BitmapCacheInfo(self._hits, self._misses, len(self._bitmaps), self._maxBytes, self._bytes)
+
+    def _evict(self):
+        while self._bytes > self._maxBytes and len(self._bitmaps) > 0:
+            _, m = self._bitmaps.popitem(last=False)
+            self._bytes -= self._sizeOf(m)
+
+    def _sizeOf(self, m):
+        return m.width * m.height * m.matrix.itemsize
+
+    def _view(self, m):
+        # pixels are shared, position is not
+        return Matrix.fromarray(m.asarray(), copy=False)
+
+
+bitmap_cache = BitmapCache()
+
 
 class Image(AbsParts):
     """
@@ -29,6 +156,11 @@ class Image(AbsParts):
     Notes
     -----
     This view depends on PIL(Python Imaging Library).
+    decoded images are kept in process-wide bitmap cache(bitmap_cache), 
+    so setImage() with same file does not decode the file again until the file is changed.
+
+    img also accepts reference of bitmap in asset bundle('bundle://[bundle name]/[bitmap name]').
+    bitmaps in bundle are loaded from memory-mapped file without PIL. please see asset_bundle.py.
 
 
     Examples
@@ -89,6 +221,7 @@ class Image(AbsParts):
         if img is None:
             self._src = None
             self._imgData = Matrix(1, 1)
+            self.invalidate()
             return
 
         self._src = img
@@ -101,6 +234,7 @@ class Image(AbsParts):
             return
 
         self._imgData = imgData
+        self.invalidate()
 
     def setPos(self, x, y):
         self.setSize(x, y, self.width, self.height)
@@ -117,29 +251,10 @@ class Image(AbsParts):
         if self._src is None:
             return
 
-        # load target file
-        im = ImgLib.open(self._src)
-        data = im.load()
-
-        # copy image data to matrix
-        self._imgData = Matrix(im.width, im.height)
-        imgData = self._imgData
-        for y in range(im.height):
-            for x in range(im.width):
-                color = data[x,y]
-                if type(color) is int:
-                    if color == 1:
-                        imgData.matrix[y][x] = 1
-                else:
-                    if len(color) == 4:
-                        if color[0] == 0 and color[1] == 0 and color[2] == 0 and color[3] == 255:
-                            imgData.matrix[y][x] = 1
-                    else:
-                        if color[0] == 0 and color[1] == 0 and color[2] == 0:
-                            imgData.matrix[y][x] = 1
-
-        self.width = im.width
-        self.height = im.height
+        # load target file or bitmap in asset bundle through bitmap cache
+        self._imgData = bitmap_cache.load(self._src)
+        self.width = self._imgData.width
+        self.height = self._imgData.height
 
     @property
     def offset_y(self):
@@ -148,6 +263,7 @@ class Image(AbsParts):
     @offset_y.setter
     def offset_y(self, offset):
         self._offset_y = offset
+        self.invalidate()
 
     @property
     def offset_x(self):
@@ -155,4 +271,5 @@ class Image(AbsParts):
 
     @offset_x.setter
     def offset_x(self, offset):
-        self._offset_x = offset
\ No newline at end of file
+        self._offset_x = offset
+        self.invalidate()
\ No newline at end of file
@@ -3,9 +3,11 @@
 # -*- coding: utf-8 -*-
 
 import sys
-import asyncio
-from evdev import InputDevice, categorize, ecodes, list_devices, KeyEvent, util, AbsInfo
 
+try:
+    from frame_clock import FrameClock
+except ImportError:
+    from . import FrameClock
 
 EV_SYN = 0x00   # event type sync
 SYN_REPORT = 0  # event code sync report
@@ -25,6 +27,15 @@ ABS_PRESSURE = 24 # event code Pressure
 EV_MSC = 0x04 # event type MSC
 MSC_SERIAL = 0 # event code MSC_SERIAL
 
+# move coalescing policy of InputHandler
+COALESCE_NONE = 0   # every move is delivered
+COALESCE_BATCH = 1  # moves read from device at once are merged to the latest
+COALESCE_FRAME = 2  # moves are merged and delivered at most once per move_interval
+MOVE_INTERVAL = 1 / 30 # sec
+
+# struct format of linux input_event(sec, usec, type, code, value) on 64 bit, e.g. read from /dev/input/event0
+EVENT_FORMAT = 'llHHi'
+
 ####
 # Keys and buttons defination from Linux Kernel (input-event-codes.h)
 ####
@@ -609,8 +620,14 @@ class MotionEvent(object):
 
     org_y : int
         y-asis originally sense value
+
+    history : list of (timestamp, x, y)
+        positions of moves merged into this move event by InputHandler, oldest first.
+        current position is not included.
     """
 
+    __slots__ = ('_dev_name', '_timestamp', '_action', '_x', '_y', '_org_x', '_org_y', 'history')
+
     def __init__(self):
         self._dev_name = ''
         self._timestamp = 0
@@ -619,6 +636,7 @@ class MotionEvent(object):
         self._y = 0
         self._org_x = 0
         self._org_y = 0
+        self.history = []
 
     def __str__(self):
         msg = '--- MotionEvent at {:f}, device : {:s}, action {:d}, x {:d}, y {:d} ---'
@@ -632,6 +650,7 @@ class MotionEvent(object):
         self._y = e.y
         self._org_x = e.org_x
         self._org_y = e.org_y
+        self.history = list(e.history)
         
 
     @property
@@ -702,6 +721,8 @@ class InputEvent(MotionEvent):
         input event code
     """
 
+    __slots__ = ('_code', '_id', '_press')
+
     def __init__(self):
         super().__init__()
         self._code = 0
@@ -709,6 +730,8 @@ class InputEvent(MotionEvent):
         self._press = -1
 
     def __str__(self):
+        from evdev import util
+
         if self.code == BTN_TOUCH:
             msg = '--- InputEvent at {:f}, code {}, device : {}, device serial : {}, action {:d}, x {:f}, y {:f}, press {} ---'
             return msg.format(self.timestamp, util.resolve_ecodes_dict({1:[self.code]}).__next__()[1], self.dev_name, self.id, self.action, self.x, self.y, self.press)
@@ -725,6 +748,9 @@ class InputEvent(MotionEvent):
         self._action = e.action
         self._x = e.x
         self._y = e.y
+        self._org_x = e.org_x
+        self._org_y = e.org_y
+        self.history = list(e.history)
         
     @property
     def id(self):
@@ -768,6 +794,292 @@ class InputEventListener(object):
         raise NotImplementedError
 
 
+class EventCoalescer(object):
+    """
+    EventCoalescer merges consecutive move events before they are delivered.
+
+    merged move keeps positions of older moves in MotionEvent.history, so velocity can be computed from all samples.
+    down and up events are delivered without delay, after the pending move.
+    events are owned by EventCoalescer after push(), so please push a copy of reused event.
+
+    Examples
+    --------
+    coalescer = EventCoalescer(listener.onInputEvent, COALESCE_FRAME, loop=loop)
+    for e in events_read_at_once:
+        coalescer.push(e)
+    coalescer.endBatch()
+    """
+
+    def __init__(self, callback, policy=COALESCE_FRAME, move_interval=MOVE_INTERVAL, loop=None):
+        """
+        Parameters
+        ------------
+        callback : callable
+            callback(e) called with delivered event
+        policy : int
+            COALESCE_NONE, COALESCE_BATCH or COALESCE_FRAME
+        move_interval : float
+            minimum time between delivered moves of COALESCE_FRAME(seconds)
+        loop : asyncio.AbstractEventLoop
+            loop to deliver delayed move of COALESCE_FRAME
+        """
+        self._callback = callback
+        self.policy = policy
+        self.move_interval = move_interval
+        self.loop = loop
+        self._pending = None
+        self._handle = None
+        self._lastMoveTime = None
+
+        self.received = 0
+        self.delivered = 0
+
+    def push(self, e: MotionEvent):
+        """
+        add event read from device
+        """
+        self.received += 1
+        # key repeat is not merged
+        isMove = (e.action == VALUE_MOVE) and (getattr(e, 'code', BTN_TOUCH) in (BTN_TOUCH, BTN_DIGI))
+        if (self.policy == COALESCE_NONE) or (isMove is False):
+            self.flush()
+            self._deliver(e)
+            return
+
+        pending = self._pending
+        if (pending is not None) and (pending.dev_name == e.dev_name) and (getattr(pending, 'code', None) == getattr(e, 'code', None)):
+            # keep older positions for velocity
+            history = pending.history
+            history.append((pending.timestamp, pending.x, pending.y))
+            e.history = history
+        else:
+            self.flush()
+        self._pending = e
+
+    def endBatch(self):
+        """
+        all events available now were pushed. merged move is delivered, or scheduled by COALESCE_FRAME.
+        """
+        if self._pending is None:
+            return
+
+        if self.policy != COALESCE_FRAME:
+            self.flush()
+            return
+
+        if self._handle is not None:
+            return
+
+        wait = 0 if self._lastMoveTime is None else (self._lastMoveTime + self.move_interval) - self.loop.time()
+        if wait <= 0:
+            self.flush()
+        else:
+            self._handle = self.loop.call_later(wait, self.flush)
+
+    def flush(self):
+        """
+        deliver pending move now
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = None
+
+        e = self._pending
+        if e is None:
+            return
+        self._pending = None
+        if self.loop is not None:
+            self._lastMoveTime = self.loop.time()
+        self._deliver(e)
+
+    def _deliver(self, e):
+        self.delivered += 1
+        self._callback(e)
+
+
+class Calibration(object):
+    """
+    Calibration maps raw touch panel position to display position.
+
+    scale and offset of each axis are computed once from the axis range of the device,
+    so decoding an axis event is one multiply and add, and clamp to the display.
+
+    Examples
+    --------
+    # touch panel mounted upside down
+    InputHandler(listener, calibration={'rotation': 180})
+    """
+
+    __slots__ = ('width', 'height', 'rotation', 'axes')
+
+    def __init__(self, x_min, x_max, y_min, y_max, width=200, height=32, rotation=0, offset_x=0, offset_y=0):
+        """
+        Parameters
+        ------------
+        x_min, x_max, y_min, y_max : int
+            raw value range of ABS_X and ABS_Y
+        width, height : int
+            display size
+        rotation : int
+            rotation of touch panel to display(0, 90, 180 or 270 degrees clockwise)
+        offset_x, offset_y : int
+            offset added to display position(pixels)
+        """
+        if rotation not in (0, 90, 180, 270):
+            raise ValueError('rotation must be 0, 90, 180 or 270')
+
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+
+        # display axis(0 : x, 1 : y) and direction of raw ABS_X and ABS_Y
+        if rotation == 0:
+            mapping = ((0, False), (1, False))
+        elif rotation == 90:
+            mapping = ((1, True), (0, False))
+        elif rotation == 180:
+            mapping = ((0, True), (1, True))
+        else:
+            mapping = ((1, False), (0, True))
+
+        # raw code : (display axis, scale, offset, max position)
+        self.axes = {}
+        for code, (lo, hi), (axis, invert) in ((ABS_X, (x_min, x_max), mapping[0]), (ABS_Y, (y_min, y_max), mapping[1])):
+            size = width if axis == 0 else height
+            scale = size / max(1, hi - lo)
+            offset = (offset_x, offset_y)[axis]
+            if invert is True:
+                self.axes[code] = (axis, -scale, (hi * scale) + offset, size - 1)
+            else:
+                self.axes[code] = (axis, scale, offset - (lo * scale), size - 1)
+
+    @classmethod
+    def fromAbsInfo(cls, abs_x, abs_y, **kwargs):
+        """
+        create calibration from evdev AbsInfo of ABS_X and ABS_Y
+        """
+        return cls(abs_x.min, abs_x.max, abs_y.min, abs_y.max, **kwargs)
+
+    def map(self, code, value):
+        """
+        display position of raw value of ABS_X or ABS_Y
+
+        Returns
+        --------
+        (int, int) : display axis(0 : x, 1 : y) and position
+        """
+        axis, scale, offset, top = self.axes[code]
+        pos = int((value * scale) + offset)
+        return axis, (0 if pos < 0 else top if pos > top else pos)
+
+
+class EventDecoder(object):
+    """
+    EventDecoder builds InputEvent from raw evdev events of a device.
+
+    state of the current frame is kept in plain slots, and InputEvent is created only at EV_SYN.
+    raw events are passed as numbers, so it can decode evdev events and recorded streams
+    (struct 'llHHi' of linux input_event) in the same way.
+
+    Examples
+    --------
+    decoder = EventDecoder('touch panel', calibration)
+    for sec, usec, etype, code, value in struct.iter_unpack(EVENT_FORMAT, data):
+        e = decoder.feed(sec, usec, etype, code, value)
+        if e is not None:
+            listener.onInputEvent(e)
+    """
+
+    __slots__ = ('dev_name', '_calibration', '_axes', '_pos', '_org', '_press', '_id', '_action', '_code', '_changeKey')
+
+    def __init__(self, dev_name='', calibration:Calibration=None):
+        """
+        Parameters
+        ------------
+        dev_name : str
+            device name set to events
+        calibration : Calibration
+            if None, raw position is used as display position
+        """
+        self.dev_name = dev_name
+        self.calibration = calibration
+        self._pos = [0, 0]
+        self._org = [0, 0]
+        self._press = -1
+        self._id = 0
+        self._action = VALUE_UP
+        self._code = 0
+        self._changeKey = False
+
+    @property
+    def calibration(self):
+        return self._calibration
+
+    @calibration.setter
+    def calibration(self, calibration):
+        self._calibration = calibration
+        self._axes = None if calibration is None else calibration.axes
+
+    def feed(self, sec, usec, etype, code, value):
+        """
+        decode one raw event
+
+        Returns
+        --------
+        InputEvent : event of the frame at EV_SYN. None for other events.
+        """
+        if etype == EV_ABS:
+            if (code == ABS_X) or (code == ABS_Y):
+                if self._axes is None:
+                    self._pos[code] = value
+                else:
+                    # same as Calibration.map()
+                    axis, scale, offset, top = self._axes[code]
+                    pos = int((value * scale) + offset)
+                    self._pos[axis] = 0 if pos < 0 else top if pos > top else pos
+                self._org[code] = value
+            elif code == ABS_PRESSURE:
+                self._press = value
+
+        elif etype == EV_SYN:
+            # digital pen hover event
+            if self._press == -1:
+                return None
+
+            # last data sing for multi part touch events.
+            if self._changeKey is False:
+                self._action = VALUE_MOVE
+            self._changeKey = False
+
+            e = InputEvent()
+            e._dev_name = self.dev_name
+            e._timestamp = sec + (usec / 1000000)
+            e._action = self._action
+            e._x = self._pos[0]
+            e._y = self._pos[1]
+            e._org_x = self._org[0]
+            e._org_y = self._org[1]
+            e._code = self._code
+            e._id = self._id
+            e._press = self._press
+
+            if self._action == VALUE_UP:
+                self._press = -1
+            return e
+
+        elif etype == EV_KEY:
+            self._action = value
+            if value == VALUE_DOWN:
+                self._press = 0
+            self._code = code
+            self._changeKey = True
+
+        elif (etype == EV_MSC) and (code == MSC_SERIAL):
+            self._id = value
+
+        return None
+
+
 class InputHandler(object):
     """
     InputHandler is handling input event(touch, keys, buttons).
@@ -810,7 +1122,7 @@ class InputHandler(object):
     InputEvent
     """
 
-    def __init__(self, listener:InputEventListener):
+    def __init__(self, listener:InputEventListener, coalesce=COALESCE_FRAME, move_interval=MOVE_INTERVAL, calibration=None):
         """
         Parameters
         ------------
@@ -819,90 +1131,89 @@ class InputHandler(object):
 
         target_device : str
             touch device name(DO NOT NEED CHANGE)
+
+        coalesce : int
+            how to merge touch moves before they are passed to listener.
+            COALESCE_NONE, COALESCE_BATCH or COALESCE_FRAME. see EventCoalescer.
+
+        move_interval : float
+            minimum time between moves passed to listener with COALESCE_FRAME(seconds)
+
+        calibration : dict
+            keyword arguments of Calibration for touch devices(e.g. {'rotation': 180})
         """
-        self.inputEvent = None
         self.inputEventListener = listener
+        self.coalescer = EventCoalescer(self.handleInputEvent, coalesce, move_interval)
+
+        # device path : EventDecoder
+        self.decoders = {}
 
-        self._devices = {}
+        # evdev is imported here, so events and views can be used without input devices
+        from evdev import InputDevice, list_devices
 
         # get all input devices
         self.devices = [InputDevice(path) for path in list_devices()]
         for device in self.devices:
             print(device.name)
-            caps = device.capabilities(absinfo=True)
-            for k, v in caps.items():
-                if k != 3:
-                    continue
-
-                # store AbsInfo
-                try:
-                    print(v[ABS_X][1])
-                    print(v[ABS_Y][1])
-                    absInfo = {}
-                    absInfo[ABS_X] = v[ABS_X][1]
-                    absInfo[ABS_Y] = v[ABS_Y][1]
-                    self._devices[device.path] = absInfo
-                except Exception as e:
-                    print(e)
+
+            # calibration is computed once per device from AbsInfo
+            cal = None
+            absInfo = dict(device.capabilities(absinfo=True).get(EV_ABS, []))
+            if (ABS_X in absInfo) and (ABS_Y in absInfo):
+                cal = Calibration.fromAbsInfo(absInfo[ABS_X], absInfo[ABS_Y], **(calibration or {}))
+                print(absInfo[ABS_X].max)
+                print(absInfo[ABS_Y].max)
+
+            self.decoders[device.path] = EventDecoder(device.name, cal)
 
     
+    def start(self, loop=None):
+        """
+        start reading input devices on asyncio event loop. events are handled on the loop.
+        the shared FrameClock runs on the loop too, so timers of gestures and animations
+        are called on the same thread as input events.
+
+        Returns
+        --------
+        list of asyncio.Task : reading task of each device
+        """
+        import asyncio
+
+        self.loop = asyncio.get_event_loop() if loop is None else loop
+        self.coalescer.loop = self.loop
+
+        clock = FrameClock.get_instance()
+        if clock.loop is None:
+            clock.attach(self.loop)
+
+        self._tasks = [self.loop.create_task(self.eventLoop(device)) for device in self.devices]
+        return self._tasks
+
+    def stop(self):
+        """
+        stop reading input devices
+        """
+        for task in getattr(self, '_tasks', []):
+            task.cancel()
+        self._tasks = []
+        self.coalescer.flush()
+
     def startEventLoop(self):
-        self.loop = asyncio.get_event_loop()
-        for device in self.devices:
-            asyncio.ensure_future(self.eventLoop(device))
+        self.start()
         self.loop.run_forever()
 
     async def eventLoop(self, device):
-        changeKey = False
-        async for ev in device.async_read_loop():
-            # print(ev)
-
-            # handle input event
-            if self.inputEvent == None:
-                self.inputEvent = InputEvent()
-
-            if ev.type == EV_SYN:
-                # digital pen hover event
-                if (self.inputEvent.press == -1):
-                    # print('--hover--')
-                    continue
-
-                # last data sing for multi part touch events.
-                if changeKey == False:
-                    self.inputEvent.action = VALUE_MOVE
-
-                self.inputEvent.dev_name = device.name
-                self.inputEvent.timestamp = ev.timestamp()
-
-                self.handleInputEvent(self.inputEvent)
-
-                if self.inputEvent.action == VALUE_UP:
-                    self.inputEvent.press = -1
-
-                changeKey = False
-                
-            if (ev.type == EV_ABS and ev.code == ABS_X):
-                factor_x = self._devices[device.path][ABS_X].max / 200
-                self.inputEvent.x = int(ev.value // factor_x)
-                self.inputEvent.org_x = int(ev.value)
-
-            if (ev.type == EV_ABS and ev.code == ABS_Y):
-                factor_y = self._devices[device.path][ABS_Y].max / 32
-                self.inputEvent.y = int(ev.value // factor_y)
-                self.inputEvent.org_y = int(ev.value)
-
-            if (ev.type == EV_ABS and ev.code == ABS_PRESSURE):
-                self.inputEvent.press = ev.value
-
-            if (ev.type == EV_MSC and ev.code == MSC_SERIAL):
-                self.inputEvent.id = ev.value
-
-            if (ev.type == EV_KEY):
-                self.inputEvent.action = ev.value
-                if (ev.value == VALUE_DOWN):
-                    self.inputEvent.press = 0
-                self.inputEvent.code = ev.code
-                changeKey = True
+        decoder = self.decoders[device.path]
+        feed = decoder.feed
+        push = self.coalescer.push
+        while True:
+            # all events available now are read at once, and moves in them are merged
+            events = await device.async_read()
+            for ev in events:
+                e = feed(ev.sec, ev.usec, ev.type, ev.code, ev.value)
+                if e is not None:
+                    push(e)
+            self.coalescer.endBatch()
 
     def handleInputEvent(self, e:InputEvent):
         self.inputEventListener.onInputEvent(e)
@@ -11,9 +11,6 @@ try:
 except ImportError:
     from . import Text, Widget, Image, MotionEvent, VALUE_DOWN, VALUE_MOVE, VALUE_UP
 
-import os
-dir = os.path.dirname(os.path.abspath(__file__))
-
 
 class KeyboardListener(object):
     """
@@ -137,9 +134,9 @@ class Keyboard(Widget):
         self.addParts(btnDown)
         self._btnDown = btnDown
 
-        self._key_numeric_path = os.path.normpath(os.path.join(dir, './assets/keyboard_numeric.png'))
-        self._key_alpha_lower_path = os.path.normpath(os.path.join(dir, './assets/keyboard_alpha_lower.png'))
-        self._key_alpha_upper_path = os.path.normpath(os.path.join(dir, './assets/keyboard_alpha_upper.png'))
+        self._key_numeric_path = 'bundle://mui_ui/keyboard_numeric'
+        self._key_alpha_lower_path = 'bundle://mui_ui/keyboard_alpha_lower'
+        self._key_alpha_upper_path = 'bundle://mui_ui/keyboard_alpha_upper'
         keytop = Image(self._key_numeric_path)
         keytop.setSize(36, 0, 88, 20)
         self.addParts(keytop)
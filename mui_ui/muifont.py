@@ -2,26 +2,40 @@
 
 # mui font class
 
-from PIL import Image
 import csv
+from collections import OrderedDict, namedtuple
+from threading import Lock
 
 import os
 name = os.path.dirname(os.path.abspath(__file__))
 
 pJ = os.path.join(name, './assets/mui_gothic_01.png')
 fontFile = os.path.normpath(pJ)
-print(fontFile)
 
 pJ = os.path.join(name, './assets/sjis_unicode_convert_table.csv')
 fontInfoFile = os.path.normpath(pJ)
-print(fontInfoFile)
+
+pJ = os.path.join(name, './assets/mui_gothic_01.atlas')
+fontAtlasFile = os.path.normpath(pJ)
 
 try:
-    from display import Display
     from matrix import Matrix
+    from font_atlas import FontAtlas
 except ImportError:
-    from . import Display
     from . import Matrix
+    from . import FontAtlas
+
+# default number of glyphs in glyph cache
+GLYPH_CACHE_SIZE = 1024
+
+Glyph = namedtuple('Glyph', ['code', 'width', 'height', 'bitmap'])
+Glyph.__doc__ = """
+prebuilt glyph of mui font. bitmap is shared by all users of the glyph, so please do not modify it.
+Matrix has no read-only mode(blit needs a writable int buffer), 
+so please use MuiFont.getText() when you need a Matrix of the character which can be changed.
+"""
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
 
 
 class MuiFont:
@@ -33,6 +47,13 @@ class MuiFont:
     Notes
     -----
     mui font supports ASCII and Japanese(第二水準の漢字まで), at this moment. 
+
+    decoded glyphs are kept in LRU cache keyed by code point. 
+    the cache is thread safe and size of cache can be changed by setCacheSize().
+
+    glyphs are read from memory-mapped font atlas(assets/mui_gothic_01.atlas). 
+    only when the atlas is missing, font image and font information file are loaded.
+    please see font_atlas.py for build the atlas.
     """
 
     _instance = None
@@ -45,7 +66,31 @@ class MuiFont:
         return cls._instance
 
 
-    def __init__(self):
+    def __init__(self, cache_size=GLYPH_CACHE_SIZE):
+        # glyph cache
+        self._glyphs = OrderedDict()
+        self._cacheLock = Lock()
+        self._cacheSize = cache_size
+        self._hits = 0
+        self._misses = 0
+
+        self._atlas = None
+        self.fontData = None
+        self.fontMap = {}
+
+        # load font atlas
+        if os.path.exists(fontAtlasFile):
+            try:
+                self._atlas = FontAtlas(fontAtlasFile)
+            except (OSError, ValueError) as e:
+                print(e)
+
+        if self._atlas is None:
+            self._loadFontImage()
+
+    def _loadFontImage(self):
+        from PIL import Image
+
         # load font data file
         im = Image.open(fontFile)
         self.fontData = im.load()
@@ -68,28 +113,99 @@ class MuiFont:
         f.close
 
     def getText(self, s):
-        # print("getText : " + s)
+        """
+        Return new Matrix of character s
+        """
+        glyph = self.getGlyph(s)
+        mt = Matrix(glyph.width, glyph.height)
+        mt.matrix[:,:] = glyph.bitmap.matrix
+        return mt
 
-        if s == " ":
-            return Matrix(2, 8)
+    def getGlyph(self, s) -> Glyph:
+        """
+        Return cached Glyph of character s
+        """
+        code = ord(s)
+        with self._cacheLock:
+            glyph = self._glyphs.get(code)
+            if glyph is not None:
+                self._glyphs.move_to_end(code)
+                self._hits += 1
+                return glyph
+
+            self._misses += 1
+
+        glyph = self._createGlyph(code)
+
+        with self._cacheLock:
+            self._glyphs[code] = glyph
+            self._evict(self._cacheSize)
+
+        return glyph
+
+    def setCacheSize(self, size):
+        """
+        change max number of glyphs in cache
+        """
+        with self._cacheLock:
+            self._cacheSize = size
+            self._evict(size)
+
+    def clearCache(self):
+        with self._cacheLock:
+            self._glyphs.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def cacheInfo(self) -> CacheInfo:
+        """
+        Return hits, misses, max size and current size of glyph cache
+        """
+        with self._cacheLock:
+            return CacheInfo(self._hits, self._misses, self._cacheSize, len(self._glyphs))
+
+    def _evict(self, size):
+        glyphs = self._glyphs
+        while len(glyphs) > max(size, 0):
+            glyphs.popitem(last=False)
+
+    def _createGlyph(self, code):
+        if code == 0x0020: # space
+            return Glyph(code, 2, 8, Matrix(2, 8))
+
+        fontCode = code
+        if code == 0xFF01: # full width exclamation
+            fontCode = 0x0021
+
+        if self._atlas is not None:
+            mt = self._readAtlasData(fontCode)
+        else:
+            fi = self._getFontPos('{:04X}'.format(fontCode))
+            mt = self._readFontData(fi) if fi is not None else None
+
+        if mt is None:
+            print("missing font pos")
+            return Glyph(code, 8, 8, Matrix(8, 8))
 
-        if s == "！":
-            s = "!"
+        return Glyph(code, mt.width, mt.height, mt)
 
-        mt = Matrix(8, 8)
+    def _readAtlasData(self, code):
+        data = self._atlas.getGlyph(code)
+        if data is None:
+            return None
 
-        b = s.encode(encoding='utf-16')
-        hexStr = b.hex()[4:8]
-        hexStr = hexStr[2:4] + hexStr[0:2]
-        hexStr = hexStr.upper()
-        # print(hexStr)
+        fW, fH, rows = data
+        mt = Matrix(fW, fH)
+        matrix = mt.matrix
 
-        fi = self._getFontPos(hexStr)
-        if fi is None:
-            print("missing font pos")
-            return mt
+        for y in range(min(fH, 8)):
+            row = rows[y]
+            if row == 0:
+                continue
+            for x in range(min(fW, 8)):
+                if row & (0x80 >> x):
+                    matrix[y][x] = 1
 
-        mt = self._readFontData(fi)
         return mt
 
     def _getFontPos(self, str):
@@ -173,6 +289,8 @@ class FontPos:
 
 # for test
 if __name__ == '__main__':
+    from mui_ui import Display
+
     font = MuiFont.get_instance() # mui font
     d = Display()    # mui display
 
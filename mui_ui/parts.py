@@ -3,7 +3,6 @@
 # mui ui layout parts abstract class
 
 from abc import ABCMeta, abstractmethod
-from evdev import ecodes
 
 try:
     from input import MotionEvent
@@ -75,12 +74,18 @@ class AbsParts(metaclass=ABCMeta):
     height : int
         height of view.
 
+    Notes
+    -----
+    views are composed by retained mode Compositor, so please call invalidate() 
+    when your custom view changes drawing content without changing position, size or visibility.
+
     """
 
     def __init__(self, name=None):
         self._name = name
         self._visible = True
         self._isChange = True
+        self._version = 0
         self._x = 0
         self._y = 0
         self._width = 0
@@ -103,7 +108,14 @@ class AbsParts(metaclass=ABCMeta):
         self._y = y
         self._width = width
         self._height = height
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        mark this view as changed. Compositor draw this view again at next compose.
+        """
         self._isChange = True
+        self._version += 1
 
     def dispatchTouchEvent(self, e):
         #print('-- dispatchTouchEvent() --')
@@ -128,6 +140,7 @@ class AbsParts(metaclass=ABCMeta):
         return ((x >= l) and (x <= r) and (y >= t) and (y <= b))
 
     def updateRequest(self):
+        self.invalidate()
         if self.OnUpdateRequestListener is not None:
             self.OnUpdateRequestListener.onUpdateView(self)
 
@@ -145,6 +158,8 @@ class AbsParts(metaclass=ABCMeta):
 
     @visible.setter
     def visible(self, visible):
+        if self._visible != visible:
+            self.invalidate()
         self._visible = visible
 
     @property
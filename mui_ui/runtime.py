@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+
+# mui asyncio application runtime class
+#
+# Runtime runs whole mui application on one asyncio event loop.
+# touch input(evdev), display I/O(AsyncDisplay), FrameClock ticks(animations, dismiss and long press timers)
+# and application lifecycle are handled on the loop, so UI is never touched from other threads.
+#
+#   class HomeApp(AbsApp):
+#       async def onStart(self):
+#           self.getView('weather').setText(await fetch_weather())
+#           self.updateRequest(0)
+#       ...
+#
+#   runtime = Runtime()
+#   runtime.run(lambda listener: HomeApp(listener))
+
+import asyncio
+
+try:
+    from application import AbsApp, AppEventListener
+    from input import InputEventListener, InputHandler, MotionEvent, VALUE_DOWN, COALESCE_FRAME
+    from gesturedetector import GestureDetector, GestureListener
+    from display_manager import DisplayManager, DisplayEventListener
+    from display import AsyncDisplay
+    from frame_clock import FrameClock
+except ImportError:
+    from . import AbsApp, AppEventListener, InputEventListener, InputHandler, MotionEvent, VALUE_DOWN, COALESCE_FRAME
+    from . import GestureDetector, GestureListener, DisplayManager, DisplayEventListener, AsyncDisplay, FrameClock
+
+# default max frame rate of display update
+MAX_FPS = 30
+# default brightness level of dimmed display
+DIM_DUTY = 20
+
+
+class Runtime(InputEventListener, GestureListener, AppEventListener, DisplayEventListener):
+    """
+    Runtime is asyncio based main class of mui application.
+
+    it connects to display and touch panel, controls application transition,
+    turns off display after time_to_dismiss seconds from last touch,
+    and writes UI of current application to display.
+
+    UI update requests are merged and written at most max_fps times per second.
+    while a frame is waiting display ACK, only latest UI is kept and written after the ACK.
+
+    application lifecycle is coroutine based. Runtime awaits AbsApp.onStart() and AbsApp.onStop()
+    when application is changed.
+
+    Examples
+    ---------
+    runtime = Runtime()
+
+    # create base application and run until stop() or KeyboardInterrupt
+    runtime.run(HomeApp)
+
+    # in your coroutine
+    await runtime.start(HomeApp(runtime))
+    ...
+    await runtime.stop()
+
+    See Also
+    --------
+    AsyncDisplay
+    FrameClock
+    AbsApp
+    """
+
+    def __init__(self, device_name='/dev/ttyS0', port=None, input=True, time_to_dismiss=15, longpress_timeout=2,
+                 max_fps=MAX_FPS, duty=100, time_to_dim=None, dim_duty=DIM_DUTY, coalesce=COALESCE_FRAME,
+                 calibration=None):
+        """
+        Parameters
+        ------------
+        device_name : str
+            UART device connected to display
+        port : serial-like object
+            transport to display(e.g. EmulatedSerial). if set, device_name is ignored.
+        input : bool
+            read touch panel and buttons by evdev
+        time_to_dismiss : float
+            time to turn off display from last touch(seconds)
+        longpress_timeout : float
+            time to fire long press event(seconds)
+        max_fps : int
+            max frame rate of display update
+        duty : int
+            display brightness level(1 - 100)
+        time_to_dim : float
+            time to dim display from last touch(seconds). if None, display is not dimmed.
+        dim_duty : int
+            brightness level of dimmed display
+        coalesce : int
+            how to merge touch moves(COALESCE_NONE, COALESCE_BATCH or COALESCE_FRAME).
+            with COALESCE_FRAME, moves are passed to application at most max_fps times per second.
+        calibration : dict
+            keyword arguments of Calibration for touch panel(e.g. {'rotation': 180})
+        """
+        self.loop = None
+        self.display = None
+        self.input = None
+        self.app = None
+        self._baseApp = None
+
+        self._deviceName = device_name
+        self._port = port
+        self._useInput = input
+        self._coalesce = coalesce
+        self._calibration = calibration
+        self._duty = duty
+        self._dimDuty = dim_duty
+        self._interval = 1 / max_fps
+
+        self.gesture_detector = GestureDetector(listener=self, longpress_timeout=longpress_timeout)
+        self.display_manager = DisplayManager(self, time_to_dismiss=time_to_dismiss, time_to_dim=time_to_dim)
+
+        self._dirty = False
+        self._fade = 0
+        self._frameHandle = None
+        self._writing = False
+        self._lastFrameTime = 0
+        self._tasks = set()
+        self._stopped = None
+
+        self.frameCount = 0
+
+    async def start(self, app: AbsApp, fade=3):
+        """
+        connect to display and touch panel, and start base application.
+        please call in coroutine.
+
+        Parameters
+        ------------
+        app : AbsApp
+            base application. it is shown again when other application closed.
+        fade : int
+            fade-in effect level of first frame(0 - 4)
+        """
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+
+        # animations and timers run on the loop
+        FrameClock.get_instance().attach(self.loop)
+
+        self.display = AsyncDisplay(self._deviceName, port=self._port, loop=self.loop)
+        self.display.setDuty(self._duty)
+        await self.display.clearDisplay()
+        await self.display.turnOn(0)
+
+        if self._useInput is True:
+            self.input = InputHandler(self, coalesce=self._coalesce, move_interval=self._interval,
+                                      calibration=self._calibration)
+            self.input.start(self.loop)
+
+        self.app = self._baseApp = app
+        self.display_manager.startDismissTimer()
+        self.updateUI(fade)
+        await app.onStart()
+
+    async def stop(self):
+        """
+        stop current application, wait display responses, and disconnect from display and touch panel.
+        """
+        if self.input is not None:
+            self.input.stop()
+        self.input = None
+
+        if self.app is not None:
+            await self.app.onStop()
+
+        if self._frameHandle is not None:
+            self._frameHandle.cancel()
+        self._frameHandle = None
+
+        for task in list(self._tasks):
+            task.cancel()
+
+        clock = FrameClock.get_instance()
+        clock.stop()
+        clock.detach()
+
+        if self.display is not None:
+            await self.display.flush(1)
+            self.display.close()
+
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def serve(self, app_factory):
+        """
+        coroutine to start application created by app_factory(runtime) and run until stop().
+        """
+        await self.start(app_factory(self))
+        await self._stopped.wait()
+
+    def run(self, app_factory):
+        """
+        run application created by app_factory(runtime) on new event loop until stop() or KeyboardInterrupt.
+        """
+        try:
+            asyncio.run(self.serve(app_factory))
+        except KeyboardInterrupt:
+            pass
+
+    def createTask(self, coro) -> asyncio.Task:
+        """
+        run coroutine on the loop. exception of the coroutine is printed.
+        """
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._onTaskDone)
+        return task
+
+    def _onTaskDone(self, task):
+        self._tasks.discard(task)
+        if (task.cancelled() is False) and (task.exception() is not None):
+            print('runtime task failed.', repr(task.exception()))
+
+    def updateUI(self, fade=0, turn_on=False, turn_off=False):
+        """
+        request display update. safe to call from other threads.
+
+        Parameters
+        ------------
+        fade : int
+            fade out/in effect level(0 - 4 : 0 is do not fade)
+        turn_on : bool
+            turn on display
+        turn_off : bool
+            turn off display
+        """
+        if self.loop is None:
+            return
+
+        # packets are sent in order, so turn on/off is written after frames requested before
+        if turn_on is True:
+            self.loop.call_soon_threadsafe(self.display.turnOn, fade)
+
+        elif turn_off is True:
+            self.loop.call_soon_threadsafe(self.display.turnOff, fade)
+
+        else:
+            self.loop.call_soon_threadsafe(self._requestFrame, fade)
+
+    def _requestFrame(self, fade):
+        self._dirty = True
+        self._fade = max(self._fade, fade)
+        self._scheduleFrame()
+
+    def _scheduleFrame(self):
+        if (self._frameHandle is not None) or (self._writing is True) or (self._dirty is False):
+            return
+
+        delay = max(0, (self._lastFrameTime + self._interval) - self.loop.time())
+        self._frameHandle = self.loop.call_later(delay, self._writeFrame)
+
+    def _writeFrame(self):
+        self._frameHandle = None
+        if (self._dirty is False) or (self.app is None):
+            return
+
+        fade = self._fade
+        self._dirty = False
+        self._fade = 0
+        self._lastFrameTime = self.loop.time()
+
+        display = self.display
+        if fade > 0:
+            display.turnOff(fade)
+
+        display.setLayout(self.app.getUI())
+        display.updateLayout()
+        ack = display.refreshDisplay()
+        self.frameCount += 1
+
+        if fade > 0:
+            ack = display.turnOn(fade)
+
+        # next frame is written after display accepted this frame
+        self._writing = True
+        ack.add_done_callback(self._onFrameWritten)
+
+    def _onFrameWritten(self, ack):
+        self._writing = False
+        self._scheduleFrame()
+
+    # ------------------------
+    # InputEventListener implementation
+
+    def onInputEvent(self, e: MotionEvent):
+        if self.display_manager.on is False:
+            if e.action == VALUE_DOWN:
+                self.display_manager.on = True
+                self.updateUI(fade=2, turn_on=True)
+                self.display_manager.startDismissTimer()
+            return
+
+        # pass to gesture detector
+        handle = self.gesture_detector.onTouchEvent(e)
+
+        # dispatch touch event to current application
+        if handle is False:
+            self.app.dispatchTouchEvent(e)
+
+        # reset display turn off timer
+        self.display_manager.startDismissTimer()
+
+    # ------------------------
+    # AppEventListener implementation
+
+    def requestUpdateDisplay(self, app, fade):
+        self.updateUI(fade)
+
+    def requestTurnOffDisplay(self, app, fade):
+        self.display_manager.on = False
+        self.updateUI(fade, turn_off=True)
+
+    def requestTurnOnDisplay(self, app, fade):
+        self.display_manager.on = True
+        self.updateUI(fade, turn_on=True)
+        self.display_manager.startDismissTimer()
+
+    def setNextApp(self, app):
+        self.display_manager.startDismissTimer()
+        self.createTask(self._changeApp(app))
+
+    async def _changeApp(self, app):
+        # stop old application task
+        await self.app.onStop()
+
+        # change current application
+        self.app = app
+        self.updateUI(2)
+        # start new application task
+        await app.onStart()
+
+    def onCloseApp(self, app):
+        self.display_manager.startDismissTimer()
+
+        # close current application, so return to base application
+        self.app = self._baseApp
+        self.updateUI(2)
+        self.createTask(self.app.onStart())
+
+    def onChangeDuty(self, duty):
+        self._duty = duty
+        if self.display is not None:
+            self.display.setDuty(duty)
+
+    def _setBrightness(self, duty):
+        # duty is sent by turn on request
+        self.display.setDuty(duty)
+        self.display.turnOn(0)
+
+    # ------------------------
+    # DisplayEventListener implementation
+
+    def onDismissTime(self) -> bool:
+        # check app allow turn off
+        return self.app.onTurnOffDisplay()
+
+    def onDismiss(self):
+        # turn off display with fade effect
+        self.updateUI(fade=3, turn_off=True)
+
+    def onDim(self):
+        self.loop.call_soon_threadsafe(self._setBrightness, min(self._dimDuty, self._duty))
+
+    def onWake(self):
+        self.loop.call_soon_threadsafe(self._setBrightness, self._duty)
+
+    # ------------------------
+    # GestureListener implementation
+
+    def onScroll(self, e1: MotionEvent, e2: MotionEvent, x, y):
+        # scroll event occured, pass to current application
+        return self.app.dispatchScrollEvent(e1, e2, x, y)
+
+    def onFling(self, e1: MotionEvent, e2: MotionEvent, x, y):
+        # swipe event occured, pass to current application
+        return self.app.dispatchFlingEvent(e1, e2, x, y)
+
+    def onLongPress(self, e: MotionEvent):
+        # long press event occured, pass to current application
+        self.app.dispatchLongPressEvent(e)
+
+    def onDoubleTap(self, e: MotionEvent):
+        # double tap event occured, pass to current application
+        return self.app.dispatchDoubleTapEvent(e)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# mui kinetic scroller class
+#
+# Scroller keeps scrolling after fling, and slows down by friction.
+# scroll steps run on the shared FrameClock, so content moves at most once per tick.
+#
+#   class ListApp(AbsApp, GestureListener):
+#       def __init__(self, listener):
+#           ...
+#           self.scroller = Scroller(self.scrollBy)
+#
+#       def dispatchScrollEvent(self, e1, e2, scrollX, scrollY):
+#           self.scroller.stop()
+#           self.scrollBy(scrollX, scrollY)
+#           return True
+#
+#       def dispatchFlingEvent(self, e1, e2, velocityX, velocityY):
+#           self.scroller.fling(-velocityX, -velocityY)
+#           return True
+#
+#       def scrollBy(self, dx, dy):
+#           self.list.y -= dy
+#           FrameClock.get_instance().requestUpdate(self.list)
+
+import math
+import time
+
+try:
+    from frame_clock import FrameClock
+except ImportError:
+    from . import FrameClock
+
+# deceleration rate of fling(1 / second). velocity is multiplied by exp(-FRICTION * t)
+FRICTION = 4.0
+# fling stops under this velocity(pixels per second)
+MIN_VELOCITY = 10
+
+
+class Scroller(object):
+    """
+    Scroller is kinetic scroll animation.
+
+    after fling(), callback(dx, dy) is called once per tick of FrameClock with integer distance
+    scrolled in the tick, until velocity goes under MIN_VELOCITY.
+    fractional distance is carried to next tick, so total distance is not lost by rounding.
+
+    See Also
+    --------
+    VelocityTracker
+    GestureDetector
+    FrameClock
+    """
+
+    def __init__(self, callback, friction=FRICTION):
+        """
+        Parameters
+        ------------
+        callback : callable
+            callback(dx, dy) called with scrolled distance(pixels)
+        friction : float
+            deceleration rate(1 / second). larger value stops faster.
+        """
+        self._callback = callback
+        self.friction = friction
+        self._animation = None
+
+    @property
+    def finished(self):
+        return (self._animation is None) or (self._animation.active is False)
+
+    def fling(self, velocityX, velocityY):
+        """
+        start scroll with initial velocity(pixels per second). running scroll is stopped.
+
+        Returns
+        --------
+        Animation : handle of the scroll
+        """
+        self.stop()
+        self._animation = FrameClock.get_instance().animate(self._run(velocityX, velocityY))
+        return self._animation
+
+    def stop(self):
+        """
+        stop scroll. please call at touch down.
+        """
+        if self._animation is not None:
+            self._animation.cancel()
+        self._animation = None
+
+    def distance(self, velocity):
+        """
+        total distance of fling with initial velocity(pixels)
+        """
+        return velocity / self.friction
+
+    def _run(self, vx, vy):
+        last = time.monotonic()
+        restX = restY = 0.0
+        while math.hypot(vx, vy) >= MIN_VELOCITY:
+            yield 0
+            now = time.monotonic()
+            decay = math.exp(-self.friction * (now - last))
+            last = now
+
+            # distance in the tick is integral of v * exp(-friction * t)
+            restX += (vx / self.friction) * (1 - decay)
+            restY += (vy / self.friction) * (1 - decay)
+            vx *= decay
+            vy *= decay
+
+            dx = int(restX)
+            dy = int(restY)
+            if (dx != 0) or (dy != 0):
+                restX -= dx
+                restY -= dy
+                self._callback(dx, dy)
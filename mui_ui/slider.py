@@ -10,9 +10,6 @@ try:
 except ImportError:
     from . import Matrix, Widget, Image, MotionEvent, VALUE_DOWN, VALUE_MOVE, VALUE_UP
 
-import os
-dir = os.path.dirname(os.path.abspath(__file__))
-
 
 class SliderEventListener(object):
     """
@@ -96,9 +93,7 @@ class Slider(Widget):
         self.addParts(sliderBar)
 
         # add thumb
-        sourceName = './assets/slider_thumb_large.png'
-        sourcePath = os.path.normpath(os.path.join(dir, sourceName))
-        sliderThub = Image(sourcePath)
+        sliderThub = Image('bundle://mui_ui/slider_thumb_large')
         sliderThub.setSize((width // 2) - 4, 2, 9, 9)
         self.addParts(sliderThub)
 
@@ -166,7 +161,7 @@ class Slider(Widget):
                 self._sliderListener.onSliderValueChanged(self, oldValue, self.getValue())
             return
 
-        self._isChange = True
+        self.invalidate()
         time = e.timestamp
         if time - self._lastUpdate < 0.015:
             # if very close to previous update time, skip this update request
@@ -2,7 +2,6 @@
 
 # mui ui text view class
 
-import time
 from enum import Enum
 
 try:
@@ -27,6 +26,76 @@ class TextAlignment(Enum):
     RIGHT = 2
 
 
+class TextLayout(object):
+    """
+    line and glyph layout of text. 
+    positions are relative to the beginning of the first line, so the layout is not depend on alignment.
+
+    Attributes
+    ----------
+    maxWidth : int
+        max line width. character which over this width is folded to next line.
+    runs : list
+        (text index, x, line number, Glyph) of each drawn character
+    cursors : list
+        (x, line number, is new line character) after each character
+    lineWidths : list
+        width of each line
+    """
+
+    def __init__(self, maxWidth):
+        self.maxWidth = maxWidth
+        self.runs = []
+        self.cursors = []
+        self.lineWidths = [0]
+
+    def append(self, font, text):
+        """
+        layout text and append to end of this layout
+        """
+        line = len(self.lineWidths) - 1
+        x = self.lineWidths[line]
+        index = len(self.cursors)
+
+        for s in text:
+            newLine = (s == '\n')
+            if newLine:
+                line += 1
+                x = 0
+                self.lineWidths.append(0)
+            else:
+                glyph = font.getGlyph(s)
+
+                # fold line
+                if (x > 0) and ((x + glyph.width) > self.maxWidth):
+                    line += 1
+                    x = 0
+                    self.lineWidths.append(0)
+
+                self.runs.append((index, x, line, glyph))
+                x += glyph.width
+                self.lineWidths[line] = x
+
+            self.cursors.append((x, line, newLine))
+            index += 1
+
+    @property
+    def length(self):
+        return len(self.cursors)
+
+    @property
+    def lineCount(self):
+        return len(self.lineWidths)
+
+    @property
+    def width(self):
+        return max(self.lineWidths)
+
+    @property
+    def height(self):
+        return 8 + ((len(self.lineWidths) - 1) * LINE_OFFSET)
+
+
 class Text(AbsParts):
     """
     Text View
@@ -109,9 +178,8 @@ class Text(AbsParts):
         self._textAlignment = TextAlignment.LEFT
         self._oldContent = None
         self._needRenderContent = True
-        self._oldXOffset = 0
-        self._oldYOffset = 0
-        self._oldOrgXOffset = 0
+        self._layout = None
+        self._origin = (0, 0)
         self._text_index = 0
         self._draw_out_area = False
 
@@ -125,11 +193,11 @@ class Text(AbsParts):
             self._textAlignment = textAlignment
 
         self._needRenderContent = True
-        self._oldXOffset = 0
-        self._oldYOffset = 0
-        self._oldOrgXOffset = 0
+        self._layout = None
+        self._origin = (0, 0)
         self._text_index = 0
         self._oldContent = None
+        self.invalidate()
 
     def addText(self, text: str):
         if self._text is None:
@@ -137,6 +205,7 @@ class Text(AbsParts):
 
         self._text = self._text + text
         self._addTextMatrix(text)
+        self.invalidate()
 
     def deleteLastChar(self):
         if self._text is None:
@@ -149,68 +218,74 @@ class Text(AbsParts):
     def setTextAlignment(self, textAlignment:TextAlignment):
         self._textAlignment = textAlignment
         self._needRenderContent = True
+        self.invalidate()
 
 
     def setBorder(self, border:Border):
         self._border = border
         self._needRenderContent = True
+        self.invalidate()
 
 
-    def _addTextMatrix(self, text: str):
-        font = MuiFont.get_instance()
+    def getLayout(self) -> 'TextLayout':
+        """
+        Return layout of current text.
+        the layout is kept until text or view width is changed, so alignment and border change does not layout again.
+        """
+        if self._text is None:
+            return None
 
-        yOffset = self._oldYOffset
-        xOffset = self._oldXOffset
-        xOffsetOrg = self._oldOrgXOffset
-        isOverArea = False
+        maxWidth = self._getMaxWidth()
+        layout = self._layout
+        if (layout is None) or (layout.maxWidth != maxWidth) or (layout.length != len(self._text)):
+            layout = TextLayout(maxWidth)
+            layout.append(MuiFont.get_instance(), self._text)
+            self._layout = layout
 
-        m = self._oldContent
-        if m is None:
-            m = Matrix(self.width, self.height)
-            m.startX = self.x
-            m.startY = self.y
-
-        for s in text:                
-            if s == '\n':
-                yOffset += LINE_OFFSET
-                xOffset = xOffsetOrg
-
-                if ((yOffset + 8) > (self.y + self.height)):
-                    isOverArea = True
-            else:
-                textM = font.getText(s)
-                textM.startX = self.x + xOffset
-                textM.startY = self.y + yOffset
+        return layout
 
-                if ((textM.startX + textM.width) > (self.x + self.width)):
-                    xOffset = 0
-                    yOffset += LINE_OFFSET
+    def _getInset(self):
+        return 2 if self._border == Border.AROUND else 0
 
-                    textM.startX = self.x + xOffset
-                    textM.startY = self.y + yOffset
+    def _getMaxWidth(self):
+        # border around takes 2 dots of both sides(line and space)
+        return self.width - (2 * self._getInset())
 
-                # merge char matrix data to area matrix
-                m.merge(textM)
+    def _addTextMatrix(self, text: str):
+        m = self._oldContent
+        if (m is None) or (self._needRenderContent is True):
+            # content is not rendered yet, getMatrix() renders whole text
+            return
 
-                xOffset += textM.width
+        layout = self._layout
+        if (layout is None) or (layout.length != len(self._text) - len(text)):
+            # layout all text
+            self._layout = None
+            layout = self.getLayout()
+        else:
+            layout.append(MuiFont.get_instance(), text)
+
+        start = len(self._text) - len(text)
+        xOffset, yOffset = self._origin
 
-            # check text is out from this view area
-            if (isOverArea or (((xOffset + 8) > self.width) and ((yOffset + LINE_OFFSET) > self.height))):
-                # notify text if out from view area
-                self._onTextFull(self._text_index)
+        # merge char matrix data to area matrix
+        for index, x, line, glyph in reversed(layout.runs):
+            if index < start:
+                break
+            m.blit(glyph.bitmap, self.x + xOffset + x, self.y + yOffset + (line * LINE_OFFSET))
 
-            self._text_index += 1
+        # notify text if out from view area
+        overIndex = self._findOverIndex(layout, xOffset, yOffset, start)
+        if overIndex >= 0:
+            self._onTextFull(overIndex)
 
-        self._oldXOffset = xOffset
-        self._oldYOffset = yOffset
+        self._text_index = layout.length
 
 
     def getMatrix(self):
         """
         Return Matrix data for display draw
         """
-        #sT = time.time()
-
         text = self._text
         if text is None:
             return None
@@ -220,89 +295,45 @@ class Text(AbsParts):
             self._oldContent.startY = self.y
             return self._oldContent
 
-        # m = Matrix(self.width, self.height)
-        # m.startX = self.x
-        # m.startY = self.y
-
-        xOffset = 0
-        xOffsetOrg = 0
-        yOffset = 0
+        layout = self.getLayout()
 
-        font = MuiFont.get_instance()
-
-        maxX = 0
-        xOffset = yOffset = 2 if self._border == Border.AROUND else 0
-
-        tH = self.getTextHeight(font, self._text)
+        xOffset = yOffset = self._getInset()
         if self._textAlignment == TextAlignment.CENTER:
-            tW = self.getTextWidth(font, self._text)
-            dX = self.width - tW
+            dX = self.width - layout.width
             xOffset = dX // 2
             xOffset += 1 if self._border == Border.AROUND else 0
 
-            # tH = self.getTextHeight(font, self._text)
-            dY = self.height - tH
+            dY = self.height - layout.height
             yOffset = dY // 2
         elif self._textAlignment == TextAlignment.RIGHT: 
-            tW = self.getTextWidth(font, self._text)
-            dX = self.width - tW
+            dX = self.width - layout.width
             dX -= 1 if self._border == Border.AROUND else 0
             xOffset = dX
 
-        m = Matrix(self.width, tH if self._draw_out_area else self.height)
+        m = Matrix(self.width, layout.height if self._draw_out_area else self.height)
         m.startX = self.x
         m.startY = self.y
 
-        xOffsetOrg = xOffset
-        isOverArea = False
-
         # draw text
-        self._text_index = 0
-        call_text_full = False
-        for s in text:                
-            if s == '\n':
-                yOffset += LINE_OFFSET
-                xOffset = xOffsetOrg
-
-                if ((yOffset + 8) > (self.y + self.height)):
-                    isOverArea = True
-            else:
-                textM = font.getText(s)
-                textM.startX = self.x + xOffset
-                textM.startY = self.y + yOffset
-
-                if ((textM.startX + textM.width) > (self.x + self.width)):
-                    xOffset = 0
-                    yOffset += LINE_OFFSET
-
-                    textM.startX = self.x + xOffset
-                    textM.startY = self.y + yOffset
-
-                # merge char matrix data to area matrix
-                m.merge(textM)
-
-                xOffset += textM.width
-                if maxX < xOffset:
-                    maxX = xOffset
+        for index, x, line, glyph in layout.runs:
+            m.blit(glyph.bitmap, self.x + xOffset + x, self.y + yOffset + (line * LINE_OFFSET))
 
-            # check text is out from this view area
-            if (isOverArea or (((xOffset + 8) > self.width) and ((yOffset + LINE_OFFSET) > self.height))):
-                # notify text if out from view area
-                if call_text_full is False:
-                    self._onTextFull(self._text_index)
-                    call_text_full = True
-
-            self._text_index += 1
+        # notify text if out from view area
+        self._text_index = layout.length
+        overIndex = self._findOverIndex(layout, xOffset, yOffset, 0)
+        if overIndex >= 0:
+            self._onTextFull(overIndex)
 
         # write border
+        maxX = (xOffset + layout.width) if len(layout.runs) > 0 else 0
         if self._border == Border.BOTTOM:
-            bYOffset = yOffset + 8
+            bYOffset = yOffset + ((layout.lineCount - 1) * LINE_OFFSET) + 8
             if m.height > 8:
                 for i in range(maxX):
                     m.matrix[bYOffset][i] = 1
 
         elif self._border == Border.AROUND:
-            bMaxX = maxX + 2
+            bMaxX = min(maxX + 2, self.width)
             if self._textAlignment == TextAlignment.CENTER:
                 bMaxX = self.width
 
@@ -314,64 +345,51 @@ class Text(AbsParts):
                 m.matrix[i][0] = 1
                 m.matrix[i][bMaxX - 1] = 1
 
-        #eR = time.time() - sT
-        #print("render text time : {0}".format(eR))
-
         self._oldContent = m
         self._needRenderContent = False
-        self._oldXOffset = xOffset
-        self._oldYOffset = yOffset
-        self._oldOrgXOffset = xOffsetOrg
+        self._origin = (xOffset, yOffset)
 
         return m
 
+    def _findOverIndex(self, layout, xOffset, yOffset, start):
+        """
+        Return index of the first character that makes text out from view area. if text is in area, return -1.
+        """
+        isOverArea = False
+        for i in range(start, layout.length):
+            x, line, newLine = layout.cursors[i]
+            x += xOffset
+            y = yOffset + (line * LINE_OFFSET)
+            if newLine and ((y + 8) > (self.y + self.height)):
+                isOverArea = True
+
+            if (isOverArea or (((x + 8) > self.width) and ((y + LINE_OFFSET) > self.height))):
+                return i
+
+        return -1
 
     def getTextWidth(self, font, text):
         """
         calcurate text width
         """
-        textMaxWidth = 0
-        textWidth = 0
-        for s in text:
-            if (s == '\n'):
-                textWidth = 0
-            else:
-                tM = font.getText(s)
-                tM.startX = self.x + textWidth
+        if text == self._text:
+            return self.getLayout().width
 
-                if ((tM.startX + tM.width) > (self.x + self.width)):
-                    textWidth = 0
-                else:
-                    textWidth += tM.width
-
-            if textMaxWidth < textWidth:
-                textMaxWidth = textWidth
-        
-        return textMaxWidth
+        layout = TextLayout(self._getMaxWidth())
+        layout.append(font, text)
+        return layout.width
 
 
     def getTextHeight(self, font, text):
         """
         calcurate text height
         """
-        textWidth = 0
-        textHeight = 8
-
-        for s in text:
-            if (s == '\n'):
-                textHeight += LINE_OFFSET
-                textWidth = 0
-            else:
-                tM = font.getText(s)
-                tM.startX = self.x + textWidth
-
-                if ((tM.startX + tM.width) > (self.x + self.width)):
-                    textHeight += LINE_OFFSET
-                    textWidth = 0
+        if text == self._text:
+            return self.getLayout().height
 
-                textWidth += tM.width
-        
-        return textHeight
+        layout = TextLayout(self._getMaxWidth())
+        layout.append(font, text)
+        return layout.height
 
     def _onTextFull(self, text_index):
         pass
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+# mui render tracer
+#
+# opt-in instrumentation of render and display path.
+# spans are kept in a ring buffer, so the tracer can be left enabled on production units
+# and the last spans can be exported as Chrome trace JSON(chrome://tracing, Perfetto).
+#
+#   from mui_ui import tracer
+#
+#   t = tracer.enable()
+#   ...
+#   t.dump('mui_trace.json')
+
+import os
+import time
+import threading
+from collections import deque
+
+# default number of spans kept in ring buffer
+TRACE_CAPACITY = 8192
+
+now = time.perf_counter
+
+
+class Span(object):
+    """
+    timed span
+
+    Attributes
+    ----------
+    name : str
+        name of span(view name for rasterisation)
+    cat : str
+        stage of span(rasterise, compose, diff, encode, write, ack)
+    start : float
+        start time(seconds, time.perf_counter())
+    duration : float
+        duration(seconds)
+    tid : int
+        thread id
+    args : dict
+        additional data of span(bytes, rects, ...)
+    """
+
+    __slots__ = ('name', 'cat', 'start', 'duration', 'tid', 'args', '_tracer')
+
+    def __init__(self, tracer, name, cat, args):
+        self._tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+        self.duration = 0
+        self.tid = 0
+
+    def set(self, key, value):
+        """
+        set additional data of span
+        """
+        self.args[key] = value
+
+    def __enter__(self):
+        self.start = now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = now() - self.start
+        self.tid = threading.get_ident()
+        self._tracer._add(self)
+        return False
+
+
+class _NullSpan(object):
+    # span returned when tracer is disabled. do nothing.
+
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer(object):
+    """
+    Tracer keeps last spans in ring buffer and notifies listeners.
+
+    See Also
+    --------
+    enable
+    span
+    """
+
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self._spans = deque(maxlen=capacity)
+        self._listeners = []
+
+    @property
+    def capacity(self):
+        return self._spans.maxlen
+
+    def span(self, name, cat, **args) -> Span:
+        """
+        create span. use as context manager.
+        """
+        return Span(self, name, cat, args)
+
+    def record(self, name, cat, start, end, **args):
+        """
+        add span measured by caller. start and end are time.perf_counter() value.
+        """
+        s = Span(self, name, cat, args)
+        s.start = start
+        s.duration = end - start
+        s.tid = threading.get_ident()
+        self._add(s)
+
+    def _add(self, s):
+        self._spans.append(s)
+        for l in self._listeners:
+            l(s)
+
+    def addListener(self, listener):
+        """
+        add callback invoked with Span when each span finished.
+        listener is called on the thread which finished span, so it should return quickly.
+        """
+        self._listeners.append(listener)
+
+    def removeListener(self, listener):
+        self._listeners.remove(listener)
+
+    def spans(self, cat=None):
+        """
+        Returns
+        --------
+        list of Span : spans in ring buffer, oldest first
+        """
+        spans = list(self._spans)
+        if cat is None:
+            return spans
+        return [s for s in spans if s.cat == cat]
+
+    def clear(self):
+        self._spans.clear()
+
+    def toChromeTrace(self):
+        """
+        Returns
+        --------
+        dict : spans in Chrome trace event format
+        """
+        pid = os.getpid()
+        events = []
+        for s in list(self._spans):
+            events.append({
+                'name': s.name,
+                'cat': s.cat,
+                'ph': 'X',
+                'ts': s.start * 1e6,
+                'dur': s.duration * 1e6,
+                'pid': pid,
+                'tid': s.tid,
+                'args': s.args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path):
+        """
+        write spans to path as Chrome trace JSON
+        """
+        import json
+
+        with open(path, 'w') as f:
+            json.dump(self.toChromeTrace(), f)
+
+
+# active tracer. None if tracing is disabled.
+active = None
+
+
+def enable(capacity=TRACE_CAPACITY) -> Tracer:
+    """
+    enable tracing of mui_ui.
+
+    Returns
+    --------
+    Tracer : active tracer
+    """
+    global active
+    if active is None or active.capacity != capacity:
+        active = Tracer(capacity)
+    return active
+
+
+def disable():
+    """
+    disable tracing of mui_ui
+    """
+    global active
+    active = None
+
+
+def get_tracer():
+    """
+    Returns
+    --------
+    Tracer : active tracer. None if tracing is disabled.
+    """
+    return active
+
+
+def span(name, cat, **args):
+    """
+    create span on active tracer. if tracing is disabled, returns span which does nothing.
+
+    Examples
+    ---------
+    with tracer.span('compose', 'compose') as s:
+        ...
+        s.set('bytes', size)
+    """
+    t = active
+    if t is None:
+        return NULL_SPAN
+    return Span(t, name, cat, args)
@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 
-import time
-from threading import Thread
-from threading import Timer
-
 try:
     from text import Text, Border, TextAlignment
+    from frame_clock import FrameClock
 except ImportError:
-    from . import Text, Border, TextAlignment
+    from . import Text, Border, TextAlignment, FrameClock
+
+# time between typed characters(seconds)
+TYPE_INTERVAL = 0.15
+# time between scroll steps(seconds)
+SCROLL_INTERVAL = 0.15
 
 
 class TypeWriterEventListener(object):
@@ -42,11 +44,14 @@ class TypeWriterText(Text):
     this class inherit Text view and add effect like a TypeWriter for UI drawing.
     if text length is too long according to view size, when text is full on view area, start auto scroll and show left text.
 
+    typing and scroll run on the shared FrameClock.
+
 
     See Also
     --------
     Text
     TypeWriterEventListener
+    FrameClock
     """
 
     def __init__(self, text:str=None, border:Border=Border.NONE, name='typewriter textview'):
@@ -58,62 +63,60 @@ class TypeWriterText(Text):
         self._draw_out_area = False
         self._doTask = False
         self._task = None
+        self._scrollTask = None
         self._typewriterEventListener = None
 
     def addTypeWriterEvent(self, l: TypeWriterEventListener):
         self._typewriterEventListener = l
 
     def setText(self, text:str, textAlignment:TextAlignment=None):
-        if self._task is not None and self._task.is_alive() is True:
-            self._task.join()
-            time.sleep(0.5)
+        self.stopTypewriter()
 
         super().setText('', textAlignment)
         self._srcText = text
         self._orgText = text
         self._typedTextCount = 0
 
-        t = Timer(0.1, self.startTypewriter)
-        t.start()
+        self._doTask = True
+        self._task = FrameClock.get_instance().animate(self._doTypewriter(), 0.1)
 
     def startTypewriter(self):
         if self._doTask is True:
             return
 
-        self._task = Thread(target= self._doTypewriter)
         self._doTask = True
-        self._task.start()
+        self._task = FrameClock.get_instance().animate(self._doTypewriter())
 
     def stopTypewriter(self):
         self._doTask = False
-        if self._task is not None:
-            self._task.join()
+        self._scrolling = False
+        for task in (self._task, self._scrollTask):
+            if task is not None:
+                task.cancel()
+        self._task = None
+        self._scrollTask = None
 
 
     def _doTypewriter(self):
         # print('---- start type writer ----', self._srcText)
-        l = self.OnUpdateRequestListener
-        if l is None:
+        clock = FrameClock.get_instance()
+        if self.OnUpdateRequestListener is None:
             self._doTask = False
             return
 
         for s in self._srcText:
-            tS = time.time()
             super().addText(s)
             self._typedTextCount += 1
-            l.onUpdateView(self)
+            clock.requestUpdate(self)
 
             if self._doTask is False:
                 break
 
-            tE = time.time()
-            diff = tE - tS
-            if diff < 0.15:
-                time.sleep(0.15 - diff)
+            yield TYPE_INTERVAL
 
         self._doTask = False
 
-        # if typed all text, notify all task finish        
+        # if typed all text, notify all task finish
         if (self._typedTextCount == len(self._orgText)) and self._typedTextCount > 0:
             if self._typewriterEventListener is not None:
                 self._typewriterEventListener.onTypeFinished()
@@ -127,15 +130,14 @@ class TypeWriterText(Text):
             return
 
         self._doTask = False
-        t = Timer(0.2, self._scroll, [text_index])
-        t.start()        
+        self._scrolling = True
+        self._scrollTask = FrameClock.get_instance().animate(self._scroll(text_index), 0.2)
 
 
     def _scroll(self, text_index):
-        self._scrolling = True
-
-        l = self.OnUpdateRequestListener
-        if l is None:
+        clock = FrameClock.get_instance()
+        if self.OnUpdateRequestListener is None:
+            self._scrolling = False
             return
 
         # notify scroll start
@@ -146,8 +148,8 @@ class TypeWriterText(Text):
         for y in range(0, self.height, 4):
             self._y -= 4
             self._neddRenderContent = False
-            l.onUpdateView(self)
-            time.sleep(0.15)
+            clock.requestUpdate(self)
+            yield SCROLL_INTERVAL
 
         # next text
         newText = self._srcText[text_index+1:]
@@ -161,11 +163,8 @@ class TypeWriterText(Text):
             self._typewriterEventListener.onScrollFinished()
 
         # set new text
-        #super().setText(newText)
         self._doTask = False
         super().setText('')
         self._srcText = newText
-        l.onUpdateView(self)
+        clock.requestUpdate(self)
         self.startTypewriter()
-        #l.onUpdateView(self)
-
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+# mui touch velocity tracker class
+#
+# VelocityTracker keeps recent touch positions in a fixed size ring buffer,
+# and fits a line to positions in the last HORIZON seconds by least squares.
+#
+#   tracker = VelocityTracker()
+#
+#   def onInputEvent(self, e):
+#       if e.action == VALUE_DOWN:
+#           tracker.clear()
+#       tracker.addMovement(e)
+#       if e.action == VALUE_UP:
+#           velocityX, velocityY = tracker.computeVelocity()
+
+try:
+    from input import MotionEvent
+except ImportError:
+    from . import MotionEvent
+
+# number of samples kept
+HISTORY_SIZE = 20
+# samples older than this from the latest sample are not used(seconds)
+HORIZON = 0.1
+# if no sample in this time, pointer is assumed to be stopped and older samples are not used(seconds)
+ASSUME_STOPPED = 0.04
+
+
+class VelocityTracker(object):
+    """
+    VelocityTracker computes touch velocity(pixels per second) from recent MotionEvents.
+
+    velocity is slope of a line fitted to positions in the last horizon seconds,
+    so a few noisy samples or a short gesture do not make extreme velocity.
+    if all samples have same timestamp, velocity is 0.
+
+    See Also
+    --------
+    GestureDetector
+    Scroller
+    """
+
+    def __init__(self, size=HISTORY_SIZE, horizon=HORIZON):
+        """
+        Parameters
+        ------------
+        size : int
+            number of samples kept
+        horizon : float
+            time range of samples used for velocity(seconds)
+        """
+        self.size = size
+        self.horizon = horizon
+        self._t = [0.0] * size
+        self._x = [0.0] * size
+        self._y = [0.0] * size
+        # index of next sample
+        self._index = 0
+        self._count = 0
+
+    def clear(self):
+        """
+        remove all samples. please call at touch down.
+        """
+        self._index = 0
+        self._count = 0
+
+    def addMovement(self, e: MotionEvent):
+        """
+        add position of touch event. positions of moves merged into the event are added too.
+        """
+        for t, x, y in e.history:
+            self.addSample(t, x, y)
+        self.addSample(e.timestamp, e.x, e.y)
+
+    def addSample(self, t, x, y):
+        """
+        add position at time t(seconds)
+        """
+        if self._count > 0:
+            last = self._t[self._index - 1]
+            if t - last > ASSUME_STOPPED:
+                # pointer stopped before this sample, older samples are not part of current motion
+                self._count = 0
+            elif t < last:
+                # out of order sample
+                return
+
+        i = self._index
+        self._t[i] = t
+        self._x[i] = x
+        self._y[i] = y
+        self._index = (i + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def computeVelocity(self):
+        """
+        Returns
+        --------
+        (float, float) : velocity of x and y(pixels per second)
+        """
+        size = self.size
+        newest = self._index - 1
+        limit = self._t[newest] - self.horizon
+
+        # samples in horizon from newest to oldest
+        n = 0
+        sumT = sumX = sumY = 0.0
+        for k in range(self._count):
+            i = (newest - k) % size
+            if self._t[i] < limit:
+                break
+            sumT += self._t[i]
+            sumX += self._x[i]
+            sumY += self._y[i]
+            n += 1
+
+        if n < 2:
+            return 0.0, 0.0
+
+        meanT = sumT / n
+        meanX = sumX / n
+        meanY = sumY / n
+        stt = stx = sty = 0.0
+        for k in range(n):
+            i = (newest - k) % size
+            dt = self._t[i] - meanT
+            stt += dt * dt
+            stx += dt * (self._x[i] - meanX)
+            sty += dt * (self._y[i] - meanY)
+
+        if stt == 0:
+            # all samples at same time
+            return 0.0, 0.0
+
+        return stx / stt, sty / stt
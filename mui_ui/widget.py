@@ -7,9 +7,11 @@ try:
     from parts import AbsParts
     from matrix import Matrix
     from input import MotionEvent
+    from compositor import Compositor
 except ImportError:
     from . import AbsParts
     from . import Matrix
+    from . import Compositor
 
 
 class Widget(AbsParts):
@@ -21,14 +23,15 @@ class Widget(AbsParts):
     def __init__(self, width=0, height=0, name='widget'):
         super().__init__(name)
         self._partsList = []
+        self._compositor = None
         self.width = width
         self.height = height
-        #self.m = Matrix(width, height)
 
     def addParts(self, parts:AbsParts):
         parts.x = self.x + parts.x
         parts.y = self.y + parts.y
         self._partsList.append(parts)
+        self.invalidate()
 
     def setPos(self, x, y):
         self.setSize(x, y, self.width, self.height)
@@ -56,14 +59,14 @@ class Widget(AbsParts):
 
 
     def getMatrix(self):
-        m = Matrix(self.width, self.height)
-        m.startX = self.x
-        m.startY = self.y
-        parts = self._partsList
-
-        for p in parts:
-            if p.visible == True:
-                m.merge(p.getMatrix())
+        if self._compositor is None:
+            self._compositor = Compositor(self.width, self.height)
+
+        compositor = self._compositor
+        m = compositor.compose(self._partsList, self.x, self.y, self.width, self.height)
+        if compositor.dirtyRect is not None:
+            # notify change to parent compositor
+            self._version += 1
 
         self._isChange = False
         return m
\ No newline at end of file
@@ -16,9 +16,6 @@ from mui_ui import TextAlignment, MotionEvent, OnTouchEventListener, AppEventLis
 from mui_ui import Keyboard, KeyboardListener
 from mui_ui import MuiNetworkUtil
 
-import os
-dir = os.path.dirname(os.path.abspath(__file__))
-
 
 class WiFiSetting(AbsApp, OnTouchEventListener, OnUpdateRequestListener, KeyboardListener, DialogListener):
     """
@@ -41,8 +38,8 @@ class WiFiSetting(AbsApp, OnTouchEventListener, OnUpdateRequestListener, Keyboar
             wifiCaption.setSize(0, 0, 30, 8)
             showCurrentSetting.addParts(wifiCaption)
 
-            self._icon_wifi_enable = os.path.normpath(os.path.join(dir, './assets/icon_wifi_enable.png'))
-            self._icon_wifi_disable = os.path.normpath(os.path.join(dir, './assets/icon_wifi_disable.png'))
+            self._icon_wifi_enable = 'bundle://sample/icon_wifi_enable'
+            self._icon_wifi_disable = 'bundle://sample/icon_wifi_disable'
             connectionStatus = Image(self._icon_wifi_disable)
             connectionStatus.setSize(36, 0, 11, 11)
             connectionStatus.offset_y = 2
@@ -9,14 +9,14 @@ import time
 
 from datetime import timezone, timedelta
 
-from threading import Lock
-mutex = Lock()
+from threading import RLock
 
-from mui_ui import Display, MuiFont, Text, Image, Widget, Border, AbsApp, Message, DigitalClock
+from mui_ui import BitMatrix, Display, DisplayPipeline, MuiFont, Text, Image, Widget, Border, AbsApp, Message, DigitalClock
 from mui_ui import TextAlignment, MotionEvent, InputEvent, InputEventListener, InputHandler, OnTouchEventListener, AppEventListener, OnUpdateRequestListener  
 from mui_ui import GestureListener, GestureDetector
 from mui_ui import Keyboard, KeyboardListener
 from mui_ui import DisplayManager, DisplayEventListener
+from mui_ui import register_bundle
 
 from app_wifisetting import WiFiSetting
 
@@ -26,9 +26,16 @@ dir = os.path.dirname(os.path.abspath(__file__))
 def get_file_path(name):
     return os.path.normpath(os.path.join(dir, name))
 
+# icons and images are loaded from asset bundle as 'bundle://sample/[name]', without PIL.
+# please build the bundle again when you change files in assets or images(make bundle).
+register_bundle('sample', get_file_path('./assets/sample.bundle'))
+
+# brightness level of dimmed display. it is not brighter than the level set by application.
+DIM_DUTY = 20
+
 class ImageViewerApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
 
-    # please add images to this list.
+    # please add images to this list, and to sample bundle(make bundle).
     # when tap display, change to next image of this list.
     # 
     # image requirements : 
@@ -38,9 +45,9 @@ class ImageViewerApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
     # - RGB format
     # - black pixel is turn on LED dot
     IMAGE_LIST = [
-        './images/mount_fuji.png',
-        './images/kyoto_arashiyama.png',
-        './images/moon.png',
+        'bundle://sample/mount_fuji',
+        'bundle://sample/kyoto_arashiyama',
+        'bundle://sample/moon',
     ]
 
     def __init__(self, appEventListener: AppEventListener, lang='en-US'):
@@ -54,7 +61,7 @@ class ImageViewerApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
             widget = Widget(200, 32)
             self.addView(widget)
 
-            imageView = Image(get_file_path(ImageViewerApp.IMAGE_LIST[self._image_index]))
+            imageView = Image(ImageViewerApp.IMAGE_LIST[self._image_index])
             imageView.setSize(0, 0, 200, 32)
             imageView.addOnTouchViewListener(self)
             widget.addParts(imageView)
@@ -77,7 +84,7 @@ class ImageViewerApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
             self._image_index = 0
 
         imageView = self.getView('image_view')
-        imageView.setImage(get_file_path(ImageViewerApp.IMAGE_LIST[self._image_index]))
+        imageView.setImage(ImageViewerApp.IMAGE_LIST[self._image_index])
         self.updateRequest(0)
 
 
@@ -156,8 +163,7 @@ class DummyWeatherApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
             widget.addParts(highTemp)
             self.setView(highTemp, 'hTemp')
 
-            tempIconName = './assets/weather/icon_f.png' if self._lang == 'en-US' else './assets/weather/icon_c.png'
-            tempIconPath = os.path.normpath(os.path.join(dir, tempIconName))
+            tempIconPath = 'bundle://sample/weather/icon_f' if self._lang == 'en-US' else 'bundle://sample/weather/icon_c'
 
             hTempIcon = Image(tempIconPath)
             hTempIcon.setSize(98, 3, 9, 7)
@@ -184,10 +190,7 @@ class DummyWeatherApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
             widget.addParts(pText)
             self.setView(pText, 'pText')
 
-            percentIconName = './assets/weather/icon_percent.png'
-            percentIconPath = os.path.normpath(os.path.join(dir, percentIconName))
-
-            percentIcon = Image(percentIconPath)
+            percentIcon = Image('bundle://sample/weather/icon_percent')
             percentIcon.setSize(160, 3, 3, 7)
             widget.addParts(percentIcon)
             self.setView(percentIcon, 'percentIcon')
@@ -197,14 +200,14 @@ class DummyWeatherApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
         # common area
         def createCommonMenu():
             # add home icon
-            iconHome = Image(os.path.normpath(os.path.join(dir, './assets/icon_home.png')))
+            iconHome = Image('bundle://sample/icon_home')
             iconHome.setSize(190, 0, iconHome.width, iconHome.height)
             iconHome.addOnTouchViewListener(self)
             self.addView(iconHome)
             self.setView(iconHome, 'home')
             
             # add current icon(this icon has no action)
-            iconWeather = Image(os.path.normpath(os.path.join(dir, './assets/icon_weather.png')))
+            iconWeather = Image('bundle://sample/icon_weather')
             iconWeather.setSize(191, 23, iconWeather.width, iconWeather.height)
             self.addView(iconWeather)
 
@@ -223,10 +226,10 @@ class DummyWeatherApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
         set dummy data
         """
         self.getView('dateText').setText('21 July Sun.')
-        self.getView('wIcon').setImage(os.path.normpath(os.path.join(dir, './assets/weather/icon_weather_101.png')))
+        self.getView('wIcon').setImage('bundle://sample/weather/icon_weather_101')
         self.getView('hTemp').setText('28')
         self.getView('lTemp').setText('12')
-        self.getView('pIcon').setImage(os.path.normpath(os.path.join(dir, './assets/weather/icon_precip_10.png')))
+        self.getView('pIcon').setImage('bundle://sample/weather/icon_precip_10')
         self.getView('pText').setText('10')
 
         self.getView('forecast_view').visible = True
@@ -289,14 +292,14 @@ class DummyThermoApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
         # common area
         def createCommonMenu():
             # add home icon
-            iconHome = Image(os.path.normpath(os.path.join(dir, './assets/icon_home.png')))
+            iconHome = Image('bundle://sample/icon_home')
             iconHome.setSize(190, 0, iconHome.width, iconHome.height)
             iconHome.addOnTouchViewListener(self)
             self.addView(iconHome)
             self.setView(iconHome, 'home')
             
             # add current icon(this icon has no action)
-            iconWeather = Image(os.path.normpath(os.path.join(dir, './assets/icon_thermo.png')))
+            iconWeather = Image('bundle://sample/icon_thermo')
             iconWeather.setSize(191, 23, iconWeather.width, iconWeather.height)
             self.addView(iconWeather)
 
@@ -374,22 +377,22 @@ class HomeApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
         # add menu
         def createMenu():
             # create weahter app icon
-            iconWeather = Image(get_file_path('./assets/icon_weather.png'))
+            iconWeather = Image('bundle://sample/icon_weather')
             iconWeather.addOnTouchViewListener(self)
             self.setView(iconWeather, 'icon_weather')
 
             # create thermostat app icon
-            iconThermo = Image(get_file_path('./assets/icon_thermo.png'))
+            iconThermo = Image('bundle://sample/icon_thermo')
             iconThermo.addOnTouchViewListener(self)
             self.setView(iconThermo, 'icon_thermo')
 
             # create image viewer app icon
-            iconImage = Image(get_file_path('./assets/icon_pen.png'))
+            iconImage = Image('bundle://sample/icon_pen')
             iconImage.addOnTouchViewListener(self)
             self.setView(iconImage, 'icon_image')
 
             # create wi-fi setting app icon
-            iconWiFi = Image(get_file_path('./assets/icon_wifi_enable.png'))
+            iconWiFi = Image('bundle://sample/icon_wifi_enable')
             iconWiFi.addOnTouchViewListener(self)
             self.setView(iconWiFi, 'icon_wifi')
 
@@ -432,7 +435,7 @@ class HomeApp(AbsApp, OnUpdateRequestListener, OnTouchEventListener):
 
 
         def addHomeIcon():
-            iconHome = Image(os.path.normpath(os.path.join(dir, './assets/icon_home.png')))
+            iconHome = Image('bundle://sample/icon_home')
             iconHome.setSize(190, 23, iconHome.width, iconHome.height)
             self.addView(iconHome)
 
@@ -510,14 +513,25 @@ class MuiMain(InputEventListener, GestureListener, AppEventListener, DisplayEven
         # connect to mui display
         self.display = Display()
         # set birghtness level
-        self.display.setDuty(100) 
+        self._duty = 100
+        self.display.setDuty(self._duty)
         # clear and turn on display
         self.display.clearDisplay()
         self.display.turnOn(0)
 
+        # write UI to display on writer thread
+        # touch event handling does not wait for display.
+        self.pipeline = DisplayPipeline(self.display, max_fps=30)
+        self.pipeline.start()
+
+        # current app and views are used only while holding this lock.
+        # startup runs on main thread, touch events on input event loop, and timers of
+        # gesture detector and display manager on FrameClock, so every callback below takes it.
+        self._uiLock = RLock()
+
         # create display manager(for auto turn off display)
-        # after 15 seconds from last user touch to mui, turn off display.
-        self.display_manager = DisplayManager(self, time_to_dismiss=15) 
+        # after 10 seconds from last user touch to mui, dim display, and after 15 seconds, turn off display.
+        self.display_manager = DisplayManager(self, time_to_dismiss=15, time_to_dim=10)
 
         # create base application and set it to current application
         self.app = self._baseApp = HomeApp(appEventListener = self)
@@ -529,25 +543,26 @@ class MuiMain(InputEventListener, GestureListener, AppEventListener, DisplayEven
         self.input.startEventLoop()
 
     def startTask(self):
-        self.app.startTask()
+        with self._uiLock:
+            self.app.startTask()
 
     def updateUI(self, fade=0, turn_on=False, turn_off=False):
-        with mutex:
-            if (fade > 0) and (turn_on is False):
-                # fade out (1 - 4 : 4 is very slow)
-                self.display.turnOff(fade)
-
-            if (turn_on is False) and (turn_off is False):
-                # set layout data
-                self.display.setLayout(self.app.getUI())
-                # update Display internal data buffer (do not refesh display until call refreshDisplay())
-                self.display.updateLayout()
-                # refresh Display
-                self.display.refreshDisplay()
-
-            if (fade > 0) and (turn_off is False):
-                # fade in           
-                self.display.turnOn(fade)
+        if turn_on is True:
+            # fade in (1 - 4 : 4 is very slow)
+            if fade > 0:
+                self.pipeline.turnOn(fade)
+
+        elif turn_off is True:
+            # fade out
+            if fade > 0:
+                self.pipeline.turnOff(fade)
+
+        else:
+            # UI is composed on this thread, and a copy is passed to writer thread.
+            # only latest UI is written to display
+            with self._uiLock:
+                frame = BitMatrix.fromMatrix(self.app.getUI())
+            self.pipeline.requestUpdate(frame, fade)
 
     # ------------------------
     # InputEventListener implementation
@@ -560,12 +575,13 @@ class MuiMain(InputEventListener, GestureListener, AppEventListener, DisplayEven
                 self.display_manager.startDismissTimer()
             return
 
-        # pass to gesture detector
-        handle = self.gesture_detector.onTouchEvent(e)
+        with self._uiLock:
+            # pass to gesture detector
+            handle = self.gesture_detector.onTouchEvent(e)
 
-        # dispatch touch event to current application
-        if handle is False:
-            self.app.dispatchTouchEvent(e)
+            # dispatch touch event to current application
+            if handle is False:
+                self.app.dispatchTouchEvent(e)
 
         # reset display turn off timer
         self.display_manager.startDismissTimer()
@@ -580,51 +596,81 @@ class MuiMain(InputEventListener, GestureListener, AppEventListener, DisplayEven
     def setNextApp(self, app):
         self.display_manager.startDismissTimer()
 
-        # stop old application task
-        self.app.stopTask()
+        with self._uiLock:
+            # stop old application task
+            self.app.stopTask()
 
-        # change current application
-        self.app = app
-        # update UI
-        self.updateUI(2)
-        # start new application task
-        self.app.startTask()
+            # change current application
+            self.app = app
+            # update UI
+            self.updateUI(2)
+            # start new application task
+            self.app.startTask()
 
 
     def onCloseApp(self, app):
         self.display_manager.startDismissTimer()
 
-        # close current application, so return to base application
-        self.app = self._baseApp
-        self.updateUI(2)
-        self.app.startTask()
+        with self._uiLock:
+            # close current application, so return to base application
+            self.app = self._baseApp
+            self.updateUI(2)
+            self.app.startTask()
 
     def onChangeDuty(self, duty):
         # request brightness change to display class
-        self.display.setDuty(duty)
+        with self._uiLock:
+            self._duty = duty
+            self.pipeline.setDuty(duty)
 
     # ------------------------
     # DisplayEventListener implementation
 
     def onDismissTime(self) -> bool:
         # check app allow turn off
-        return self.app.onTurnOffDisplay()
+        with self._uiLock:
+            return self.app.onTurnOffDisplay()
 
     def onDismiss(self):
         # turn off display with fade effect
-        self.updateUI(fade=3, turn_off=True)
+        with self._uiLock:
+            self.updateUI(fade=3, turn_off=True)
+
+    def onDim(self):
+        # lower brightness. duty is sent with turn on request.
+        with self._uiLock:
+            self.pipeline.setDuty(min(DIM_DUTY, self._duty))
+            self.pipeline.turnOn(0)
+
+    def onWake(self):
+        # restore brightness
+        with self._uiLock:
+            self.pipeline.setDuty(self._duty)
+            self.pipeline.turnOn(0)
 
 
     # ------------------------
     # GestureListener implementation
 
+    def onScroll(self, e1: MotionEvent, e2: MotionEvent, x, y):
+        # scroll event occured, pass to current application
+        with self._uiLock:
+            return self.app.dispatchScrollEvent(e1, e2, x, y)
+
     def onFling(self, e1: MotionEvent, e2: MotionEvent, x, y):
         # swipe event occured, pass to current application
-        return self.app.dispatchFlingEvent(e1, e2, x, y)
+        with self._uiLock:
+            return self.app.dispatchFlingEvent(e1, e2, x, y)
 
     def onLongPress(self, e: MotionEvent):
-        # long press event occured, pass to current application
-        self.app.dispatchLongPressEvent(e)
+        # long press event occured on gesture detector timer, pass to current application
+        with self._uiLock:
+            self.app.dispatchLongPressEvent(e)
+
+    def onDoubleTap(self, e: MotionEvent):
+        # double tap event occured, pass to current application
+        with self._uiLock:
+            return self.app.dispatchDoubleTapEvent(e)
 
 
 
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+
+import numpy as np
+
+from mui_ui.matrix import Matrix
+from mui_ui.compositor import Compositor
+from mui_ui.parts import AbsParts
+from mui_ui.image import Image
+from mui_ui.keyboard import Keyboard
+from mui_ui.input import MotionEvent, VALUE_UP
+
+
+class _Block(AbsParts):
+    """filled rectangle"""
+
+    def __init__(self, x, y, width, height):
+        super().__init__('block')
+        self.setSize(x, y, width, height)
+        self._m = Matrix(width, height)
+        self._m.matrix[:, :] = 1
+
+    def getMatrix(self):
+        self._m.startX = self.x
+        self._m.startY = self.y
+        return self._m
+
+
+def full_compose(views, x, y, width, height):
+    return Compositor(width, height).compose(views, x, y, width, height).asarray()
+
+
+class CompositorTestSuite(unittest.TestCase):
+    """Retained compositor and change detection of views."""
+
+    def assertComposed(self, compositor, views, x=0, y=0, width=200, height=32):
+        frame = compositor.compose(views, x, y, width, height)
+        self.assertTrue(np.array_equal(frame.asarray(), full_compose(views, x, y, width, height)))
+        return frame
+
+    def test_dirty_rect(self):
+        a = _Block(0, 0, 10, 10)
+        b = _Block(50, 5, 20, 10)
+        compositor = Compositor()
+        self.assertComposed(compositor, [a, b])
+        self.assertEqual(compositor.dirtyRect, (0, 0, 200, 32))
+
+        # nothing changed
+        self.assertComposed(compositor, [a, b])
+        self.assertIsNone(compositor.dirtyRect)
+
+        # old and new bounds of moved view
+        b.setSize(60, 5, 20, 10)
+        self.assertComposed(compositor, [a, b])
+        self.assertEqual(compositor.dirtyRect, (50, 5, 30, 10))
+        self.assertEqual([v for v, _, _ in compositor.dirtyViews], [b])
+
+        b.visible = False
+        self.assertComposed(compositor, [a, b])
+        self.assertEqual(compositor.dirtyRect, (60, 5, 20, 10))
+
+        a.invalidate()
+        self.assertComposed(compositor, [a, b])
+        self.assertEqual(compositor.dirtyRect, (0, 0, 10, 10))
+
+    def test_order(self):
+        a = _Block(0, 0, 10, 10)
+        b = _Block(5, 5, 10, 10)
+        compositor = Compositor()
+        self.assertComposed(compositor, [a, b])
+        self.assertComposed(compositor, [b, a])
+        self.assertEqual(compositor.dirtyRect, (0, 0, 200, 32))
+
+    def test_image_offset(self):
+        image = Image()
+        data = Matrix(10, 20)
+        data.matrix[0:10, :] = 1
+        image.setImageData(data)
+        image.setSize(0, 0, 10, 10)
+
+        # image is larger than the frame, so bounds do not change by scroll
+        compositor = Compositor(10, 10)
+        frame = self.assertComposed(compositor, [image], width=10, height=10)
+        self.assertEqual(frame.asarray().sum(), 100)
+
+        image.offset_y = 10
+        frame = self.assertComposed(compositor, [image], width=10, height=10)
+        self.assertEqual(frame.asarray().sum(), 0)
+
+        image.offset_x = 5
+        image.offset_y = 5
+        frame = self.assertComposed(compositor, [image], width=10, height=10)
+        self.assertEqual(frame.asarray()[0:5, 0:5].sum(), 25)
+        self.assertEqual(frame.asarray().sum(), 25)
+
+    def test_keyboard_scroll(self):
+        keyboard = Keyboard()
+        before = keyboard.getMatrix().asarray().copy()
+
+        def tap(view):
+            e = MotionEvent()
+            e.action = VALUE_UP
+            e.x = view.x + 2
+            e.y = view.y + 2
+            keyboard.dispatchTouchEvent(e)
+
+        for view, offset in ((keyboard._btnDown, 10), (keyboard._btnDown, 20), (keyboard._btnUp, 10)):
+            tap(view)
+            self.assertEqual(keyboard._keytop.offset_y, offset)
+            m = keyboard.getMatrix()
+            expected = full_compose(keyboard._partsList, keyboard.x, keyboard.y, keyboard.width, keyboard.height)
+            self.assertTrue(np.array_equal(m.asarray(), expected))
+
+        self.assertFalse(np.array_equal(keyboard.getMatrix().asarray(), before))
+
+
+if __name__ == '__main__':
+    unittest.main()
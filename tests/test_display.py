@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import asyncio
+import threading
+import unittest
+
+from mui_ui.matrix import Matrix, BitMatrix
+from mui_ui.display import Display, AsyncDisplay
+from mui_ui.display_scheduler import CommandScheduler
+from mui_ui.emulator import PanelEmulator, EmulatedSerial
+
+
+def random_matrix(seed):
+    import random
+    rnd = random.Random(seed)
+    m = Matrix(200, 32)
+    for _ in range(rnd.randint(0, 4)):
+        x0 = rnd.randrange(200)
+        y0 = rnd.randrange(32)
+        for y in range(y0, min(32, y0 + rnd.randint(1, 10))):
+            for x in range(x0, min(200, x0 + rnd.randint(1, 20))):
+                m.matrix[y][x] = rnd.randint(0, 1)
+    return m
+
+
+class DisplayTestSuite(unittest.TestCase):
+    """Display on panel emulator."""
+
+    def setUp(self):
+        self.panel = PanelEmulator()
+        self.port = EmulatedSerial(self.panel, realtime=False)
+        self.display = Display(port=self.port, ack_timeout=0.2)
+
+    def tearDown(self):
+        self.display.close()
+
+    def assertFrame(self, m):
+        expected = BitMatrix.fromMatrix(m)
+        for y in range(32):
+            self.assertEqual(bytes(self.panel.frame.bits[y]), bytes(expected.bits[y]))
+
+    def test_frames(self):
+        for i in range(30):
+            m = random_matrix(i)
+            self.display.setLayout(m)
+            self.display.updateLayout()
+            self.assertTrue(self.display.refreshDisplay().result())
+            self.assertFrame(m)
+
+        self.assertEqual(self.panel.errors, 0)
+        self.assertEqual(self.display.stats.failed, 0)
+
+    def test_turn_on_off(self):
+        self.display.setDuty(40)
+        self.assertTrue(self.display.turnOn(2))
+        self.assertTrue(self.panel.on)
+        self.assertEqual(self.panel.duty, 40)
+        self.assertTrue(self.display.turnOff(1))
+        self.assertFalse(self.panel.on)
+
+    def test_version(self):
+        self.assertEqual(self.display.getVersion(), self.panel.version)
+
+    def test_retry(self):
+        m = random_matrix(100)
+        self.display.setLayout(m)
+        self.display.updateLayout()
+        self.display.flush()
+
+        self.panel.nackNext(1)
+        self.assertTrue(self.display.turnOn(0))
+        self.panel.dropNext(1)
+        self.assertTrue(self.display.refreshDisplay().result())
+        self.assertFrame(m)
+        self.assertEqual(self.display.stats.nack, 1)
+        self.assertEqual(self.display.stats.timeout, 1)
+
+    def test_link_time(self):
+        self.display.clearDisplay()
+        self.display.flush()
+        # full layout packet(813 bytes) and refresh packet(8 bytes) with their responses
+        self.assertAlmostEqual(self.port.linkTime, (813 + 8 + 6 + 6) * 10 / 460800)
+
+
+class _SilentPort(object):
+    """port of display which does not respond"""
+
+    def __init__(self):
+        self.timeout = None
+        self.written = []
+
+    def write(self, data):
+        self.written.append(bytes(data))
+
+    def read(self, size=1):
+        time.sleep(min(self.timeout or 0, 0.01))
+        return b''
+
+    def reset_input_buffer(self):
+        pass
+
+
+class _UnpluggedPort(_SilentPort):
+    """port of display which is unplugged while reading"""
+
+    def read(self, size=1):
+        raise OSError("device disconnected")
+
+
+class CommandSchedulerTestSuite(unittest.TestCase):
+    """Threaded command scheduler."""
+
+    def test_stop_while_waiting(self):
+        port = _SilentPort()
+        scheduler = CommandScheduler(port, window=1, ack_timeout=0.2, retry=0)
+        scheduler.start()
+        first = scheduler.submit(b'first')
+
+        # second packet waits for free window
+        futures = []
+        t = threading.Thread(target=lambda: futures.append(scheduler.submit(b'second')))
+        t.start()
+        time.sleep(0.05)
+        self.assertEqual(futures, [])
+
+        scheduler.stop()
+        t.join(1)
+        self.assertFalse(t.is_alive())
+        self.assertIsNone(first.result(0))
+        self.assertIsNone(futures[0].result(0))
+        # packet is not sent after stop
+        self.assertEqual(port.written, [b'first'])
+        self.assertEqual(scheduler.inflight, 0)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.submit(b'third')
+
+    def test_port_error(self):
+        scheduler = CommandScheduler(_UnpluggedPort(), window=2, ack_timeout=0.2)
+        scheduler.start()
+        future = scheduler.submit(b'first')
+
+        # reader thread stops and gives up packets in flight
+        self.assertIsNone(future.result(1))
+        self.assertTrue(scheduler.flush(1))
+        with self.assertRaises(RuntimeError):
+            scheduler.submit(b'second')
+        scheduler.stop()
+
+
+class AsyncDisplayTestSuite(unittest.TestCase):
+    """AsyncDisplay on panel emulator."""
+
+    def test_cancel_and_drop(self):
+        panel = PanelEmulator()
+
+        async def main():
+            # following packets wait in queue until the dropped packet is given up
+            display = AsyncDisplay(port=EmulatedSerial(panel), ack_timeout=0.05, retry=0, window=1)
+            # caller gives up before the dropped packet times out
+            panel.dropNext(1)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(display.getVersion(), 0.005)
+
+            # given up packet does not stop following packets
+            self.assertEqual(await asyncio.wait_for(display.getVersion(), 1), panel.version)
+            self.assertTrue(await asyncio.wait_for(display.turnOn(0), 1))
+            self.assertEqual(display.stats.failed, 1)
+            display.close()
+
+        asyncio.run(main())
+        self.assertTrue(panel.on)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import threading
+import unittest
+from unittest import mock
+
+from mui_ui.frame_clock import FrameClock
+from mui_ui.display_manager import DisplayManager, DisplayEventListener, STATE_ON, STATE_DIM, STATE_OFF
+
+
+class _Listener(DisplayEventListener):
+
+    def __init__(self):
+        self.events = []
+
+    def onDismissTime(self):
+        return True
+
+    def onDismiss(self):
+        self.events.append('off')
+
+    def onDim(self):
+        self.events.append('dim')
+
+    def onWake(self):
+        self.events.append('wake')
+
+
+class DisplayManagerTestSuite(unittest.TestCase):
+    """Idle stages and timer cost of DisplayManager."""
+
+    def setUp(self):
+        self.clock = FrameClock(fps=100)
+        self._shared = FrameClock._instance
+        FrameClock._instance = self.clock
+        self.listener = _Listener()
+
+    def tearDown(self):
+        self.clock.stop()
+        FrameClock._instance = self._shared
+
+    def test_stages(self):
+        manager = DisplayManager(self.listener, time_to_dismiss=0.3, time_to_dim=0.1)
+        manager.startDismissTimer()
+        time.sleep(0.2)
+        self.assertEqual(manager.state, STATE_DIM)
+
+        manager.startDismissTimer()
+        self.assertEqual(manager.state, STATE_ON)
+        time.sleep(0.5)
+        self.assertEqual(self.listener.events, ['dim', 'wake', 'dim', 'off'])
+        self.assertEqual(manager.state, STATE_OFF)
+        self.assertFalse(manager.on)
+
+    def test_touch_stream(self):
+        # 200 Hz touch stream for 1 second
+        manager = DisplayManager(self.listener, time_to_dismiss=0.2, time_to_dim=0.1)
+        manager.startDismissTimer()
+        queued = 0
+        with mock.patch.object(threading.Thread, 'start', autospec=True, side_effect=threading.Thread.start) as start:
+            end = time.monotonic() + 1
+            while time.monotonic() < end:
+                manager.startDismissTimer()
+                queued = max(queued, len(self.clock._queue))
+                time.sleep(0.005)
+
+            self.assertEqual(start.call_count, 0)
+
+        # one timer is reused for all events
+        self.assertEqual(queued, 1)
+        self.assertEqual(self.listener.events, [])
+
+        time.sleep(0.4)
+        self.assertEqual(self.listener.events, ['dim', 'off'])
+
+    def test_touch_while_dismissing(self):
+        manager = DisplayManager(self.listener, time_to_dismiss=0.1)
+
+        # user touches while app is asked whether display can turn off
+        def onDismissTime():
+            manager.startDismissTimer()
+            return True
+
+        self.listener.onDismissTime = onDismissTime
+        manager.startDismissTimer()
+        time.sleep(0.15)
+        self.assertEqual(self.listener.events, [])
+        self.assertEqual(manager.state, STATE_ON)
+
+        del self.listener.onDismissTime
+        time.sleep(0.15)
+        self.assertEqual(self.listener.events, ['off'])
+        self.assertEqual(manager.state, STATE_OFF)
+
+
+if __name__ == '__main__':
+    unittest.main()
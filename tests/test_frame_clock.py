@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+
+from mui_ui.frame_clock import FrameClock
+from mui_ui.parts import OnUpdateRequestListener
+from mui_ui.text import Text
+from mui_ui.clock import DigitalClock
+
+
+class _Listener(OnUpdateRequestListener):
+
+    def __init__(self):
+        self.views = []
+
+    def onUpdateView(self, view):
+        self.views.append(view)
+
+
+class FrameClockTestSuite(unittest.TestCase):
+    """Shared animation scheduler."""
+
+    def setUp(self):
+        # ticks are advanced by the test
+        self.clock = FrameClock(fps=20, threaded=False)
+        self._shared = FrameClock._instance
+        FrameClock._instance = self.clock
+
+    def tearDown(self):
+        self.clock.stop()
+        FrameClock._instance = self._shared
+
+    def run_ticks(self, count):
+        for _ in range(count):
+            self.clock.advance(self.clock._origin + ((self.clock._tick + 1) * self.clock.period))
+
+    def test_schedule(self):
+        calls = []
+        handle = self.clock.schedule(lambda: calls.append(self.clock._tick), 0, 0.5)
+        self.run_ticks(25)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[1] - calls[0], 10)
+
+        handle.cancel()
+        self.run_ticks(20)
+        self.assertEqual(len(calls), 3)
+        self.assertIsNone(self.clock.advance())
+
+    def test_animate(self):
+        steps = []
+
+        def animation():
+            for i in range(3):
+                steps.append(self.clock._tick)
+                yield 0.1
+
+        handle = self.clock.animate(animation())
+        self.run_ticks(10)
+        self.assertEqual(len(steps), 3)
+        self.assertEqual(steps[2] - steps[0], 4)
+        self.assertFalse(handle.active)
+
+    def test_one_frame_per_tick(self):
+        listener = _Listener()
+        views = [Text(str(i)) for i in range(3)]
+        for v in views:
+            v.addOnUpdateViewListener(listener)
+            self.clock.schedule(lambda v=v: self.clock.requestUpdate(v), 0, 0.1)
+
+        self.run_ticks(4)
+        self.assertEqual(len(listener.views), 2)
+        self.assertEqual(self.clock.frameCount, 2)
+
+    def test_digital_clock(self):
+        listener = _Listener()
+        clock = DigitalClock()
+        clock.addOnUpdateViewListener(listener)
+        clock.startTick()
+        self.run_ticks(41)
+        self.assertEqual(len(listener.views), 3)
+
+        clock.stopTick()
+        self.run_ticks(40)
+        self.assertEqual(len(listener.views), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
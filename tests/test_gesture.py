@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import threading
+import unittest
+from unittest import mock
+
+from mui_ui.frame_clock import FrameClock
+from mui_ui.input import MotionEvent, VALUE_DOWN, VALUE_MOVE, VALUE_UP
+from mui_ui.gesturedetector import GestureDetector, GestureListener
+from mui_ui.velocity_tracker import VelocityTracker
+from mui_ui.scroller import Scroller
+
+
+class _Listener(GestureListener):
+
+    def __init__(self):
+        self.events = []
+
+    def onLongPress(self, e):
+        self.events.append(('long', threading.current_thread()))
+
+    def onSingleTapUp(self, e):
+        self.events.append(('tap', threading.current_thread()))
+        return False
+
+    def onSingleTapConfirmed(self, e):
+        self.events.append(('confirmed', threading.current_thread()))
+        return False
+
+    def onDoubleTap(self, e):
+        self.events.append(('double', threading.current_thread()))
+        return True
+
+    def onFling(self, e1, e2, velocityX, velocityY):
+        self.events.append(('fling', threading.current_thread()))
+        self.velocity = (velocityX, velocityY)
+        return True
+
+    def onScroll(self, e1, e2, scrollX, scrollY):
+        self.events.append(('scroll', (scrollX, scrollY)))
+        return True
+
+
+def event(action, x, y, t):
+    e = MotionEvent()
+    e.action = action
+    e.x = x
+    e.y = y
+    e.timestamp = t
+    return e
+
+
+class GestureDetectorTestSuite(unittest.TestCase):
+    """Gestures recognized by timestamps and one shared timer."""
+
+    def setUp(self):
+        # ticks are advanced by the test, on this thread
+        self.clock = FrameClock(fps=100, threaded=False)
+        self._shared = FrameClock._instance
+        FrameClock._instance = self.clock
+        self.listener = _Listener()
+        self.detector = GestureDetector(self.listener, longpress_timeout=0.1, double_tap_timeout=0.1)
+
+    def tearDown(self):
+        self.clock.stop()
+        FrameClock._instance = self._shared
+
+    def wait(self, seconds):
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            self.clock.advance()
+            time.sleep(0.005)
+
+    def names(self):
+        return [name for name, _ in self.listener.events]
+
+    def test_long_press(self):
+        now = time.monotonic()
+        self.detector.onTouchEvent(event(VALUE_DOWN, 10, 10, now))
+        # jitter in the slop does not cancel long press
+        self.detector.onTouchEvent(event(VALUE_MOVE, 12, 11, now + 0.01))
+        self.wait(0.2)
+        self.detector.onTouchEvent(event(VALUE_UP, 12, 11, now + 0.2))
+        self.wait(0.2)
+
+        self.assertEqual(self.names(), ['long'])
+        self.assertIs(self.listener.events[0][1], threading.current_thread())
+
+    def test_long_press_by_timestamp(self):
+        # up event arrives after the deadline before the timer is called
+        self.detector.onTouchEvent(event(VALUE_DOWN, 10, 10, 100))
+        self.detector.onTouchEvent(event(VALUE_UP, 10, 10, 100.5))
+        self.assertEqual(self.names(), ['long'])
+
+    def test_taps(self):
+        now = time.monotonic()
+        self.detector.onTouchEvent(event(VALUE_DOWN, 10, 10, now))
+        self.detector.onTouchEvent(event(VALUE_UP, 10, 10, now + 0.02))
+        self.wait(0.2)
+        self.assertEqual(self.names(), ['tap', 'confirmed'])
+
+        del self.listener.events[:]
+        now = time.monotonic()
+        self.detector.onTouchEvent(event(VALUE_DOWN, 10, 10, now))
+        self.detector.onTouchEvent(event(VALUE_UP, 10, 10, now + 0.02))
+        self.assertTrue(self.detector.onTouchEvent(event(VALUE_DOWN, 11, 10, now + 0.05)))
+        self.detector.onTouchEvent(event(VALUE_UP, 11, 10, now + 0.07))
+        self.wait(0.2)
+        self.assertEqual(self.names(), ['tap', 'double', 'tap'])
+
+    def test_no_thread(self):
+        with mock.patch.object(threading.Thread, 'start', autospec=True, side_effect=threading.Thread.start) as start:
+            now = time.monotonic()
+            for i in range(100):
+                t = now + (i * 0.01)
+                self.detector.onTouchEvent(event(VALUE_DOWN, 10, 10, t))
+                self.detector.onTouchEvent(event(VALUE_MOVE, 100, 10, t + 0.002))
+                self.detector.onTouchEvent(event(VALUE_UP, 150, 10, t + 0.005))
+                self.assertLessEqual(len(self.clock._queue), 1)
+
+            self.assertEqual(start.call_count, 0)
+        self.assertEqual(self.names(), ['scroll', 'fling'] * 100)
+
+    def test_scroll_and_fling(self):
+        now = time.monotonic()
+        self.detector.onTouchEvent(event(VALUE_DOWN, 100, 10, now))
+        for i in range(1, 6):
+            self.detector.onTouchEvent(event(VALUE_MOVE, 100 - (i * 10), 10, now + (i * 0.01)))
+        # up at same time as last move
+        self.detector.onTouchEvent(event(VALUE_UP, 50, 10, now + 0.05))
+
+        scrolls = [delta for name, delta in self.listener.events if name == 'scroll']
+        self.assertEqual(scrolls, [(10, 0)] * 5)
+        self.assertEqual(self.names()[-1], 'fling')
+        self.assertAlmostEqual(self.listener.velocity[0], -1000, delta=1)
+        self.assertEqual(self.listener.velocity[1], 0)
+
+
+class VelocityTrackerTestSuite(unittest.TestCase):
+    """Least squares velocity of recent samples."""
+
+    def test_velocity(self):
+        tracker = VelocityTracker(size=8)
+        # noisy 200 px/s motion, more samples than the buffer
+        for i in range(30):
+            tracker.addSample(i * 0.01, (i * 2) + (i % 2), 5)
+        vx, vy = tracker.computeVelocity()
+        self.assertAlmostEqual(vx, 200, delta=20)
+        self.assertEqual(vy, 0)
+
+    def test_degenerate(self):
+        tracker = VelocityTracker()
+        self.assertEqual(tracker.computeVelocity(), (0, 0))
+        tracker.addSample(1.0, 0, 0)
+        tracker.addSample(1.0, 50, 0)
+        self.assertEqual(tracker.computeVelocity(), (0, 0))
+
+        # pointer stopped, then released
+        tracker.clear()
+        tracker.addSample(1.0, 0, 0)
+        tracker.addSample(1.01, 10, 0)
+        tracker.addSample(1.5, 10, 0)
+        self.assertEqual(tracker.computeVelocity(), (0, 0))
+
+
+class ScrollerTestSuite(unittest.TestCase):
+    """Kinetic scroll on FrameClock."""
+
+    def setUp(self):
+        self.clock = FrameClock(fps=100, threaded=False)
+        self._shared = FrameClock._instance
+        FrameClock._instance = self.clock
+
+    def tearDown(self):
+        self.clock.stop()
+        FrameClock._instance = self._shared
+
+    def test_fling(self):
+        steps = []
+        scroller = Scroller(lambda dx, dy: steps.append((dx, dy)), friction=10)
+        scroller.fling(500, 0)
+        while scroller.finished is False:
+            self.clock.advance()
+            time.sleep(0.005)
+
+        total = sum(dx for dx, _ in steps)
+        self.assertAlmostEqual(total, scroller.distance(500), delta=2)
+        # slows down
+        self.assertGreater(steps[0][0], steps[-1][0])
+        self.assertTrue(all(dy == 0 for _, dy in steps))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image as ImgLib
+
+from mui_ui.image import Image, BitmapCache, decode_image
+from mui_ui.asset_bundle import AssetBundle, build_bundle, register_bundle
+
+
+class BitmapCacheTestSuite(unittest.TestCase):
+    """Image decoding and bitmap cache."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'icon.png')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def save(self, pixels, mtime):
+        im = ImgLib.new('RGBA', (4, 2), (255, 255, 255, 255))
+        for x, y in pixels:
+            im.putpixel((x, y), (0, 0, 0, 255))
+        im.save(self.path)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_decode(self):
+        self.save([(0, 0), (3, 1)], 1000)
+        self.assertEqual(decode_image(self.path).asarray().tolist(), [[1, 0, 0, 0], [0, 0, 0, 1]])
+
+    def test_decode_1bit(self):
+        im = ImgLib.new('1', (4, 2), 1)
+        im.putpixel((1, 0), 0)
+        im.putpixel((2, 1), 0)
+        im.save(self.path)
+        self.assertEqual(decode_image(self.path).asarray().tolist(), [[0, 1, 0, 0], [0, 0, 1, 0]])
+
+    def test_cache(self):
+        cache = BitmapCache()
+        self.save([(1, 1)], 1000)
+        a = cache.load(self.path)
+        b = cache.load(self.path)
+        self.assertEqual(cache.cacheInfo().hits, 1)
+
+        # pixels are shared, position is not
+        self.assertTrue(np.shares_memory(a.asarray(), b.asarray()))
+        b.startX = 10
+        self.assertEqual(a.startX, 0)
+        self.assertEqual(cache.load(self.path).asarray().tolist(), [[0, 0, 0, 0], [0, 1, 0, 0]])
+
+        # changed file is decoded again
+        self.save([(2, 0)], 2000)
+        self.assertEqual(cache.load(self.path).matrix[0][2], 1)
+        self.assertEqual(cache.cacheInfo().misses, 2)
+
+    def test_memory_limit(self):
+        self.save([], 1000)
+        cache = BitmapCache(max_bytes=4 * 2 * 4)
+        cache.load(self.path)
+        self.assertEqual(cache.cacheInfo().count, 1)
+        cache.setMaxBytes(10)
+        self.assertEqual(cache.cacheInfo().count, 0)
+
+
+    def test_bundle(self):
+        self.save([(0, 1), (2, 0)], 1000)
+        path = os.path.join(self.dir.name, 'test.bundle')
+        self.assertEqual(build_bundle(path, [self.dir.name]), 1)
+
+        bundle = register_bundle('test', path)
+        self.assertIn('icon', bundle)
+        self.assertEqual(bundle.getMatrix('icon').asarray().tolist(), decode_image(self.path).asarray().tolist())
+
+        image = Image('bundle://test/icon')
+        self.assertEqual((image.width, image.height), (4, 2))
+        self.assertEqual(image.getMatrix().matrix[1][0], 1)
+        bundle.close()
+
+    def test_broken_bundle(self):
+        self.save([(1, 0)], 1000)
+        path = os.path.join(self.dir.name, 'test.bundle')
+        build_bundle(path, [self.path])
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        # empty, shorter than header, wrong magic, truncated entries and data
+        for broken in (b'', data[:5], b'XXXX' + data[4:], data[:14], data[:-1]):
+            with open(path, 'wb') as f:
+                f.write(broken)
+            with self.assertRaises(ValueError):
+                AssetBundle(path)
+
+    def test_bundle_cache(self):
+        self.save([(1, 0)], 1000)
+        path = os.path.join(self.dir.name, 'test.bundle')
+        build_bundle(path, [self.path])
+        register_bundle('cache', path)
+
+        cache = BitmapCache()
+        a = cache.load('bundle://cache/icon')
+        # bundle file is not checked at cache hit
+        os.remove(path)
+        b = cache.load('bundle://cache/icon')
+        self.assertEqual(cache.cacheInfo()[:2], (1, 1))
+        self.assertTrue(np.shares_memory(a.asarray(), b.asarray()))
+
+        # bundle registered again has other bitmaps
+        self.save([(3, 1)], 2000)
+        build_bundle(path, [self.path])
+        bundle = register_bundle('cache', path)
+        self.assertEqual(cache.load('bundle://cache/icon').asarray().tolist(), [[0, 0, 0, 0], [0, 0, 0, 1]])
+        self.assertEqual(cache.cacheInfo().misses, 2)
+        bundle.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
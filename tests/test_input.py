@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import unittest
+
+from mui_ui.input import InputEvent, EventCoalescer, EventDecoder, Calibration, VALUE_DOWN, VALUE_MOVE, VALUE_UP, BTN_TOUCH
+from mui_ui.input import EV_SYN, EV_KEY, EV_ABS, ABS_X, ABS_Y, ABS_PRESSURE
+from mui_ui.input import COALESCE_NONE, COALESCE_BATCH, COALESCE_FRAME
+from mui_ui.velocity_tracker import VelocityTracker
+
+
+def event(action, x, t, code=BTN_TOUCH):
+    e = InputEvent()
+    e.action = action
+    e.code = code
+    e.x = x
+    e.y = 0
+    e.timestamp = t
+    return e
+
+
+class EventCoalescerTestSuite(unittest.TestCase):
+    """Move coalescing of InputHandler."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.events = []
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_batch(self):
+        coalescer = EventCoalescer(self.events.append, COALESCE_BATCH, loop=self.loop)
+        coalescer.push(event(VALUE_DOWN, 0, 0))
+        # down is not delayed
+        self.assertEqual(len(self.events), 1)
+
+        for i in range(1, 6):
+            coalescer.push(event(VALUE_MOVE, i * 10, i * 0.01))
+        self.assertEqual(len(self.events), 1)
+        coalescer.endBatch()
+
+        move = self.events[-1]
+        self.assertEqual((move.action, move.x), (VALUE_MOVE, 50))
+        self.assertEqual([x for _, x, _ in move.history], [10, 20, 30, 40])
+
+        # history is used for velocity
+        tracker = VelocityTracker()
+        tracker.addMovement(self.events[0])
+        tracker.addMovement(move)
+        self.assertAlmostEqual(tracker.computeVelocity()[0], 1000, delta=1)
+
+        # pending move is delivered before up
+        coalescer.push(event(VALUE_MOVE, 60, 0.06))
+        coalescer.push(event(VALUE_UP, 60, 0.07))
+        self.assertEqual([e.action for e in self.events], [VALUE_DOWN, VALUE_MOVE, VALUE_MOVE, VALUE_UP])
+
+    def test_none(self):
+        coalescer = EventCoalescer(self.events.append, COALESCE_NONE, loop=self.loop)
+        for i in range(5):
+            coalescer.push(event(VALUE_MOVE, i, i * 0.01))
+        self.assertEqual(len(self.events), 5)
+
+    def test_frame(self):
+        coalescer = EventCoalescer(self.events.append, COALESCE_FRAME, move_interval=0.05, loop=self.loop)
+
+        async def feed():
+            # 200 Hz moves for 0.5 seconds, one move per read
+            for i in range(100):
+                coalescer.push(event(VALUE_MOVE, i, i * 0.005))
+                coalescer.endBatch()
+                await asyncio.sleep(0.005)
+            coalescer.push(event(VALUE_UP, 100, 0.5))
+
+        self.loop.run_until_complete(feed())
+
+        moves = [e for e in self.events if e.action == VALUE_MOVE]
+        self.assertLessEqual(len(moves), 15)
+        self.assertEqual(self.events[-1].action, VALUE_UP)
+        self.assertEqual(self.events[-2].x, 99)
+        # no sample is lost
+        self.assertEqual(sum(len(e.history) + 1 for e in moves), 100)
+        self.assertEqual(coalescer.received, 101)
+
+
+class EventDecoderTestSuite(unittest.TestCase):
+    """Calibration and decoding of raw evdev events."""
+
+    def test_calibration(self):
+        cal = Calibration(0, 1000, 0, 1000)
+        self.assertEqual(cal.map(ABS_X, 500), (0, 100))
+        self.assertEqual(cal.map(ABS_Y, 500), (1, 16))
+        # clamped to display
+        self.assertEqual(cal.map(ABS_X, 1000), (0, 199))
+        self.assertEqual(cal.map(ABS_X, -10), (0, 0))
+
+        cal = Calibration(0, 1000, 0, 1000, rotation=180, offset_x=2)
+        self.assertEqual(cal.map(ABS_X, 0), (0, 199))
+        self.assertEqual(cal.map(ABS_X, 900), (0, 22))
+        self.assertEqual(cal.map(ABS_Y, 250), (1, 24))
+
+        # panel axes are swapped
+        cal = Calibration(0, 1000, 0, 1000, rotation=90)
+        self.assertEqual(cal.map(ABS_X, 250), (1, 24))
+        self.assertEqual(cal.map(ABS_Y, 250), (0, 50))
+
+        with self.assertRaises(ValueError):
+            Calibration(0, 1000, 0, 1000, rotation=45)
+
+    def test_decode(self):
+        decoder = EventDecoder('touch', Calibration(0, 1000, 0, 1000))
+        stream = [
+            (EV_KEY, BTN_TOUCH, VALUE_DOWN), (EV_ABS, ABS_X, 100), (EV_ABS, ABS_Y, 500), (EV_ABS, ABS_PRESSURE, 10), (EV_SYN, 0, 0),
+            (EV_ABS, ABS_X, 200), (EV_SYN, 0, 0),
+            (EV_KEY, BTN_TOUCH, VALUE_UP), (EV_SYN, 0, 0),
+            # hover after up
+            (EV_ABS, ABS_X, 300), (EV_SYN, 0, 0),
+        ]
+        frames = []
+        for i, (etype, code, value) in enumerate(stream):
+            e = decoder.feed(1, i * 1000, etype, code, value)
+            if e is not None:
+                frames.append(e)
+
+        self.assertEqual([(e.action, e.x, e.y) for e in frames], [(VALUE_DOWN, 20, 16), (VALUE_MOVE, 40, 16), (VALUE_UP, 40, 16)])
+        self.assertEqual(frames[1].org_x, 200)
+        self.assertEqual(frames[1].code, BTN_TOUCH)
+        self.assertEqual(frames[1].dev_name, 'touch')
+        self.assertAlmostEqual(frames[1].timestamp, 1.006)
+
+
+if __name__ == '__main__':
+    unittest.main()
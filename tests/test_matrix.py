@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+import unittest
+
+import numpy as np
+
+from mui_ui.matrix import Matrix, BitMatrix, BLIT_OR, BLIT_AND, BLIT_XOR, BLIT_COPY, BLIT_MASK
+from mui_ui.matrix import check_diff_range, check_bit_diff_range, check_bit_diff_rects, encode_layout_packet
+
+
+def random_matrix(rnd, w, h):
+    m = Matrix(w, h)
+    for y in range(h):
+        for x in range(w):
+            m.matrix[y][x] = 1 if rnd.random() < 0.4 else 0
+    return m
+
+
+def naive_blit(dst, src, bX, bY, mode):
+    for y in range(dst.height):
+        for x in range(dst.width):
+            sx = x + dst.startX - bX
+            sy = y + dst.startY - bY
+            if (0 <= sx < src.width) and (0 <= sy < src.height):
+                s = 1 if src.matrix[sy][sx] != 0 else 0
+                d = dst.matrix[y][x]
+                if mode == BLIT_OR:
+                    d = d | s
+                elif mode == BLIT_AND:
+                    d = d & s
+                elif mode == BLIT_XOR:
+                    d = d ^ s
+                elif mode == BLIT_MASK:
+                    d = d & (1 - s)
+                else:
+                    d = s
+                dst.matrix[y][x] = d
+
+
+class MatrixTestSuite(unittest.TestCase):
+    """Matrix blit and numpy bridge."""
+
+    def test_blit_modes(self):
+        rnd = random.Random(0)
+        for i in range(200):
+            dst = random_matrix(rnd, rnd.choice([8, 30, 200]), rnd.choice([8, 11, 32]))
+            dst.startX = rnd.randint(-10, 10)
+            dst.startY = rnd.randint(-5, 5)
+            src = random_matrix(rnd, rnd.randint(1, 40), rnd.randint(1, 20))
+            bX = rnd.randint(-30, 220)
+            bY = rnd.randint(-20, 40)
+            mode = rnd.choice([BLIT_OR, BLIT_AND, BLIT_XOR, BLIT_COPY, BLIT_MASK])
+
+            expected = Matrix(dst.width, dst.height)
+            expected.copy(dst)
+            naive_blit(expected, src, bX, bY, mode)
+
+            dst.blit(src, bX, bY, mode)
+            self.assertTrue(np.array_equal(dst.asarray(), expected.asarray()))
+
+    def test_merge_uses_start(self):
+        dst = Matrix(200, 32)
+        src = Matrix(8, 8)
+        src.matrix[:, :] = 1
+        src.startX = 196
+        src.startY = 30
+        dst.merge(src)
+        a = dst.asarray()
+        self.assertEqual(a.sum(), 4 * 2)
+        self.assertEqual(a[30:32, 196:200].sum(), 8)
+
+    def test_asarray_shares_memory(self):
+        m = Matrix(10, 4)
+        a = m.asarray()
+        self.assertEqual(a.shape, (4, 10))
+        a[1, 2] = 1
+        self.assertEqual(m.matrix[1][2], 1)
+
+    def test_fromarray(self):
+        a = np.zeros((32, 200), dtype=np.uint8)
+        a[5, 7] = 255
+        m = Matrix.fromarray(a)
+        self.assertEqual((m.width, m.height), (200, 32))
+        self.assertEqual(m.matrix[5][7], 1)
+        self.assertEqual(m.asarray().sum(), 1)
+
+        shared = np.zeros((4, 8), dtype=np.intc)
+        m = Matrix.fromarray(shared, copy=False)
+        shared[2, 3] = 1
+        self.assertEqual(m.matrix[2][3], 1)
+
+    def test_frombuffer(self):
+        m = Matrix.frombuffer(bytes([0, 1, 0, 2, 0, 0]), 3, 2)
+        self.assertEqual(m.asarray().tolist(), [[0, 1, 0], [1, 0, 0]])
+
+        m = Matrix.frombuffer(bytes([0x80, 0x01, 0x40, 0x00]), 12, 2, packed=True)
+        b = BitMatrix.fromMatrix(m)
+        self.assertEqual(bytes(b.asarray().ravel()), bytes([0x80, 0x00, 0x40, 0x00]))
+        self.assertEqual(m.matrix[0][0], 1)
+        self.assertEqual(m.matrix[1][1], 1)
+
+
+class BitMatrixTestSuite(unittest.TestCase):
+    """Packed 1 bit matrix."""
+
+    def test_pack(self):
+        rnd = random.Random(1)
+        for w in (1, 7, 8, 13, 200):
+            m = random_matrix(rnd, w, 3)
+            b = BitMatrix.fromMatrix(m)
+            self.assertEqual(b.stride, (w + 7) // 8)
+            self.assertTrue(np.array_equal(b.toMatrix().asarray(), m.asarray()))
+            for x in range(w):
+                self.assertEqual(b.get(x, 1), m.matrix[1][x])
+
+            # padding bits are zero
+            if w % 8 != 0:
+                self.assertEqual(b.bits[0][b.stride - 1] & (0xFF >> (w % 8)), 0)
+
+        b = BitMatrix.frombytes(bytes([0x80, 0x01, 0xFF, 0x00]), 16, 2)
+        self.assertEqual((b.get(0, 0), b.get(15, 0), b.get(7, 1), b.get(8, 1)), (1, 1, 1, 0))
+        with self.assertRaises(ValueError):
+            BitMatrix.frombytes(bytes(3), 16, 2)
+
+    def test_merge(self):
+        rnd = random.Random(2)
+        for i in range(300):
+            w = rnd.choice([13, 64, 200])
+            h = rnd.choice([5, 32])
+            dst = random_matrix(rnd, w, h)
+            src = random_matrix(rnd, rnd.randint(1, 40), rnd.randint(1, 12))
+            src.startX = rnd.randint(-45, w + 5)
+            src.startY = rnd.randint(-13, h + 1)
+
+            bits = BitMatrix.fromMatrix(dst)
+            if i % 2 == 0:
+                bits.merge(BitMatrix.fromMatrix(src))
+            else:
+                bits.merge(src)
+            dst.merge(src)
+            self.assertTrue(np.array_equal(bits.toMatrix().asarray(), dst.asarray()), (w, h, src.startX, src.startY))
+
+            # nothing is drawn in padding bits
+            if w % 8 != 0:
+                self.assertEqual(int(bits.asarray()[:, -1].max()) & (0xFF >> (w % 8)), 0)
+
+    def test_copy(self):
+        a = BitMatrix.fromMatrix(random_matrix(random.Random(3), 30, 4))
+        a.startX = 5
+        b = BitMatrix(1, 1)
+        b.copy(a)
+        self.assertEqual((b.width, b.height, b.stride, b.startX), (30, 4, 4, 5))
+        self.assertTrue(np.array_equal(b.asarray(), a.asarray()))
+
+        # copy does not share memory
+        b.set(0, 0, 1 - a.get(0, 0))
+        self.assertNotEqual(b.get(0, 0), a.get(0, 0))
+
+    def test_diff_range(self):
+        rnd = random.Random(4)
+        for i in range(100):
+            a = random_matrix(rnd, 200, 32)
+            b = Matrix(200, 32)
+            b.copy(a)
+            for _ in range(rnd.randint(0, 5)):
+                x = rnd.randrange(200)
+                y = rnd.randrange(32)
+                b.matrix[y][x] = 1 - b.matrix[y][x]
+
+            expected = check_diff_range(a.matrix, b.matrix)
+            self.assertEqual(check_bit_diff_range(BitMatrix.fromMatrix(a), BitMatrix.fromMatrix(b)), expected)
+
+        same = BitMatrix(200, 32)
+        self.assertEqual(check_bit_diff_range(same, BitMatrix(200, 32)), (200, -1, 32, -1))
+
+
+class LayoutPacketTestSuite(unittest.TestCase):
+    """Layout packet encoding."""
+
+    def test_packet(self):
+        m = Matrix(200, 32)
+        m.matrix[3][16] = 1
+        m.matrix[3][31] = 1
+        m.matrix[4][23] = 1
+        buf = bytearray(32)
+        size = encode_layout_packet(m, 16, 3, 16, 2, buf)
+
+        data = [0x80, 0x01, 0x01, 0x00]
+        # length, command 00 02, x, y, w, h, layout data
+        expected = [0x00, 0x0F, 0x00, 0x02, 0x00, 16, 0x00, 3, 0x00, 16, 0x00, 2] + data
+        expected.append(sum(expected[2:]) & 0xFF)
+        self.assertEqual(size, 17)
+        self.assertEqual(list(buf[:size]), expected)
+
+    def test_full_frame(self):
+        m = random_matrix(random.Random(5), 200, 32)
+        buf = bytearray(813)
+        self.assertEqual(encode_layout_packet(m, 0, 0, 200, 32, buf), 813)
+
+        # length over 255 and checksum over sum of all bytes after length
+        self.assertEqual((buf[0] << 8) | buf[1], 811)
+        self.assertEqual(buf[812], sum(buf[2:812]) & 0xFF)
+        self.assertEqual(bytes(buf[12:812]), bytes(BitMatrix.fromMatrix(m).asarray().ravel()))
+
+    def test_sources(self):
+        # Matrix and BitMatrix make same packet
+        rnd = random.Random(6)
+        m = random_matrix(rnd, 200, 32)
+        bits = BitMatrix.fromMatrix(m)
+        for _ in range(50):
+            x = rnd.randrange(25) * 8
+            w = rnd.randint(1, 25 - (x // 8)) * 8
+            y = rnd.randrange(32)
+            h = rnd.randint(1, 32 - y)
+            a = bytearray(813)
+            b = bytearray(813)
+            size = encode_layout_packet(m, x, y, w, h, a)
+            self.assertEqual(encode_layout_packet(bits, x, y, w, h, b), size)
+            self.assertEqual(size, ((w // 8) * h) + 13)
+            self.assertEqual(a[:size], b[:size])
+
+    def test_small_buffer(self):
+        with self.assertRaises(ValueError):
+            encode_layout_packet(Matrix(200, 32), 0, 0, 200, 32, bytearray(812))
+
+
+class DiffRectsTestSuite(unittest.TestCase):
+    """Changed areas and cost model merge of check_bit_diff_rects."""
+
+    def diff(self, points, overhead=13):
+        a = BitMatrix(200, 32)
+        b = BitMatrix(200, 32)
+        for x, y in points:
+            b.set(x, y, 1)
+        return check_bit_diff_rects(a, b, overhead)
+
+    def test_same(self):
+        self.assertEqual(check_bit_diff_rects(BitMatrix(200, 32), BitMatrix(200, 32)), [])
+
+    def test_band(self):
+        # x and width are aligned to 8 dots band, rows are tight
+        self.assertEqual(self.diff([(10, 4), (12, 9)]), [(8, 4, 8, 6)])
+
+    def test_merged(self):
+        # neighbor bands : 2 bytes + 13 in one packet <= 1 + 1 + 26 in two packets
+        self.assertEqual(self.diff([(3, 5), (9, 5)]), [(0, 5, 16, 1)])
+        # gap of unchanged bands is cheaper than another header
+        self.assertEqual(self.diff([(3, 5), (35, 5)]), [(0, 5, 40, 1)])
+
+    def test_separated(self):
+        # far corners : 25 * 32 bytes + 13 in one packet > 1 + 1 + 26 in two packets
+        self.assertEqual(self.diff([(0, 0), (199, 31)]), [(0, 0, 8, 1), (192, 31, 8, 1)])
+        # 2 * 32 + overhead in one packet <= 1 + 1 + 2 * overhead in two packets from overhead 62
+        self.assertEqual(self.diff([(0, 0), (8, 31)], overhead=61), [(0, 0, 8, 1), (8, 31, 8, 1)])
+        self.assertEqual(self.diff([(0, 0), (8, 31)], overhead=62), [(0, 0, 16, 32)])
+
+    def test_cover(self):
+        rnd = random.Random(7)
+        for _ in range(100):
+            a = random_matrix(rnd, 200, 32)
+            b = Matrix(200, 32)
+            b.copy(a)
+            for _ in range(rnd.randint(1, 8)):
+                x = rnd.randrange(200)
+                y = rnd.randrange(32)
+                b.matrix[y][x] = 1 - b.matrix[y][x]
+
+            rects = check_bit_diff_rects(BitMatrix.fromMatrix(a), BitMatrix.fromMatrix(b))
+            changed = a.asarray() != b.asarray()
+            covered = np.zeros(changed.shape, dtype=bool)
+            for x, y, w, h in rects:
+                self.assertEqual((x % 8, w % 8), (0, 0))
+                covered[y:y + h, x:x + w] = True
+            # every changed dot is sent, rects are ordered and do not overlap
+            self.assertFalse((changed & ~covered).any())
+            for r0, r1 in zip(rects, rects[1:]):
+                self.assertLessEqual(r0[0] + r0[2], r1[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import subprocess
+import unittest
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def run(source):
+    # fresh interpreter, so modules imported by other tests do not matter
+    code = 'import sys\nsys.path.insert(0, {0!r})\n'.format(root) + source
+    return subprocess.check_output([sys.executable, '-c', code]).decode().strip()
+
+
+class PackageTestSuite(unittest.TestCase):
+    """Lazy loading of mui_ui package."""
+
+    def test_import(self):
+        out = run("import mui_ui\n"
+                  "print(sorted(m for m in sys.modules if m.startswith('mui_ui.')))")
+        self.assertEqual(out, '[]')
+
+    def test_text_only(self):
+        out = run("from mui_ui import Text\n"
+                  "t = Text('mui')\n"
+                  "t.setSize(0, 0, 200, 32)\n"
+                  "t.getMatrix()\n"
+                  "print(sorted(m for m in ('serial', 'evdev', 'PIL', 'multiping', 'RPi', 'mui_ui.display', 'mui_ui.wifi_utility') if m in sys.modules))")
+        self.assertEqual(out, '[]')
+
+    def test_names(self):
+        import mui_ui
+
+        for name in mui_ui.__all__:
+            if name == 'MuiNetworkUtil':
+                # needs multiping
+                continue
+            self.assertIsNotNone(getattr(mui_ui, name), name)
+        self.assertIn('Text', dir(mui_ui))
+        with self.assertRaises(AttributeError):
+            mui_ui.NoSuchView
+
+
+if __name__ == '__main__':
+    unittest.main()
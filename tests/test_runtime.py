@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import asyncio
+import threading
+import unittest
+
+from mui_ui import Runtime, AbsApp, Text, BitMatrix, MotionEvent, VALUE_DOWN
+from mui_ui.emulator import PanelEmulator, EmulatedSerial
+
+
+class _App(AbsApp):
+
+    def __init__(self, listener):
+        super().__init__(listener)
+        self.text = Text('mui')
+        self.text.setSize(0, 0, 200, 32)
+        self.addView(self.text)
+        self.started = 0
+        self.longpress = []
+
+    def startTask(self):
+        self.started += 1
+
+    def stopTask(self):
+        pass
+
+    def onTurnOffDisplay(self):
+        return True
+
+    def dispatchLongPressEvent(self, e):
+        self.longpress.append(threading.current_thread())
+
+
+def touch_down(x, y):
+    e = MotionEvent()
+    e.action = VALUE_DOWN
+    e.x = x
+    e.y = y
+    e.timestamp = time.time()
+    return e
+
+
+class RuntimeTestSuite(unittest.TestCase):
+    """asyncio application runtime against the panel emulator."""
+
+    def setUp(self):
+        self.panel = PanelEmulator()
+        self.runtime = Runtime(port=EmulatedSerial(self.panel), input=False, longpress_timeout=0.2, time_to_dismiss=0.5)
+        self.app = _App(self.runtime)
+
+    def run_async(self, coro):
+        threads = threading.active_count()
+        asyncio.run(coro)
+        # display I/O and timers do not start threads
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_frames(self):
+        async def main():
+            await self.runtime.start(self.app)
+            for i in range(20):
+                self.app.text.setText(str(i))
+                self.app.updateRequest(0)
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.1)
+            await self.runtime.stop()
+
+        self.run_async(main())
+        self.assertEqual(self.app.started, 1)
+        self.assertTrue(self.panel.on)
+        # requests are merged while a frame is in flight
+        self.assertLess(self.runtime.frameCount, 20)
+        self.assertEqual(bytes(self.panel.frame.bits), bytes(BitMatrix.fromMatrix(self.app.getUI()).bits))
+
+    def test_timers(self):
+        async def main():
+            await self.runtime.start(self.app)
+            self.runtime.onInputEvent(touch_down(10, 10))
+            await asyncio.sleep(0.8)
+            await self.runtime.stop()
+
+        self.run_async(main())
+        self.assertEqual(self.app.longpress, [threading.main_thread()])
+        self.assertFalse(self.panel.on)
+
+    def test_retry(self):
+        # display is not turned off while the test
+        self.runtime.display_manager.time_to_dismiss = 60
+
+        async def main():
+            await self.runtime.start(self.app)
+            display = self.runtime.display
+            self.assertEqual(await display.getVersion(), self.panel.version)
+            self.assertTrue(await display.flush())
+
+            self.panel.nackNext()
+            self.panel.dropNext()
+            self.assertTrue(await display.turnOn(1))
+            self.assertEqual(display.stats.nack, 1)
+            self.assertEqual(display.stats.timeout, 1)
+            await self.runtime.stop()
+
+        self.run_async(main())
+
+
+if __name__ == '__main__':
+    unittest.main()
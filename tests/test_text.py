@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from mui_ui.matrix import Matrix
+from mui_ui.muifont import MuiFont, Glyph, fontAtlasFile
+from mui_ui.font_atlas import FontAtlas
+from mui_ui.text import Text, TextLayout, Border, LINE_OFFSET
+
+
+class _Font(object):
+    """font of 5 dots width, 'W' is 9 dots"""
+
+    def getGlyph(self, s):
+        w = 9 if s == 'W' else 5
+        return Glyph(ord(s), w, 8, Matrix(w, 8))
+
+
+class MuiFontTestSuite(unittest.TestCase):
+    """Glyph cache of MuiFont."""
+
+    def test_cache(self):
+        font = MuiFont(cache_size=2)
+        a = font.getGlyph('A')
+        self.assertIs(font.getGlyph('A'), a)
+        self.assertEqual(font.cacheInfo(), (1, 1, 2, 1))
+
+        # least recently used glyph is dropped
+        font.getGlyph('B')
+        font.getGlyph('A')
+        font.getGlyph('C')
+        self.assertEqual(font.cacheInfo().currsize, 2)
+        self.assertIs(font.getGlyph('A'), a)
+        self.assertIsNot(font.getGlyph('B'), None)
+        self.assertEqual(font.cacheInfo().misses, 4)
+
+        font.setCacheSize(0)
+        self.assertEqual(font.cacheInfo().currsize, 0)
+        self.assertIsNot(font.getGlyph('A'), a)
+
+        font.clearCache()
+        self.assertEqual(font.cacheInfo(), (0, 0, 0, 0))
+
+    def test_glyph(self):
+        font = MuiFont()
+        glyph = font.getGlyph('A')
+        self.assertEqual((glyph.code, glyph.width, glyph.height), (0x41, glyph.bitmap.width, glyph.bitmap.height))
+        self.assertGreater(glyph.bitmap.asarray().sum(), 0)
+
+        # space and full width exclamation
+        self.assertEqual(font.getGlyph(' ').bitmap.asarray().sum(), 0)
+        self.assertTrue(np.array_equal(font.getGlyph('！').bitmap.asarray(), font.getGlyph('!').bitmap.asarray()))
+
+    def test_immutable(self):
+        font = MuiFont()
+        glyph = font.getGlyph('A')
+        before = glyph.bitmap.asarray().copy()
+
+        # getText returns a copy which can be changed
+        m = font.getText('A')
+        self.assertIsNot(m, glyph.bitmap)
+        self.assertTrue(np.array_equal(m.asarray(), before))
+        m.matrix[:, :] = 1
+        m.startX = 10
+        self.assertTrue(np.array_equal(glyph.bitmap.asarray(), before))
+        self.assertEqual(glyph.bitmap.startX, 0)
+        self.assertTrue(np.array_equal(font.getText('A').asarray(), before))
+
+        # glyph itself can not be changed
+        with self.assertRaises(AttributeError):
+            glyph.bitmap = m
+
+
+class FontAtlasTestSuite(unittest.TestCase):
+    """Memory-mapped font atlas."""
+
+    def test_atlas(self):
+        atlas = FontAtlas(fontAtlasFile)
+        self.assertIn(0x41, atlas)
+        w, h, rows = atlas.getGlyph(0x41)
+        self.assertEqual((w, h, len(rows)), (7, 8, 8))
+        self.assertIsNone(atlas.getGlyph(0x10FFFF))
+        rows.release()
+        atlas.close()
+
+    def test_big_endian_host(self):
+        # codes are little endian in file regardless of host byte order
+        with mock.patch.object(sys, 'byteorder', 'big'):
+            atlas = FontAtlas(fontAtlasFile)
+        self.assertIsInstance(atlas._codes, tuple)
+        w, h, rows = atlas.getGlyph(0x41)
+        self.assertEqual((w, h), (7, 8))
+        self.assertNotIn(0x41000000, atlas)
+        rows.release()
+        atlas.close()
+
+    def test_broken(self):
+        with open(fontAtlasFile, 'rb') as f:
+            data = f.read()
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'broken.atlas')
+            # empty, shorter than header, wrong magic, truncated glyphs
+            for broken in (b'', data[:5], b'XXXX' + data[4:], data[:100]):
+                with open(path, 'wb') as f:
+                    f.write(broken)
+                with self.assertRaises(ValueError):
+                    FontAtlas(path)
+
+
+class TextLayoutTestSuite(unittest.TestCase):
+    """Line folding of TextLayout and drawing of Text."""
+
+    def test_fold(self):
+        layout = TextLayout(12)
+        layout.append(_Font(), 'abWc')
+        # 'b' fits exactly, 'W' and 'c' are folded
+        self.assertEqual([(i, x, line) for i, x, line, _ in layout.runs], [(0, 0, 0), (1, 5, 0), (2, 0, 1), (3, 0, 2)])
+        self.assertEqual(layout.lineWidths, [10, 9, 5])
+        self.assertEqual((layout.width, layout.height, layout.lineCount), (10, 8 + (2 * LINE_OFFSET), 3))
+
+        # character wider than the line is not folded again
+        layout = TextLayout(4)
+        layout.append(_Font(), 'W')
+        self.assertEqual(layout.lineWidths, [9])
+
+    def test_new_line(self):
+        layout = TextLayout(100)
+        layout.append(_Font(), 'a\n\nb')
+        self.assertEqual([(i, x, line) for i, x, line, _ in layout.runs], [(0, 0, 0), (3, 0, 2)])
+        self.assertEqual(layout.cursors, [(5, 0, False), (0, 1, True), (0, 2, True), (5, 2, False)])
+        self.assertEqual(layout.lineWidths, [5, 0, 5])
+
+    def test_append(self):
+        # appended text continues the last line
+        a = TextLayout(12)
+        a.append(_Font(), 'ab')
+        a.append(_Font(), 'c\nd')
+        b = TextLayout(12)
+        b.append(_Font(), 'abc\nd')
+        self.assertEqual([r[:3] for r in a.runs], [r[:3] for r in b.runs])
+        self.assertEqual((a.cursors, a.lineWidths), (b.cursors, b.lineWidths))
+
+    def test_folded_offset(self):
+        # folded line starts at the inset of the first line, not at column 0
+        text = Text('AAAA', Border.AROUND)
+        text.setSize(0, 0, 30, 24)
+        m = text.getMatrix().asarray()
+        glyph = MuiFont.get_instance().getGlyph('A')
+        # 4 dots of width are for border
+        self.assertEqual(text.getLayout().maxWidth, 26)
+        self.assertEqual(text.getLayout().lineWidths, [3 * glyph.width, glyph.width])
+        self.assertEqual(m[:, 2 + (3 * glyph.width) + 1].sum(), 24)
+
+        first = m[2:10, 2:2 + glyph.width]
+        self.assertTrue(np.array_equal(first, glyph.bitmap.asarray()))
+        self.assertTrue(np.array_equal(m[2 + LINE_OFFSET:10 + LINE_OFFSET, 2:2 + glyph.width], first))
+        # only the border is drawn left of the folded line
+        self.assertEqual(m[2 + LINE_OFFSET:10 + LINE_OFFSET, 1].sum(), 0)
+
+    def test_add_text(self):
+        # addText draws same text as setText of whole text, folded lines too
+        a = Text('AB')
+        a.setSize(0, 0, 30, 24)
+        a.getMatrix()
+        a.addText('CDEF')
+        b = Text('ABCDEF')
+        b.setSize(0, 0, 30, 24)
+        self.assertTrue(np.array_equal(a.getMatrix().asarray(), b.getMatrix().asarray()))
+        self.assertEqual(a.getTextWidth(MuiFont.get_instance(), 'ABCDEF'), b.getLayout().width)
+
+        # addText before first getMatrix
+        c = Text()
+        c.setSize(0, 0, 30, 24)
+        c.addText('ABC')
+        c.addText('DEF')
+        self.assertTrue(np.array_equal(c.getMatrix().asarray(), b.getMatrix().asarray()))
+
+
+if __name__ == '__main__':
+    unittest.main()